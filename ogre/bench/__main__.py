@@ -0,0 +1,104 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Command-line interface to the benchmarks.
+"""
+
+import sys
+import json
+import logging
+import argparse
+
+from ogre.bench import suite
+
+
+def main(argv=None):
+    """Run the benchmarks and return the exit status."""
+
+    args = parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = suite.run([suite.SCALES[name] for name in args.scales],
+                        args.corpus)
+
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file_object:
+            json.dump(results, file_object, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file_object:
+            baseline = json.load(file_object)
+        regressions = suite.compare(results, baseline, args.tolerance)
+        for scale, stage, ratio in regressions:
+            print('Regression in {} {}: {:.0%} of baseline'.format(
+                scale, stage, ratio), file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+
+    parser = argparse.ArgumentParser(prog='python -m ogre.bench')
+
+    parser.add_argument('-s', '--scale',
+                        dest='scales',
+                        action='append',
+                        choices=list(suite.SCALES),
+                        help='number of debtors and banks, can be repeated '
+                             '(default: small)')
+
+    parser.add_argument('--corpus',
+                        dest='corpus',
+                        help='directory with XML replies instead of synthetic ones')
+
+    parser.add_argument('-o', '--output',
+                        dest='output',
+                        help='save results to a JSON file')
+
+    parser.add_argument('-b', '--baseline',
+                        dest='baseline',
+                        help='compare results against a JSON file')
+
+    parser.add_argument('-t', '--tolerance',
+                        dest='tolerance',
+                        type=float,
+                        default=0.1,
+                        help='slowdown ignored when comparing (default: 0.1)')
+
+    namespace = parser.parse_args(argv)
+
+    if not namespace.scales:
+        namespace.scales = ['small']
+
+    return namespace
+
+
+if __name__ == '__main__':
+    sys.exit(main())
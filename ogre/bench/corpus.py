@@ -0,0 +1,315 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Synthetic Ognivo replies for benchmarking and load testing.
+
+Each bank sends replies about every debtor split into files of varying size,
+which mirrors how the requests are dispatched in batches. Banks are taken
+from the configured prefixes, natural persons get Polish names with valid
+PESEL numbers, whereas legal entities get valid NIP or REGON numbers.
+
+Optionally, some replies are sent again later, either repeating the answer
+or contradicting it, to exercise deduplication in the model. The corpus is
+deterministic for a given seed.
+
+Usage:
+$ python -m ogre.bench.corpus output_dir --debtors 10000 --banks 200
+"""
+
+import os
+import sys
+import math
+import random
+import argparse
+import datetime
+import collections
+
+from xml.sax.saxutils import escape, quoteattr
+
+from ogre.config import config
+
+
+Options = collections.namedtuple('Options', [
+    'debtors_per_file',   # mean number of debtors in a single reply file
+    'file_size_sigma',    # spread of the log-normal file size distribution
+    'person_ratio',       # share of natural persons among debtors
+    'yes_ratio',          # share of replies confirming a bank account
+    'time_ratio',         # share of reply dates with the time of day
+    'duplicate_ratio',    # share of replies sent again with the same answer
+    'inconsistent_ratio', # share of replies sent again with another answer
+])
+
+DEFAULT_OPTIONS = Options(
+    debtors_per_file=100,
+    file_size_sigma=0.0,
+    person_ratio=0.8,
+    yes_ratio=0.1,
+    time_ratio=0.0,
+    duplicate_ratio=0.0,
+    inconsistent_ratio=0.0)
+
+MALE_NAMES = ('Jan', 'Piotr', 'Krzysztof', 'Andrzej', 'Tomasz', 'Paweł',
+              'Michał', 'Łukasz', 'Józef', 'Zdzisław', 'Grzegorz', 'Wojciech',
+              'Bartłomiej', 'Mikołaj', 'Stanisław', 'Jerzy')
+
+FEMALE_NAMES = ('Anna', 'Katarzyna', 'Małgorzata', 'Agnieszka', 'Barbara',
+                'Ewa', 'Elżbieta', 'Żaneta', 'Joanna', 'Zofia', 'Urszula',
+                'Jadwiga', 'Bożena', 'Grażyna', 'Teresa', 'Łucja')
+
+LAST_NAMES = ('Nowak', 'Kowalski', 'Wiśniewski', 'Wójcik', 'Kowalczyk',
+              'Kamiński', 'Lewandowski', 'Zieliński', 'Szymański', 'Woźniak',
+              'Dąbrowski', 'Kozłowski', 'Jankowski', 'Mazur', 'Kwiatkowski',
+              'Krawczyk', 'Piotrowski', 'Grabowski', 'Nowakowski', 'Pawłowski',
+              'Michalski', 'Król', 'Wieczorek', 'Jabłoński', 'Wróbel',
+              'Zając', 'Gołębiowski', 'Sikora', 'Ostrowski', 'Baran',
+              'Żak', 'Głowacki', 'Wysocki', 'Ślusarczyk', 'Brzęczyszczykiewicz')
+
+COMPANY_NAMES = ('Przedsiębiorstwo Handlowo-Usługowe „{}” Sp. z o.o.',
+                 '{} i Wspólnicy Sp. j.',
+                 'Zakład Usług Remontowo-Budowlanych {}',
+                 '{} & Syn S.C.',
+                 'Spółdzielnia Mleczarska „{}”',
+                 'Firma Transportowa {} Sp. z o.o. Sp. k.')
+
+# Number of digits in a Polish bank sort code including the prefix
+BANK_CODE_LENGTH = 8
+
+PESEL_WEIGHTS = (1, 3, 7, 9, 1, 3, 7, 9, 1, 3)
+NIP_WEIGHTS = (6, 5, 7, 2, 3, 4, 5, 6, 7)
+REGON_WEIGHTS = (8, 9, 2, 3, 4, 5, 6, 7)
+
+FIRST_DATE = datetime.datetime(2016, 1, 1)
+
+
+def write_corpus(directory, num_debtors, num_banks, seed=0, options=None):
+    """Write XML replies of banks about debtors and return their paths."""
+
+    options = options or DEFAULT_OPTIONS
+
+    rnd = random.Random(seed)
+
+    os.makedirs(directory, exist_ok=True)
+
+    debtors = [_make_debtor(rnd, i, options) for i in range(num_debtors)]
+
+    file_paths = []
+    for bank_code in get_bank_codes(num_banks):
+
+        resent = []
+
+        date = FIRST_DATE + datetime.timedelta(days=rnd.randrange(300))
+        for batch in _split(rnd, debtors, options):
+            replies = [(debtor, rnd.random() < options.yes_ratio)
+                       for debtor in batch]
+            file_paths.append(_write_reply(
+                directory, len(file_paths), rnd, bank_code, date, replies,
+                options))
+            resent.extend(_resend(rnd, replies, options))
+
+        date += datetime.timedelta(days=1 + rnd.randrange(30))
+        for batch in _split(rnd, resent, options):
+            file_paths.append(_write_reply(
+                directory, len(file_paths), rnd, bank_code, date, batch,
+                options))
+
+    return file_paths
+
+
+def get_bank_codes(num_banks):
+    """Return eight-digit codes of real banks from the configuration."""
+    prefixes = sorted(config().get_all('prefixes'))
+    codes = []
+    for i in range(num_banks):
+        prefix = prefixes[i % len(prefixes)]
+        codes.append('{}{:0{}d}'.format(prefix, i // len(prefixes),
+                                        BANK_CODE_LENGTH - len(prefix)))
+    return codes
+
+
+def get_pesel(number, female=False):
+    """Return a valid PESEL uniquely corresponding to the given number."""
+
+    days, serial = number % 27000, number // 27000 * 2 + (not female)
+    assert serial < 10000, 'too many natural persons'
+
+    birth_date = datetime.date(1930, 1, 1) + datetime.timedelta(days=days)
+    month = birth_date.month + (20 if birth_date.year >= 2000 else 0)
+    digits = '{:02d}{:02d}{:02d}{:04d}'.format(
+        birth_date.year % 100, month, birth_date.day, serial)
+
+    return digits + str(_checksum(digits, PESEL_WEIGHTS, 10, lambda x: -x))
+
+
+def get_nip(number):
+    """Return a valid NIP uniquely corresponding to the given number."""
+
+    # Nine digits with a leading tax office code, some lack a valid checksum
+    candidate = 100000000 + number * 11
+    while True:
+        digits = str(candidate)
+        checksum = _checksum(digits, NIP_WEIGHTS, 11)
+        if checksum < 10:
+            return digits + str(checksum)
+        candidate += 1
+
+
+def get_regon(number):
+    """Return a valid REGON uniquely corresponding to the given number."""
+    digits = '{:08d}'.format(10000000 + number)
+    return digits + str(_checksum(digits, REGON_WEIGHTS, 11) % 10)
+
+
+def _checksum(digits, weights, modulo, function=lambda x: x):
+    """Return weighted sum of digits modulo the given number."""
+    total = sum(int(digit) * weight for digit, weight in zip(digits, weights))
+    return function(total) % modulo
+
+
+def _make_debtor(rnd, number, options):
+    """Return XML fragments preceding and following the answer of a debtor."""
+
+    if rnd.random() < options.person_ratio:
+
+        female = rnd.random() < 0.5
+        first_name = rnd.choice(FEMALE_NAMES if female else MALE_NAMES)
+        last_name = rnd.choice(LAST_NAMES)
+
+        if rnd.random() < 0.1:
+            last_name += '-' + rnd.choice(LAST_NAMES)
+
+        if female:
+            last_name = '-'.join(map(_feminine, last_name.split('-')))
+
+        return (
+            '<Dluznik><OsobaFizyczna><Imie>{}</Imie><Nazwisko>{}</Nazwisko>'
+            '<Oznaczenie><Pesel>{}</Pesel></Oznaczenie><Odpowiedz>'.format(
+                escape(first_name), escape(last_name),
+                get_pesel(number, female)),
+            '</Odpowiedz></OsobaFizyczna></Dluznik>')
+
+    name = rnd.choice(COMPANY_NAMES).format(rnd.choice(LAST_NAMES))
+
+    if rnd.random() < 0.5:
+        identity = '<NIP>{}</NIP>'.format(get_nip(number))
+    else:
+        identity = '<REGON>{}</REGON>'.format(get_regon(number))
+
+    return (
+        '<Dluznik><OsobaPrawna><NazwaInstytucji>{}</NazwaInstytucji>'
+        '<Oznaczenie>{}</Oznaczenie><Odpowiedz>'.format(escape(name), identity),
+        '</Odpowiedz></OsobaPrawna></Dluznik>')
+
+
+def _feminine(last_name):
+    """Return feminine form of a Polish last name."""
+    if last_name.endswith(('ski', 'cki', 'dzki')):
+        return last_name[:-1] + 'a'
+    return last_name
+
+
+def _split(rnd, items, options):
+    """Return a generator of batches with log-normally distributed sizes."""
+
+    mean = max(1, options.debtors_per_file)
+    sigma = options.file_size_sigma
+    mu = math.log(mean) - sigma * sigma / 2
+
+    i = 0
+    while i < len(items):
+        size = mean if sigma <= 0 else max(1, int(rnd.lognormvariate(mu, sigma)))
+        yield items[i:i + size]
+        i += size
+
+
+def _resend(rnd, replies, options):
+    """Return a list of replies that will be sent once again later."""
+
+    resent = []
+    for debtor, has_account in replies:
+        chance = rnd.random()
+        if chance < options.duplicate_ratio:
+            resent.append((debtor, has_account))
+        elif chance < options.duplicate_ratio + options.inconsistent_ratio:
+            resent.append((debtor, not has_account))
+
+    return resent
+
+
+def _write_reply(directory, number, rnd, bank_code, date, replies, options):
+    """Write a single reply file and return its path."""
+
+    if rnd.random() < options.time_ratio:
+        date = date.replace(hour=rnd.randrange(8, 18), minute=rnd.randrange(60))
+        date_string = date.isoformat()
+    else:
+        date_string = date.date().isoformat()
+
+    chunks = [
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<ePismo xmlns="https://www.online.ognivo.pl" dataPisma={}>\n'
+        '<NadawcaPisma><KodBanku>{}</KodBanku></NadawcaPisma>\n'
+        '<TrescPisma Zawartosc="Tresc"><Dluznicy>\n'.format(
+            quoteattr(date_string), bank_code)
+    ]
+
+    for (head, tail), has_account in replies:
+        chunks.append(head)
+        chunks.append('tak' if has_account else 'nie')
+        chunks.append(tail)
+        chunks.append('\n')
+
+    chunks.append('</Dluznicy></TrescPisma></ePismo>\n')
+
+    path = os.path.join(directory, '{}-{:07d}.xml'.format(bank_code, number))
+    with open(path, 'w', encoding='utf-8') as file_object:
+        file_object.write(''.join(chunks))
+
+    return path
+
+
+def main(argv=None):
+    """Write a corpus with options given on the command line."""
+
+    parser = argparse.ArgumentParser(prog='python -m ogre.bench.corpus')
+    parser.add_argument('directory', help='output directory')
+    parser.add_argument('--debtors', type=int, default=1000)
+    parser.add_argument('--banks', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+
+    for name, default in DEFAULT_OPTIONS._asdict().items():
+        parser.add_argument('--' + name.replace('_', '-'),
+                            dest=name,
+                            type=type(default),
+                            default=default)
+
+    args = parser.parse_args(argv)
+
+    options = Options(**{name: getattr(args, name) for name in Options._fields})
+    file_paths = write_corpus(args.directory, args.debtors, args.banks,
+                              args.seed, options)
+
+    print('Written {} files to {}'.format(len(file_paths), args.directory))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Microbenchmarks of the hot primitives of the PDF layer.
+
+Each primitive is called repeatedly on a fresh canvas to measure operations
+per second, and once more under tracemalloc to measure the peak memory
+allocated during a call, including temporary objects freed before it
+returns, as well as memory blocks retained per call. Results can be stored
+as JSON and compared against a baseline.
+
+Usage:
+$ python -m ogre.bench.micro -o baseline.json
+$ python -m ogre.bench.micro -b baseline.json -t 0.2
+"""
+
+import gc
+import sys
+import json
+import timeit
+import argparse
+import platform
+import tracemalloc
+import collections
+
+import ogre
+
+from ogre.pdf import Table, TableAlign, Header, Column
+from ogre.pdf import HAlign, VAlign
+from ogre.pdf.canvas import Canvas
+
+
+BENCHMARKS = collections.OrderedDict()
+
+LOREM_IPSUM = (
+    'Lorem ipsum dolor sit amet, consectetur adipisicing elit, sed do '
+    'eiusmod tempor incididunt ut labore et dolore magna aliqua. Zażółć '
+    'gęślą jaźń.')
+
+# Absolute increase of retained memory per call treated as noise
+RETAINED_BYTES_SLACK = 64
+
+# Absolute increase of peak memory allocated per call treated as noise
+PEAK_BYTES_SLACK = 256
+
+
+def benchmark(name):
+    """Register a function, which returns a primitive to be measured."""
+    def decorator(function):
+        BENCHMARKS[name] = function
+        return function
+    return decorator
+
+
+@benchmark('canvas.text')
+def _canvas_text():
+    canvas = _make_canvas()
+    return lambda: canvas.text('Bank Polska Kasa Opieki SA', 10, 10, 50,
+                               halign=HAlign.CENTER)
+
+
+@benchmark('canvas.wrap')
+def _canvas_wrap():
+    canvas = _make_canvas()
+    return lambda: canvas._wrap(LOREM_IPSUM, 40)
+
+
+@benchmark('canvas.grid')
+def _canvas_grid():
+    canvas = _make_canvas()
+    columns = [10, 50, 75, 105, 130, 160, 185]
+    rows = [15 + 11 * i for i in range(24)]
+    return lambda: canvas.grid(columns, rows)
+
+
+@benchmark('state.push_pop')
+def _state_push_pop():
+    canvas = _make_canvas()
+
+    def push_pop():
+        canvas.push_state()
+        canvas.pop_state()
+
+    return push_pop
+
+
+@benchmark('table.cell')
+def _table_cell():
+    canvas = _make_canvas()
+    table = Table(canvas,
+                  Header(15, [Column(w, 'Title') for w in (40, 25, 30)]),
+                  row_height=11,
+                  align=TableAlign(top=10, bottom=10))
+    return lambda: table.cell(0, 0, 'Bank Polska Kasa Opieki SA',
+                              HAlign.CENTER, VAlign.MIDDLE)
+
+
+@benchmark('font.properties')
+def _font_properties():
+    font = _make_canvas().font
+
+    def access():
+        return font.name, font.size_pts, font.leading_pts, font.ascent_pts
+
+    return access
+
+
+@benchmark('stroke_fill.apply')
+def _stroke_fill_apply():
+    canvas = _make_canvas()
+
+    def apply():
+        canvas.stroke.apply()
+        canvas.fill.apply()
+
+    return apply
+
+
+def run(names=None, number=1000, repeat=5):
+    """Return results of the selected or all benchmarks."""
+
+    results = {
+        'version': ogre.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'benchmarks': collections.OrderedDict(),
+    }
+
+    for name, setup in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        results['benchmarks'][name] = measure(setup, number, repeat)
+
+    return results
+
+
+def measure(setup, number, repeat):
+    """Return operations per second, peak and retained memory per call."""
+
+    function = setup()
+    function()  # warm up caches, e.g. register fonts
+
+    gc.collect()
+    best = min(timeit.repeat(function, number=number, repeat=repeat))
+
+    function = setup()
+    function()
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        peak_bytes = 0
+        for _ in range(number):
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes += peak - start
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(ignored).compare_to(
+        before.filter_traces(ignored), 'filename')
+
+    return {
+        'ops_per_sec': number / best if best > 0 else None,
+        'peak_bytes_per_call': peak_bytes / number,
+        'retained_blocks_per_call': sum(x.count_diff for x in stats) / number,
+        'retained_bytes_per_call': sum(x.size_diff for x in stats) / number,
+    }
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Return a list of benchmarks which got worse beyond tolerance.
+
+    Each item is a tuple of benchmark name, metric name and the ratio of
+    the current value to the baseline.
+    """
+
+    regressions = []
+    for name, current in results['benchmarks'].items():
+
+        previous = baseline.get('benchmarks', {}).get(name)
+        if previous is None:
+            continue
+
+        if current['ops_per_sec'] and previous['ops_per_sec']:
+            ratio = current['ops_per_sec'] / previous['ops_per_sec']
+            if ratio < 1.0 - tolerance:
+                regressions.append((name, 'ops_per_sec', ratio))
+
+        if 'peak_bytes_per_call' in previous:
+            limit = previous['peak_bytes_per_call'] * (1.0 + tolerance)
+            if current['peak_bytes_per_call'] > limit + PEAK_BYTES_SLACK:
+                ratio = current['peak_bytes_per_call'] / \
+                        max(previous['peak_bytes_per_call'], 1)
+                regressions.append((name, 'peak_bytes_per_call', ratio))
+
+        limit = max(previous['retained_bytes_per_call'], 0) * (1.0 + tolerance)
+        if current['retained_bytes_per_call'] > limit + RETAINED_BYTES_SLACK:
+            ratio = current['retained_bytes_per_call'] / \
+                    max(previous['retained_bytes_per_call'], 1)
+            regressions.append((name, 'retained_bytes_per_call', ratio))
+
+    return regressions
+
+
+def _make_canvas():
+    """Return a new canvas with a single page."""
+    canvas = Canvas()
+    canvas.add_page()
+    return canvas
+
+
+def main(argv=None):
+    """Run the microbenchmarks and return the exit status."""
+
+    parser = argparse.ArgumentParser(prog='python -m ogre.bench.micro')
+
+    parser.add_argument('-k', '--benchmark',
+                        dest='names',
+                        action='append',
+                        choices=list(BENCHMARKS),
+                        help='run only the selected benchmark, can be repeated')
+
+    parser.add_argument('-n', '--number',
+                        type=int,
+                        default=1000,
+                        help='number of calls per measurement (default: 1000)')
+
+    parser.add_argument('-o', '--output',
+                        help='save results to a JSON file')
+
+    parser.add_argument('-b', '--baseline',
+                        help='compare results against a JSON file')
+
+    parser.add_argument('-t', '--tolerance',
+                        type=float,
+                        default=0.2,
+                        help='relative change ignored when comparing (default: 0.2)')
+
+    args = parser.parse_args(argv)
+
+    results = run(args.names, args.number)
+
+    for name, result in results['benchmarks'].items():
+        print('{:<20} {:>12,.0f} ops/s {:>10.1f} peak B/call '
+              '{:>8.1f} blocks/call {:>10.1f} B/call'.format(
+            name,
+            result['ops_per_sec'] or 0,
+            result['peak_bytes_per_call'],
+            result['retained_blocks_per_call'],
+            result['retained_bytes_per_call']))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file_object:
+            json.dump(results, file_object, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file_object:
+            baseline = json.load(file_object)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, ratio in regressions:
+            print('Regression in {} {}: {:.0%} of baseline'.format(
+                name, metric, ratio), file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
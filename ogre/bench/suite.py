@@ -0,0 +1,190 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+End-to-end benchmark of the pipeline stages at several scales.
+
+Stages are timed separately: parsing of XML replies, construction of the
+model, sorting of debtors, rendering of the template and saving of the PDF
+document. Results are plain dicts, which serialize to JSON and can be
+compared against a previously stored baseline.
+
+The maximum resident set size only grows over the run. To get the peak
+memory allocated within each stage, start Python with -X tracemalloc at
+the expense of slower timings.
+"""
+
+import os
+import time
+import platform
+import tempfile
+import tracemalloc
+import collections
+
+import ogre
+
+from ogre.bench.corpus import write_corpus
+from ogre.metrics import get_peak_rss
+from ogre.ognivo.model import Model, get_sort_key
+from ogre.ognivo.parser import BankReplyParser
+from ogre.pdf import Document
+from ogre.report.report import get_backend, get_compression
+from ogre.report.template import Template
+
+
+Scale = collections.namedtuple('Scale', 'name num_debtors num_banks')
+
+SCALES = collections.OrderedDict((scale.name, scale) for scale in [
+    Scale('small', 100, 50),
+    Scale('medium', 10000, 200),
+    Scale('large', 100000, 600),
+])
+
+STAGES = ('parse', 'model', 'sort', 'render', 'save')
+
+
+def run(scales, corpus_dir=None):
+    """Return benchmark results of the given scales or an existing corpus."""
+
+    results = {
+        'version': ogre.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scales': {},
+    }
+
+    if corpus_dir is not None:
+        results['scales']['corpus'] = run_corpus(_list_files(corpus_dir))
+    else:
+        for scale in scales:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                file_paths = write_corpus(temp_dir,
+                                          scale.num_debtors,
+                                          scale.num_banks)
+                results['scales'][scale.name] = run_corpus(file_paths)
+
+    return results
+
+
+def run_corpus(file_paths):
+    """Return results of each stage run over the given XML files."""
+
+    stages = collections.OrderedDict()
+
+    with _Stage(stages, 'parse') as stage:
+        for path in file_paths:
+            parser = BankReplyParser(path)
+            stage.items += sum(1 for _ in parser.entities)
+
+    with _Stage(stages, 'model') as stage:
+        model = Model(file_paths)
+        stage.items = len(file_paths)
+
+    # The model computes sort keys while adding files, so do it over again
+    with _Stage(stages, 'sort') as stage:
+        sorted_debtors = sorted(model.debtors, key=get_sort_key)
+        stage.items = len(sorted_debtors)
+
+    document = Document(get_compression(), get_backend())
+    with _Stage(stages, 'render') as stage:
+        template = Template(document.canvas)
+        for debtor in sorted_debtors:
+            template.render(debtor, model.replies[debtor])
+        stage.items = document.canvas.num_pages
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'report.pdf')
+        with _Stage(stages, 'save') as stage:
+            if document.canvas.num_pages > 0:
+                document.save(path)
+                stage.items = os.path.getsize(path)
+
+    return {
+        'files': len(file_paths),
+        'debtors': len(model.debtors),
+        'banks': len(model.banks),
+        'replies': sum(len(x) for x in model.replies.values()),
+        'pages': document.canvas.num_pages,
+        'output_bytes': stages['save']['items'],
+        'stages': stages,
+    }
+
+
+def compare(results, baseline, tolerance=0.1):
+    """Return a list of stages slower than in the baseline beyond tolerance.
+
+    Each item is a tuple of scale name, stage name and the ratio of times.
+    """
+
+    regressions = []
+    for scale_name, scale in sorted(results['scales'].items()):
+        base_scale = baseline.get('scales', {}).get(scale_name)
+        if base_scale is None:
+            continue
+        for stage_name, stage in scale['stages'].items():
+            base_stage = base_scale['stages'].get(stage_name)
+            if not base_stage or not base_stage['seconds']:
+                continue
+            ratio = stage['seconds'] / base_stage['seconds']
+            if ratio > 1.0 + tolerance:
+                regressions.append((scale_name, stage_name, ratio))
+
+    return regressions
+
+
+def _list_files(directory):
+    """Return paths of XML files found recursively in the directory."""
+    return sorted(
+        os.path.join(root, filename)
+        for root, _, filenames in os.walk(directory)
+        for filename in filenames
+        if filename.lower().endswith('.xml'))
+
+
+class _Stage:
+    """Context manager measuring a single stage of the pipeline."""
+
+    def __init__(self, stages, name):
+        self._stages = stages
+        self._name = name
+        self._start = None
+        self._traced = None
+        self.items = 0
+
+    def __enter__(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._traced, _ = tracemalloc.get_traced_memory()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        seconds = time.perf_counter() - self._start
+        self._stages[self._name] = {
+            'seconds': seconds,
+            'items': self.items,
+            'throughput': self.items / seconds if seconds > 0 else None,
+            'max_rss_bytes': get_peak_rss(),
+        }
+        if self._traced is not None:
+            _, peak = tracemalloc.get_traced_memory()
+            self._stages[self._name]['peak_traced_bytes'] = peak - self._traced
@@ -0,0 +1,162 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Persistent cache of objects that are expensive to compute at startup.
+
+Entries are pickled into the user cache directory under names derived from
+a hash of their inputs, so stale entries are never read, only left behind.
+Numerous small entries can be compressed to save disk space, and pruned once
+they haven't been used for a while, since loading an entry renews its time of
+modification.
+"""
+
+import io
+import os
+import sys
+import time
+import zlib
+import pickle
+import hashlib
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+ENV_VARIABLE = 'OGRE_CACHE_DIR'
+
+# First byte of a zlib stream with the default window size
+_ZLIB_HEADER = b'\x78'
+
+
+def get_cache_dir():
+    """Return path to the user cache directory of the application."""
+
+    if os.environ.get(ENV_VARIABLE):
+        return os.environ[ENV_VARIABLE]
+
+    if sys.platform == 'win32':
+        base_dir = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base_dir = os.path.expanduser('~/Library/Caches')
+    else:
+        base_dir = os.environ.get('XDG_CACHE_HOME') or \
+                   os.path.expanduser('~/.cache')
+
+    return os.path.join(base_dir, 'ogre')
+
+
+def get_key(*parts):
+    """Return a hexadecimal digest of the given strings or bytes."""
+
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(part)
+        digest.update(b'\0')
+
+    return digest.hexdigest()
+
+
+def load(name, key):
+    """Return cached object or None if missing or unreadable."""
+
+    path = _get_path(name, key)
+
+    try:
+        with open(path, 'rb') as file_object:
+            if file_object.peek(1)[:1] == _ZLIB_HEADER:
+                data = zlib.decompress(file_object.read())
+                obj = pickle.load(io.BytesIO(data))
+            else:
+                obj = pickle.load(file_object)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.debug('Ignoring unreadable cache file %s', path)
+        return None
+
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    return obj
+
+
+def store(name, key, obj, pickler=pickle.Pickler, compress=False):
+    """Atomically write object to the cache and return true on success."""
+
+    path = _get_path(name, key)
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as file_object:
+                if compress:
+                    buffer = io.BytesIO()
+                    pickler(buffer, pickle.HIGHEST_PROTOCOL).dump(obj)
+                    file_object.write(zlib.compress(buffer.getvalue()))
+                else:
+                    pickler(file_object, pickle.HIGHEST_PROTOCOL).dump(obj)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except Exception:
+        logger.debug('Unable to write cache file %s', path, exc_info=True)
+        return False
+
+    return True
+
+
+def prune(name, max_age):
+    """Remove entries unused for longer than max_age seconds, return count."""
+
+    cutoff = time.time() - max_age
+    prefix = name + '-'
+
+    try:
+        entries = os.scandir(get_cache_dir())
+    except OSError:
+        return 0
+
+    removed = 0
+    with entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.name.endswith('.pickle'):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+                except OSError:
+                    pass
+
+    return removed
+
+
+def _get_path(name, key):
+    """Return path to the cache file with the given name and key."""
+    return os.path.join(get_cache_dir(), '{}-{}.pickle'.format(name, key))
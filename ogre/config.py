@@ -25,18 +25,36 @@ Resolver of the application configuration read from *.ini files.
 """
 
 import collections
+import contextlib
 import logging
+import threading
+import re
 
-from pkg_resources import resource_stream
 from configparser import RawConfigParser
 
+import ogre
+
+from ogre import cache
 from ogre.plural import PluralFormatter
+from ogre.resources import resource_stream
 
 logger = logging.getLogger(__name__)
 
 
 FILENAME = 'config.ini'
 
+_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+# Immutable properties parsed once per run for use in hot render loops
+Snapshot = collections.namedtuple('Snapshot', [
+    'show_time',
+    'show_rear',
+    'cache_fragments',
+    'watermark',
+    'backend',
+    'template',
+])
+
 
 class Config:
     """Properties grouped by sections."""
@@ -78,6 +96,10 @@ class Config:
 
         return value
 
+    def set(self, section, property_, value):
+        """Override a single property, e.g. with a command line option."""
+        self._override({section: {property_: value}})
+
     def get_all(self, section=None):
         """Return properties grouped by sections or from one section only."""
 
@@ -89,6 +111,16 @@ class Config:
 
         return {}
 
+    def snapshot(self):
+        """Return an immutable copy of properties parsed into their types."""
+        return Snapshot(
+            show_time=_to_bool(self.get('template', 'show_time')),
+            show_rear=_to_bool(self.get('template', 'show_rear')),
+            cache_fragments=_to_bool(self.get('template', 'cache_fragments')),
+            watermark=self.get('template', 'watermark'),
+            backend=self.get('pdf', 'backend'),
+            template=tuple(sorted(self.get_all('template').items())))
+
     def _override(self, dict_obj):
         """Update internal dict with keys and values from the given dict."""
         for name in dict_obj:
@@ -100,16 +132,37 @@ class Config:
 
 
 def config():
-    """Return cached mutable configuration."""
+    """Return configuration of the current scope or the cached global one."""
 
     global _INSTANCE
 
+    scoped = getattr(_LOCAL, 'instance', None)
+    if scoped is not None:
+        return scoped
+
     if _INSTANCE is None:
-        _INSTANCE = Config(_load_from_resource(__package__, FILENAME))
+        _INSTANCE = load()
 
     return _INSTANCE
 
 
+def load():
+    """Return a new configuration with the default properties."""
+    return Config(_load_from_resource(__package__, FILENAME))
+
+
+@contextlib.contextmanager
+def scope(instance):
+    """Make config() return the given instance in the current thread."""
+
+    previous = getattr(_LOCAL, 'instance', None)
+    _LOCAL.instance = instance
+    try:
+        yield instance
+    finally:
+        _LOCAL.instance = previous
+
+
 def _load_from_resource(package, filename):
     """Load configuration from an embedded resource."""
     return _load(resource_stream, package, filename)
@@ -127,24 +180,54 @@ def _load(source, *args, **kwargs):
 
     try:
         with source(*args, **kwargs) as file_object:
+            data = file_object.read()
+    except IOError:
+        logger.error('Unable to load configuration from %s', *args)
+        return sections
 
-            content = file_object.read().decode('utf-8')
+    # Skip parsing and decoding of files seen before by the same version
+    digest = cache.get_key(ogre.__version__, data)
 
-            parser = RawConfigParser()
-            parser.read_string(content)
+    cached = cache.load('config', digest)
+    if isinstance(cached, dict):
+        sections.update(cached)
+        return sections
 
-            for name in parser.sections():
-                for key, value in parser.items(name):
-                    sections[_decode(name)][_decode(key)] = _decode(value)
-    except IOError:
-        logger.error('Unable to load configuration from %s', *args)
+    parser = RawConfigParser()
+    parser.read_string(data.decode('utf-8'))
+
+    for name in parser.sections():
+        for key, value in parser.items(name):
+            sections[_decode(name)][_decode(key)] = _decode(value)
+
+    cache.store('config', digest, dict(sections))
 
     return sections
 
 
+def parse_size(text):
+    """Return the number of bytes given as text, e.g. 512M or 2G."""
+
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*', text, re.I)
+    if match is None:
+        raise ValueError('invalid size: {!r}'.format(text))
+
+    number, unit = match.groups()
+
+    return int(float(number) * _UNITS[unit.upper()])
+
+
+def _to_bool(text):
+    """Return True if the text reads true regardless of letter case."""
+    return bool(text) and text.strip().lower() == 'true'
+
+
 def _decode(text):
     """Return Unicode string decoded from escaped sequence."""
     return bytes(text, 'utf-8').decode('unicode_escape')
 
 
 _INSTANCE = None
+
+# Configuration of a job overriding the global one in its thread
+_LOCAL = threading.local()
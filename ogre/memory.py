@@ -0,0 +1,231 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Memory accounting per stage of a run based on tracemalloc snapshots.
+
+Only allocations made through the Python memory manager are traced, which
+covers the XML trees, the data model and the page buffers, but excludes
+memory held by the interpreter itself. Tracing slows a run down several
+times, so a budget alone is checked against the resident set size of the
+process instead, which costs next to nothing.
+"""
+
+import gc
+import os
+import sys
+import types
+import tracemalloc
+import collections
+
+from ogre.metrics import get_peak_rss
+from ogre.profiling import profiler
+
+StageMemory = collections.namedtuple('StageMemory', 'peak delta top')
+
+# Objects shared by the whole process rather than retained by a structure
+_SHARED_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+    types.FrameType,
+)
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when memory in use grows beyond the configured budget."""
+
+
+class MemoryReport:
+    """Listener of the profiler taking snapshots at stage boundaries."""
+
+    def __init__(self, budget=None, top=10, frames=1):
+        self.budget = budget
+        self.top = top
+        self.frames = frames
+        self.stages = collections.OrderedDict()
+        self.retained = collections.OrderedDict()
+        self.detailed = True
+        self._snapshot = None
+        self._current = 0
+
+    @property
+    def enabled(self):
+        """Return true if the report is collecting data."""
+        return self in profiler().listeners
+
+    def start(self, detailed=True):
+        """Start tracing memory allocations unless only checking a budget."""
+        self.detailed = detailed
+        if detailed:
+            tracemalloc.start(self.frames)
+        profiler().enabled = True
+        profiler().listeners.append(self)
+
+    def stop(self):
+        """Stop tracing memory allocations."""
+        if self.enabled:
+            profiler().listeners.remove(self)
+        tracemalloc.stop()
+        self._snapshot = None
+
+    def stage_started(self, name):
+        """Take a snapshot at the beginning of a stage."""
+        if not self.detailed:
+            return
+        self._snapshot = _take_snapshot()
+        self._current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+    def stage_finished(self, name):
+        """Compare memory with the snapshot taken when the stage started."""
+
+        if not self.detailed:
+            self.check(name)
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = _take_snapshot()
+
+        top = snapshot.compare_to(self._snapshot, 'lineno')[:self.top]
+        delta = current - self._current
+
+        previous = self.stages.get(name)
+        if previous is not None:
+            peak = max(peak, previous.peak)
+            delta += previous.delta
+
+        self.stages[name] = StageMemory(peak, delta, top)
+        self._snapshot = None
+
+        self.check(name)
+
+    def item_finished(self, kind, name):
+        """Abort if the memory in use exceeds the budget."""
+        self.check(name)
+
+    def check(self, where):
+        """Raise an exception if the memory in use exceeds the budget."""
+        if self.budget is not None:
+            current = get_rss()
+            if current is not None and current > self.budget:
+                raise MemoryBudgetExceeded(
+                    'Memory budget of {} exceeded after {} with {} in use'.format(
+                        format_size(self.budget), where, format_size(current)))
+
+    def retain(self, name, obj):
+        """Record the size of all objects reachable from the given one."""
+        if self.enabled and self.detailed:
+            self.retained[name] = get_retained_size(obj)
+
+    def summary(self):
+        """Return lines of text with memory usage of stages and objects."""
+
+        lines = ['{:<12}{:>12}{:>12}'.format('Stage', 'Peak', 'Delta')]
+
+        for name, memory in self.stages.items():
+            lines.append('{:<12}{:>12}{:>12}'.format(
+                name, format_size(memory.peak), format_size(memory.delta)))
+
+        for name, memory in self.stages.items():
+            if memory.top:
+                lines.append('')
+                lines.append('Top allocations in {}:'.format(name))
+                for i, stat in enumerate(memory.top):
+                    frame = stat.traceback[0]
+                    lines.append('{:>4}. {:>10}  {}:{}'.format(
+                        i + 1, format_size(stat.size_diff),
+                        frame.filename, frame.lineno))
+
+        if self.retained:
+            lines.append('')
+            lines.append('Retained size:')
+            for name, size in self.retained.items():
+                lines.append('  {:<22}{:>10}'.format(name, format_size(size)))
+
+        return lines
+
+
+def memory_report():
+    """Return a global instance of the memory report."""
+
+    global _INSTANCE
+
+    if _INSTANCE is None:
+        _INSTANCE = MemoryReport()
+
+    return _INSTANCE
+
+
+def get_rss():
+    """Return resident set size of the process in bytes or its peak."""
+    try:
+        with open('/proc/self/statm', 'rb') as file_object:
+            pages = int(file_object.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return get_peak_rss()
+
+
+def get_retained_size(obj):
+    """Return the total size in bytes of objects reachable from obj."""
+
+    seen = set()
+    stack = [obj]
+    total = 0
+
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SHARED_TYPES):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        stack.extend(gc.get_referents(item))
+
+    return total
+
+
+def format_size(size):
+    """Return a human-readable size with a binary unit."""
+
+    if abs(size) < 1024:
+        return '{} B'.format(size)
+
+    for unit in ('KiB', 'MiB', 'GiB'):
+        size /= 1024
+        if abs(size) < 1024 or unit == 'GiB':
+            break
+
+    return '{:.1f} {}'.format(size, unit)
+
+
+def _take_snapshot():
+    """Return a snapshot without allocations of tracemalloc itself."""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ))
+
+
+_INSTANCE = None
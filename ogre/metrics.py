@@ -0,0 +1,151 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Registry of counters describing a run, written as JSON for monitoring.
+"""
+
+import sys
+import json
+import datetime
+import threading
+import contextlib
+import collections
+
+import ogre
+
+from ogre.profiling import Timing, profiler
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Counters divided by the total wall time of stages
+RATES = (
+    ('files_per_second', 'files.scanned', ('parse', 'model')),
+    ('debtors_per_second', 'debtors', ('render',)),
+    ('pages_per_second', 'pages', ('render',)),
+    ('bytes_per_second', 'bytes.written', ('save',)),
+)
+
+
+class Registry:
+    """Named counters, which are cheap enough to be always updated."""
+
+    def __init__(self):
+        self._counters = collections.defaultdict(int)
+        self._start = {}
+
+    def __getitem__(self, name):
+        return self._counters[name]
+
+    def __setitem__(self, name, value):
+        self._counters[name] = value
+
+    def increment(self, name, value=1):
+        """Add value to the named counter."""
+        self._counters[name] += value
+
+    def reset(self):
+        """Zero all counters."""
+        self._counters.clear()
+
+    def to_dict(self):
+        """Return a JSON-serializable document with counters and timings."""
+
+        # Only count the time of stages since the scope of a job started
+        stages = {}
+        for name, timing in profiler().stages.items():
+            start = self._start.get(name, _ZERO)
+            if timing != start:
+                stages[name] = Timing(timing.wall - start.wall,
+                                      timing.cpu - start.cpu)
+
+        rates = {}
+        for rate, counter, names in RATES:
+            wall = sum(stages[x].wall for x in names if x in stages)
+            if counter in self._counters and wall > 0:
+                rates[rate] = self._counters[counter] / wall
+
+        return {
+            'timestamp': datetime.datetime.now().astimezone().isoformat(),
+            'version': ogre.__version__,
+            'counters': dict(sorted(self._counters.items())),
+            'rates': rates,
+            'stages': {name: {'wall': timing.wall, 'cpu': timing.cpu}
+                       for name, timing in stages.items()},
+            'peak_rss_bytes': get_peak_rss(),
+        }
+
+    def dump(self, path):
+        """Append the document as a single line to a JSON lines file."""
+        with open(path, 'a', encoding='utf-8') as file_object:
+            file_object.write(json.dumps(self.to_dict()) + '\n')
+
+
+def metrics():
+    """Return the registry of the current scope or a global instance."""
+
+    global _INSTANCE
+
+    scoped = getattr(_LOCAL, 'instance', None)
+    if scoped is not None:
+        return scoped
+
+    if _INSTANCE is None:
+        _INSTANCE = Registry()
+
+    return _INSTANCE
+
+
+@contextlib.contextmanager
+def scope(registry=None):
+    """Make metrics() return a separate registry in the current thread."""
+
+    previous = getattr(_LOCAL, 'instance', None)
+    _LOCAL.instance = Registry() if registry is None else registry
+    _LOCAL.instance._start = profiler().stages
+    try:
+        yield _LOCAL.instance
+    finally:
+        _LOCAL.instance = previous
+
+
+def get_peak_rss():
+    """Return peak resident set size of the process in bytes or None."""
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes whereas macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+_INSTANCE = None
+
+_ZERO = Timing(0.0, 0.0)
+
+# Registry of a job counting apart from the global one in its thread
+_LOCAL = threading.local()
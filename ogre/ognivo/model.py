@@ -25,22 +25,35 @@ Data model used to organize and group bank replies by debtor.
 """
 
 import collections
+import collections.abc
+import concurrent.futures
+import itertools
 import logging
 import datetime
+import functools
+import time
+import os
 
 import pyuca
 
-from ogre.ognivo.parser import BankReplyParser
+from ogre.ognivo.parser import BankReplyParser, XmlLimitExceeded, get_limits
 from ogre.config import config
+from ogre.memory import memory_report
+from ogre.metrics import metrics
+from ogre.profiling import profiler
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of threads reading files ahead of the one being parsed
+READ_WORKERS = 2
+
 
 class Identity:
     """Identifying number of a legal entity, e.g. PESEL, NIP, REGON."""
 
     def __init__(self, name, value):
         self.name = name.upper()
+        self.raw_value = value
         self.value = value.lstrip('0') \
             if isinstance(value, str) else value
 
@@ -138,65 +151,130 @@ class Bank:
         return 'Bank(code="{}", name="{}")'.format(self.code, self.name)
 
 
+FileStats = collections.namedtuple('FileStats', 'path seconds size entities')
+
+
 class Model:
     """A collection of debtors, banks and their replies."""
 
     def __init__(self, file_paths):
+        """Parse files in sorted order.
+
+        A collection of paths gets sorted upfront, whereas an iterator must
+        yield them in sorted order, which lets parsing start while the rest
+        of the directory is still being scanned.
+        """
+
+        assert isinstance(file_paths, collections.abc.Iterable), 'expected an iterable'
 
-        assert isinstance(file_paths, collections.Iterable), 'expected an iterable'
+        if isinstance(file_paths, collections.abc.Collection):
+            num_files = len(file_paths)
+            file_paths = sorted(file_paths)
+        else:
+            num_files = '?'
 
         self._banks = set()
         self._debtors = set()
         self._replies = collections.defaultdict(dict)
+        self._file_stats = []
+        self._sort_keys = {}
 
         logger.info('Scanning working directory...')
-        for i, file_path in enumerate(sorted(file_paths)):
-            try:
-                parser = BankReplyParser(file_path)
+        with profiler().stage('model'):
+            for i, (file_path, data) in enumerate(
+                    read_ahead(file_paths)):
+                start = time.perf_counter()
+                with profiler().item('files', file_path):
+                    num_entities = self._add_file(file_path, data)
+                self._file_stats.append(FileStats(
+                    file_path,
+                    time.perf_counter() - start,
+                    _get_size(file_path) if data is None else len(data),
+                    num_entities))
+                if num_entities is not None:
+                    logger.debug(
+                        'Processed file %d of %d "%s"',
+                        i + 1, num_files, file_path)
+
+        registry = metrics()
+        registry['debtors'] = len(self._debtors)
+        registry['banks'] = len(self._banks)
+        registry['replies'] = sum(len(x) for x in self._replies.values())
+
+        memory_report().retain('Model._replies', self._replies)
+        memory_report().retain('Model._debtors', self._debtors)
+
+    def _add_file(self, file_path, data=None):
+        """Return the number of entities in the file or None if invalid."""
+
+        registry = metrics()
+        registry.increment('files.scanned')
+
+        num_entities = 0
+        try:
+            with profiler().stage('parse'):
+                parser = BankReplyParser(file_path, data)
                 bank = Bank(parser.bank_code)
 
-                self._banks.add(bank)
-
-                for entity in parser.entities:
-
-                    reply = Reply(bank,
-                                  parser.date,
-                                  entity.has_account,
-                                  file_path)
-
-                    debtor = Debtor(entity)
-
-                    self._debtors.add(debtor)
+            self._banks.add(bank)
 
-                    if bank in self._replies[debtor]:
-                        previous_reply = self._replies[debtor][bank]
-                        if previous_reply.has_account != reply.has_account:
+            for entity in parser.entities:
 
-                            logger.warning(
-                                'Inconsistent replies from the same bank %s for %s',
-                                bank, debtor)
+                num_entities += 1
 
-                            if previous_reply.date == reply.date:
-                                del self._replies[debtor][bank]
-                                continue
-                            elif previous_reply.date > reply.date:
-                                continue
+                reply = Reply(bank,
+                              parser.date,
+                              entity.has_account,
+                              file_path)
 
-                    self._replies[debtor][bank] = reply
+                debtor = Debtor(entity)
 
-            except Exception:
-                logger.error(
-                    'Invalid or not well-formed XML content at %s', file_path)
-            else:
-                logger.debug(
-                    'Processed file %d of %d "%s"',
-                    i + 1, len(file_paths), file_path)
+                # Compute sort keys early while other files are being read
+                if debtor not in self._debtors:
+                    self._debtors.add(debtor)
+                    self._sort_keys[debtor] = get_sort_key(debtor)
+
+                if bank in self._replies[debtor]:
+                    registry.increment('replies.duplicates')
+                    previous_reply = self._replies[debtor][bank]
+                    if previous_reply.has_account != reply.has_account:
+                        registry.increment('replies.conflicts')
+
+                        logger.warning(
+                            'Inconsistent replies from the same bank %s for %s',
+                            bank, debtor)
+
+                        if previous_reply.date == reply.date:
+                            del self._replies[debtor][bank]
+                            continue
+                        elif previous_reply.date > reply.date:
+                            continue
+
+                self._replies[debtor][bank] = reply
+
+        except XmlLimitExceeded as ex:
+            logger.error('Rejected XML file at %s: %s', file_path, ex)
+            registry.increment('files.rejected')
+            return None
+        except Exception:
+            logger.error(
+                'Invalid or not well-formed XML content at %s', file_path)
+            registry.increment('files.rejected')
+            return None
+
+        registry.increment('files.parsed')
+        return num_entities
 
     @property
     def banks(self):
         """Return a set of banks corresponding to the files."""
         return self._banks
 
+    @property
+    def file_stats(self):
+        """Return a list of parse time, size and entity count per file."""
+        return self._file_stats
+
     @property
     def debtors(self):
         """Return a set of debtors parsed from the files."""
@@ -211,19 +289,70 @@ class Model:
     def sorted_debtors(self):
         """Return debtors sorted by name using Unicode collation."""
 
-        collator = pyuca.Collator()
+        sort_keys = self._sort_keys
 
         def key_function(debtor):
             """Return element's comparison key for sorting."""
-            if debtor.is_person:
-                return collator.sort_key(debtor.entity.last_name),\
-                       collator.sort_key(debtor.entity.first_name)
-            else:
-                return tuple(), collator.sort_key(debtor.name)
+            if debtor not in sort_keys:
+                sort_keys[debtor] = get_sort_key(debtor)
+            return sort_keys[debtor]
 
         return sorted(self.debtors, key=key_function)
 
 
+def read_ahead(file_paths, window=None, max_workers=READ_WORKERS):
+    """Yield paths and contents of files read in order by background threads.
+
+    The content is None when a file can't be read, exceeds the size limit or
+    reading ahead is disabled, leaving it to the parser to open the file.
+    """
+
+    if window is None:
+        window = _get_read_ahead()
+
+    if window < 1:
+        for file_path in file_paths:
+            yield file_path, None
+        return
+
+    max_size = get_limits().max_file_size
+    max_workers = min(window, max_workers)
+
+    file_paths = iter(file_paths)
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+
+        pending = collections.deque()
+
+        def submit(count):
+            for file_path in itertools.islice(file_paths, count):
+                pending.append((file_path,
+                                executor.submit(_read_file, file_path, max_size)))
+
+        submit(window)
+        while pending:
+            file_path, future = pending.popleft()
+            submit(1)
+            yield file_path, future.result()
+
+
+def get_sort_key(debtor):
+    """Return a key sorting people by last name before other entities."""
+
+    collator = get_collator()
+
+    if debtor.is_person:
+        return collator.sort_key(debtor.entity.last_name),\
+               collator.sort_key(debtor.entity.first_name)
+    else:
+        return tuple(), collator.sort_key(debtor.name)
+
+
+@functools.lru_cache(maxsize=None)
+def get_collator():
+    """Return a shared Unicode collator, which takes a while to load."""
+    return pyuca.Collator()
+
+
 def _get_name_and_prefix(bank_code):
     """Return textual name and a unique prefix of the corresponding bank."""
 
@@ -234,3 +363,28 @@ def _get_name_and_prefix(bank_code):
             return prefixes[prefix], prefix
 
     return bank_code, '?'
+
+
+def _get_read_ahead():
+    """Return the number of files to read ahead from the configuration."""
+    return int(config().get('xml', 'read_ahead').strip() or 0)
+
+
+def _read_file(file_path, max_size=None):
+    """Return the content of a file or None if unreadable or too large."""
+    try:
+        with open(file_path, 'rb') as file_object:
+            if max_size is None:
+                return file_object.read()
+            data = file_object.read(max_size + 1)
+            return data if len(data) <= max_size else None
+    except OSError:
+        return None
+
+
+def _get_size(file_path):
+    """Return the size of a file in bytes or None if it can't be accessed."""
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return None
@@ -22,22 +22,36 @@
 
 """
 Utilities for XML document handling.
+
+Replies are parsed incrementally under limits of the file size, nesting
+depth and the number of debtors, so that a huge or malicious file is
+rejected early rather than after building the whole tree in memory.
+Declarations of entities are rejected altogether, which rules out entity
+expansion attacks.
 """
 
+import io
+import os
 import codecs
+import xml.parsers.expat
 import xmltodict
 
 from collections import namedtuple
 
 import dateutil.parser
 
+from ogre.config import config, parse_size
+
+
+Limits = namedtuple('Limits', 'max_file_size max_depth max_debtors')
+
+CHUNK_SIZE = 64 * 1024
 
 Id = namedtuple('Id', 'name value')
 NaturalPerson = namedtuple('NaturalPerson', 'first_name last_name id has_account')
 LegalEntity = namedtuple('LegalEntity', 'name id has_account')
 
 
-
 class BankReplyParser:
     """Parser of an XML reply from a financial institution.
 
@@ -84,8 +98,8 @@ class BankReplyParser:
     </ePismo>
     """
 
-    def __init__(self, path):
-        self._xml = XmlDocument(path)
+    def __init__(self, path, data=None):
+        self._xml = XmlDocument(path, data=data)
 
     @property
     def date(self):
@@ -130,12 +144,33 @@ class BankReplyParser:
                     has_account(child))
 
 
+class XmlLimitExceeded(ValueError):
+    """Raised when an XML file exceeds one of the parsing limits."""
+
+
 class XmlDocument:
     """Convenience class for handling character encoding and querying XML."""
 
-    def __init__(self, path):
-        with codecs.open(path, encoding='utf-8') as fp:
-            self.xml = xmltodict.parse(fp.read(), process_namespaces=False)
+    def __init__(self, path, limits=None, data=None):
+        """Parse the file at path unless its raw content is given."""
+
+        limits = limits or get_limits()
+
+        if limits.max_file_size is not None:
+            try:
+                size = os.path.getsize(path) if data is None else len(data)
+            except OSError:
+                pass
+            else:
+                if size > limits.max_file_size:
+                    raise XmlLimitExceeded(
+                        'file size of {} bytes exceeds the limit'.format(size))
+
+        if data is None:
+            with codecs.open(path, encoding='utf-8') as fp:
+                self.xml = _parse(fp, limits)
+        else:
+            self.xml = _parse(io.BytesIO(data), limits)
 
     def get(self, xpath):
         """Return element corresponding to the given XPath expression."""
@@ -179,6 +214,130 @@ class XmlElement:
         return self.value.keys()
 
 
+class _LimitedExpat:
+    """Stand-in for the expat module creating parsers with limits."""
+
+    def __init__(self, limits):
+        self._limits = limits
+
+    def ParserCreate(self, *args, **kwargs):
+        """Return a parser enforcing the limits."""
+        return _LimitedParser(xml.parsers.expat.ParserCreate(*args, **kwargs),
+                              self._limits)
+
+
+class _LimitedParser:
+    """Expat parser wrapper checking the limits while the file is read."""
+
+    def __init__(self, parser, limits):
+        self._parser = parser
+        self._limits = limits
+        self._counts = {'depth': 0, 'debtors': 0}
+        parser.EntityDeclHandler = self._forbid_entities
+
+    def __getattr__(self, name):
+        return getattr(self._parser, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            super().__setattr__(name, value)
+        else:
+            if name == 'EntityDeclHandler':
+                return
+            if name == 'StartElementHandler':
+                value = self._wrap_start(value)
+            elif name == 'EndElementHandler':
+                value = self._wrap_end(value)
+            setattr(self._parser, name, value)
+
+    def ParseFile(self, file_object):
+        """Feed the parser with chunks of the file counting its size."""
+
+        max_file_size = self._limits.max_file_size
+
+        size = 0
+        while True:
+            chunk = file_object.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            # Count bytes rather than characters of the decoded text
+            if isinstance(chunk, str):
+                size += len(chunk.encode('utf-8'))
+            else:
+                size += len(chunk)
+            if max_file_size is not None and size > max_file_size:
+                raise XmlLimitExceeded(
+                    'file size exceeds the limit of {} bytes'.format(
+                        max_file_size))
+            self._parser.Parse(chunk, False)
+
+        return self._parser.Parse(b'', True)
+
+    def _wrap_start(self, handler):
+        """Return a start element handler checking depth and debtors."""
+
+        max_depth = self._limits.max_depth
+        max_debtors = self._limits.max_debtors
+        counts = self._counts
+
+        def start(name, attributes):
+            counts['depth'] += 1
+            if max_depth is not None and counts['depth'] > max_depth:
+                raise XmlLimitExceeded(
+                    'element depth exceeds the limit of {}'.format(max_depth))
+            if name == 'Dluznik' or name.endswith(':Dluznik'):
+                counts['debtors'] += 1
+                if max_debtors is not None and counts['debtors'] > max_debtors:
+                    raise XmlLimitExceeded(
+                        'number of debtors exceeds the limit of {}'.format(
+                            max_debtors))
+            return handler(name, attributes)
+
+        return start
+
+    def _wrap_end(self, handler):
+        """Return an end element handler tracking the depth."""
+
+        counts = self._counts
+
+        def end(name):
+            counts['depth'] -= 1
+            return handler(name)
+
+        return end
+
+    @staticmethod
+    def _forbid_entities(*args):
+        """Reject declarations of entities, which could be expanded."""
+        raise XmlLimitExceeded('entity declarations are not allowed')
+
+
+def _parse(file_object, limits):
+    """Return a dict of XML elements streamed from the file object.
+
+    Binary content is decoded as UTF-8 by expat itself, like the text read
+    from files, regardless of the encoding declared in the document.
+    """
+    return xmltodict.parse(file_object,
+                           encoding='utf-8',
+                           expat=_LimitedExpat(limits),
+                           process_namespaces=False)
+
+
+def get_limits():
+    """Return parsing limits from the configuration."""
+
+    cfg = config()
+
+    def get(name, type_):
+        value = cfg.get('xml', name).strip()
+        return type_(value) if value else None
+
+    return Limits(get('max_file_size', parse_size),
+                  get('max_depth', int),
+                  get('max_debtors', int))
+
+
 def capitalize(name):
     """Capitalize each word (possibly hyphenated) in a given name."""
 
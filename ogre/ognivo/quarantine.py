@@ -0,0 +1,123 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Detection of slow or unusual reply files and their quarantine.
+
+Files over a size or parse time budget can be moved to a quarantine
+directory to keep them out of subsequent runs until they're inspected.
+The directory comes from the configuration, so that every run skips it.
+"""
+
+import os
+import shutil
+import logging
+import statistics
+
+from ogre.config import config
+
+logger = logging.getLogger(__name__)
+
+
+def get_slowest(file_stats, top=10):
+    """Return statistics of the files which took longest to parse."""
+    return sorted(file_stats, key=lambda x: x.seconds, reverse=True)[:top]
+
+
+def get_outliers(file_stats, factor=10.0):
+    """Return (stats, bytes per entity) tuples far above the median."""
+
+    ratios = [(stats, stats.size / max(stats.entities, 1))
+              for stats in file_stats
+              if stats.size is not None and stats.entities is not None]
+
+    if len(ratios) < 2:
+        return []
+
+    median = statistics.median(ratio for _, ratio in ratios)
+
+    return sorted(((stats, ratio) for stats, ratio in ratios
+                   if ratio > factor * median),
+                  key=lambda x: x[1],
+                  reverse=True)
+
+
+def is_over_budget(stats, max_seconds=None, max_size=None):
+    """Return true if parsing the file took too long or it's too big."""
+    if max_seconds is not None and stats.seconds > max_seconds:
+        return True
+    if max_size is not None and stats.size is not None and stats.size > max_size:
+        return True
+    return False
+
+
+def get_directory(working_dir):
+    """Return path to the configured quarantine directory or None."""
+    name = config().get('xml', 'quarantine').strip()
+    return os.path.join(working_dir, name) if name else None
+
+
+def move_to_quarantine(file_path, directory, working_dir):
+    """Move a file to the quarantine directory keeping its relative path.
+
+    Return the new path or None if the file could not be moved.
+    """
+
+    relative_path = os.path.relpath(file_path, working_dir)
+    if relative_path.startswith(os.pardir):
+        relative_path = os.path.basename(file_path)
+
+    target = os.path.join(directory, relative_path)
+
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(file_path, target)
+    except OSError as ex:
+        logger.error('Unable to quarantine file at %s: %s', file_path, ex)
+        return None
+
+    logger.warning('Moved file "%s" to quarantine', file_path)
+
+    return target
+
+
+def summary(file_stats, top=10, factor=10.0):
+    """Return lines of text with the slowest and unusual files."""
+
+    lines = ['Slowest files of {}:'.format(len(file_stats))]
+    for i, stats in enumerate(get_slowest(file_stats, top)):
+        lines.append('{:>4}. {:>9.3f} s {:>12} B {:>14}  {}'.format(
+            i + 1,
+            stats.seconds,
+            '?' if stats.size is None else stats.size,
+            'invalid' if stats.entities is None
+            else '{} entities'.format(stats.entities),
+            stats.path))
+
+    outliers = get_outliers(file_stats, factor)
+    if outliers:
+        lines.append('')
+        lines.append('Files over {:g}x the median size per entity:'.format(factor))
+        for stats, ratio in outliers[:top]:
+            lines.append('  {:>12.0f} B/entity  {}'.format(ratio, stats.path))
+
+    return lines
@@ -21,6 +21,8 @@
 # THE SOFTWARE.
 
 from .align import HAlign, VAlign
+from .canvas import Backend
+from .compression import Compression
 from .document import Document
 from .font import FontFamily, FontWeight, FontStyle, FontRenderMode
 from .line import LineCap, LineJoin, LineDash
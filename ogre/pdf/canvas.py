@@ -27,37 +27,71 @@ Features:
 - Uses millimeters instead of points and A4 page size by default.
 - Registers and uses font glyphs with Unicode characters only.
 - Enhances state management.
+- Skips graphics state operators that would not change anything.
+- Batches consecutive runs of text into a single text object.
+- Compresses page streams in background threads.
+- Writes PDF with reportlab or a minimal native writer.
+- Records pages as fragments, which can be drawn again without layout.
 - Provides convenient text formatting routines.
 - Separates concerns to avoid monolithic architecture.
 """
 
 import io
+import enum
 import shutil
 import copy
+import contextlib
 
 import reportlab.pdfgen.canvas
 
 from reportlab.lib.pagesizes import A4
 
+from ogre.metrics import metrics
+
+from ogre.pdf.compression import Compression
+from ogre.pdf.compression import StreamCompressor
 from ogre.pdf.font import Font
+from ogre.pdf.font import register_font
 from ogre.pdf.line import Fill
 from ogre.pdf.line import Stroke
 
 from ogre.pdf.units import normalize
 from ogre.pdf.units import denormalize
+from ogre.pdf.viewport import Viewport
+from ogre.pdf.writer import Writer
 
 from ogre.pdf.align import VAlign, HAlign
 
 
+class Backend(enum.Enum):
+    """Enumeration of PDF writers."""
+    REPORTLAB = 'reportlab'
+    NATIVE = 'native'
+
+
 class Canvas:
     """Finite rectangular region used for rendering."""
 
-    def __init__(self, size=A4):
+    def __init__(self, size=A4, compression=None, backend=Backend.REPORTLAB):
+
+        assert isinstance(backend, Backend)
+
+        compression = compression or Compression()
+
         self._buffer = io.BytesIO()
-        self._viewport = reportlab.pdfgen.canvas.Canvas(self._buffer, size)
+        self._compressor = None
+
+        if backend == Backend.NATIVE:
+            canvas = Writer(self._buffer, size, compression)
+        else:
+            canvas = reportlab.pdfgen.canvas.Canvas(self._buffer, size)
+            self._compressor = StreamCompressor(canvas, compression)
+
+        self._viewport = Viewport(canvas)
         self._width, self._height = size
         self._state = State(self._viewport)
         self._num_pages = 0
+        self._fragments = None
 
     def __setattr__(self, key, value):
         if key.startswith('_'):
@@ -106,7 +140,11 @@ class Canvas:
     def save(self, path):
         """Save the document to a file using the given path."""
 
-        self._viewport.save()
+        try:
+            self._viewport.save()
+        finally:
+            if self._compressor is not None:
+                self._compressor.close()
 
         with open(path, 'wb') as file_object:
             self._buffer.seek(0)
@@ -121,6 +159,43 @@ class Canvas:
             self.fill.apply()
 
         self._num_pages += 1
+        metrics().increment('pages')
+
+        if self._fragments is not None:
+            self._fragments.append([])
+            self._viewport.record(self._fragments[-1])
+
+    def start_recording(self):
+        """Record the content of subsequently added pages."""
+        self._fragments = []
+
+    def stop_recording(self):
+        """Stop recording and return a list of fragments, one per page.
+
+        Each fragment holds the content of a page, excluding anything drawn
+        while recording was skipped, and can be pickled for later reuse.
+        """
+        self._viewport.record(None)
+        fragments, self._fragments = self._fragments, None
+        return fragments
+
+    @contextlib.contextmanager
+    def skip_recording(self):
+        """Return a context manager, which excludes content from the fragment."""
+        calls = self._viewport.record(None)
+        try:
+            yield
+        finally:
+            self._viewport.record(calls)
+
+    def draw_fragment(self, fragment):
+        """Draw the recorded content of a page onto the current page."""
+
+        for _, name, args in fragment:
+            if name == 'setFont':
+                register_font(args[0])
+
+        self._viewport.replay(fragment)
 
     def push_state(self):
         """Save the current graphics state to be restored later."""
@@ -196,70 +271,63 @@ class Canvas:
         if height:
             y_pts -= valign.offset(text_height_pts, normalize(height))
 
-        obj = self._viewport.beginText(x_pts, y_pts)
+        widths_pts = self.font.metrics.widths(text_lines)
+
+        if width:
+            lines_x_pts = [
+                normalize(x) + halign.offset(text_width_pts, normalize(width))
+                for text_width_pts in widths_pts]
+        else:
+            lines_x_pts = [x_pts] * len(text_lines)
+
+        obj = self._viewport.beginText(lines_x_pts[0], y_pts)
         obj.setFont(self.font.name, self.font.size_pts, self.font.leading_pts)
         obj.setTextRenderMode(self.font.render_mode.value)
         obj.setCharSpace(self.font.char_space_pts)
         obj.setWordSpace(self.font.word_space_pts)
         obj.setRise(self.font.rise_pts)
 
-        cursor_x = x_pts + self._get_text_width_pts(text_lines)
-        for line in text_lines:
+        cursor_x = x_pts + max(widths_pts)
+        for line, line_x_pts, text_width_pts in zip(
+                text_lines, lines_x_pts, widths_pts):
             if width:
-                text_width_pts = self._get_text_width_pts(line)
-                offset_pts = halign.offset(text_width_pts, normalize(width))
-                x_pts = normalize(x) + offset_pts
-                cursor_x = max(cursor_x, x_pts + text_width_pts)
-                obj.setTextOrigin(x_pts, obj.getY())
+                cursor_x = max(cursor_x, line_x_pts + text_width_pts)
+                obj.setTextOrigin(line_x_pts, obj.getY())
             obj.textLine(line)
 
-        self._viewport.drawText(obj)
-
         return denormalize(cursor_x)
 
     def get_text_width_mm(self, text):
         """Return the width of text in mm determined by the font."""
         return denormalize(self._get_text_width_pts(text))
 
+    def get_text_widths_mm(self, texts):
+        """Return a list of widths of many lines of text in mm at once."""
+        return [denormalize(x) for x in self.font.metrics.widths(texts)]
+
+    def get_text_fit_mm(self, text, width, head='', tail=''):
+        """Return the length of the longest prefix of text fitting width in mm.
+
+        The prefix is measured as if enclosed by the optional head and tail.
+        """
+        return self.font.metrics.fit(
+            text, lambda width_pts: denormalize(width_pts) <= width, head, tail)
+
     def _wrap(self, text, width):
         """Return a list of text lines wrapped so that they fit given width.
 
         When a single word cannot fit the line it will not be hyphenated.
         """
-
-        words = text.split()
         width_pts = normalize(width)
-
-        lines = []
-
-        i, j = 0, len(words)
-        while i < j:
-
-            line = ' '.join(words[i:j])
-
-            if self._get_text_width_pts(line) <= width_pts or i + 1 == j:
-                lines.append(line)
-                i, j = j, len(words)
-            else:
-                j -= 1
-
-        return lines or words
+        return self.font.metrics.wrap(text, lambda x: x <= width_pts)
 
     def _get_text_width_pts(self, text):
         """Return the width of text in pts determined by the font."""
 
-        def get_width(text):
-            """Return width of a single line of text."""
-            return sum([
-                self._viewport.stringWidth(text, self.font.name, self.font.size_pts),
-                self.font.char_space_pts * (len(text) - 1),
-                self.font.word_space_pts * (len(text.split()) - 1)
-            ])
-
         if isinstance(text, (tuple, list)):
-            return max(map(get_width, text))
+            return max(self.font.metrics.widths(text))
         else:
-            return get_width(text)
+            return self.font.metrics.width(text)
 
 
 class State:
@@ -275,13 +343,17 @@ class State:
         self._stack = []
 
     def push(self):
-        """Save the current graphics state to be restored later."""
+        """Save the current graphics state to be restored later.
+
+        Shallow copies are enough since all property values are immutable,
+        and the saved instances are never modified again.
+        """
 
         self._stack.append((self.stroke, self.fill, self.font))
 
-        self.stroke = copy.deepcopy(self.stroke)
-        self.fill = copy.deepcopy(self.fill)
-        self.font = copy.deepcopy(self.font)
+        self.stroke = copy.copy(self.stroke)
+        self.fill = copy.copy(self.fill)
+        self.font = copy.copy(self.font)
 
     def pop(self):
         """Restore the graphics state to the matching saved state."""
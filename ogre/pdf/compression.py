@@ -0,0 +1,157 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Compression of page content streams in a pool of worker threads.
+
+Reportlab compresses page streams one by one while saving the document. Since
+zlib releases the GIL, each page gets compressed in a background thread as soon
+as it's finished instead, which overlaps with rendering of the next pages.
+"""
+
+import os
+import zlib
+import logging
+import concurrent.futures
+
+from reportlab import rl_config
+from reportlab.pdfbase.pdfdoc import PDFArray
+from reportlab.pdfbase.pdfdoc import PDFBase85Encode
+from reportlab.pdfbase.pdfdoc import PDFName
+from reportlab.pdfbase.pdfdoc import PDFStream
+from reportlab.pdfbase.pdfdoc import PDFZCompress
+
+logger = logging.getLogger(__name__)
+
+
+class Compression:
+    """Settings of the page stream compression."""
+
+    OFF = 0
+    DEFAULT = zlib.Z_DEFAULT_COMPRESSION
+
+    def __init__(self, level=DEFAULT, threads=None, min_size=0):
+
+        assert -1 <= level <= 9, 'level must be an integer between -1 and 9'
+        assert threads is None or threads > 0, 'threads must be positive'
+        assert min_size >= 0, 'min_size cannot be negative'
+
+        self.level = level
+        self.threads = threads or os.cpu_count() or 1
+        self.min_size = min_size
+
+    def __repr__(self):
+        return 'Compression(level={}, threads={}, min_size={})'.format(
+            self.level, self.threads, self.min_size)
+
+    @property
+    def enabled(self):
+        """Return True if page streams should be compressed at all."""
+        return self.level != Compression.OFF
+
+    def compress(self, content):
+        """Return compressed content or None if it's not worth compressing.
+
+        Streams shorter than min_size bytes are left uncompressed.
+        """
+        if len(content) < self.min_size:
+            return None
+        return zlib.compress(content, self.level)
+
+
+class StreamCompressor:
+    """Compressor of reportlab's page streams as pages are finished."""
+
+    def __init__(self, canvas, compression):
+        self._canvas = canvas
+        self._compression = compression
+        self._executor = None
+        if compression.enabled:
+            canvas.setPageCompression(1)
+            canvas.setPageCallBack(self._on_page)
+        else:
+            canvas.setPageCompression(0)
+
+    def close(self):
+        """Wait for the pending page streams and release worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _on_page(self, page_number):
+        """Start compressing the stream of the page that was just finished."""
+
+        # Reportlab offers no public API for accessing the finished page
+        try:
+            page = self._canvas._doc.Pages.pages[-1]
+        except (AttributeError, IndexError):
+            # Leave this and the following pages to reportlab itself
+            logger.debug('Unable to access page stream, compressing serially')
+            self._canvas.setPageCallBack(None)
+            return
+
+        content = page.stream
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._compression.threads)
+
+        future = self._executor.submit(self._encode, content)
+        page.Contents = CompressedStream(content, future)
+
+    def _encode(self, content):
+        """Return a tuple of encoded content and filters or None."""
+
+        compressed = self._compression.compress(content)
+        if compressed is None:
+            return None
+
+        # Follow reportlab, which makes binary streams 7-bit clean by default
+        if rl_config.useA85:
+            return PDFBase85Encode.encode(compressed), \
+                   [PDFBase85Encode, PDFZCompress]
+
+        return compressed, [PDFZCompress]
+
+
+class CompressedStream(PDFStream):
+    """Page stream whose content is compressed in the background."""
+
+    __Comment__ = 'page stream'
+
+    def __init__(self, content, future):
+        super().__init__(content=content)
+        self._future = future
+
+    def format(self, document):
+        """Wait for the compressed content and return the formatted stream."""
+
+        encoded = self._future.result()
+
+        if encoded is not None:
+            self.content, filters = encoded
+            self.dictionary['Filter'] = PDFArray(
+                [PDFName(x.pdfname) for x in filters])
+
+        return super().format(document)
@@ -25,15 +25,16 @@ Representation of a PDF document (Portable Document Format).
 """
 
 from ogre.pdf.metadata import Metadata
+from ogre.pdf.canvas import Backend
 from ogre.pdf.canvas import Canvas
 
 
 class Document:
     """Abstraction of a PDF document."""
 
-    def __init__(self):
+    def __init__(self, compression=None, backend=Backend.REPORTLAB):
         self._metadata = Metadata()
-        self._canvas = Canvas()
+        self._canvas = Canvas(compression=compression, backend=backend)
 
     @property
     def metadata(self):
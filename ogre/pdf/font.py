@@ -23,17 +23,27 @@
 """
 Collection of logically grouped font properties such as family, weight, style.
 
-Registers font glyphs with Unicode characters in Reportlab.
+Registers font glyphs with Unicode characters in Reportlab on first use.
 """
 
+import io
 import os
 import enum
+import functools
+import pickle
+import copyreg
+import weakref
+import threading
 
-from pkg_resources import resource_listdir, resource_stream
+import reportlab
 
-from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase.ttfonts import TTFont, TTFontFace
 from reportlab.pdfbase import pdfmetrics
 
+from ogre import cache
+from ogre.resources import resource_listdir, resource_stream
+
+from ogre.pdf.metrics import TextMetrics
 from ogre.pdf.units import normalize
 from ogre.pdf.units import denormalize
 
@@ -56,14 +66,6 @@ class Font:
         'word_space_mm',
         'leading')
 
-    registered = False
-
-    def __new__(cls, *args):
-        if not Font.registered:
-            register_fonts_with_unicode_glyphs()
-            Font.registered = True
-        return super().__new__(cls, *args)
-
     def __init__(self):
         self._family = FontFamily.SERIF
         self._weight = FontWeight.NORMAL
@@ -83,7 +85,7 @@ class Font:
 
     @property
     def name(self):
-        """Return the name of a registered font."""
+        """Return the name of a font registered on first use."""
 
         font_name = 'Free' + self.family.name.capitalize()
 
@@ -93,6 +95,9 @@ class Font:
         if self.style == FontStyle.ITALIC:
             font_name += 'Italic'
 
+        if font_name not in _REGISTERED:
+            register_font(font_name)
+
         return font_name
 
     @property
@@ -139,6 +144,14 @@ class Font:
         assert isinstance(value, FontRenderMode)
         self._render_mode = value
 
+    @property
+    def metrics(self):
+        """Return text metrics for the current font settings."""
+        return TextMetrics(self.name,
+                           self.size_pts,
+                           self.char_space_pts,
+                           self.word_space_pts)
+
     @property
     def ascent_pts(self):
         """Return font ascent in points."""
@@ -292,11 +305,89 @@ class FontRenderMode(enum.Enum):
 
 
 def register_fonts_with_unicode_glyphs(fonts_dir='fonts'):
-    """Load True Type fonts with Unicode glyphs."""
+    """Load all True Type fonts with Unicode glyphs unless loaded."""
+    with _LOCK:
+        registered = set(pdfmetrics.getRegisteredFontNames())
+        for name, filename in _list_font_files(fonts_dir).items():
+            if name not in registered:
+                _register_font(name, fonts_dir + '/' + filename)
+
+
+def register_font(name, fonts_dir='fonts'):
+    """Load a single True Type font with Unicode glyphs unless loaded."""
+    with _LOCK:
+        if name not in _REGISTERED:
+            filename = _list_font_files(fonts_dir)[name]
+            _register_font(name, fonts_dir + '/' + filename)
+
+
+@functools.lru_cache(maxsize=None)
+def _list_font_files(fonts_dir):
+    """Return a dict of font names and corresponding True Type files."""
+
+    font_files = {}
     for filename in resource_listdir(__package__, fonts_dir):
         if filename.lower().endswith('.ttf'):
-            path = os.path.join(fonts_dir, filename)
             name, _ = os.path.splitext(filename)
-            with resource_stream(__package__, path) as file_object:
-                font = TTFont(name.replace('Oblique', 'Italic'), file_object)
-                pdfmetrics.registerFont(font)
+            font_files[name.replace('Oblique', 'Italic')] = filename
+
+    return font_files
+
+
+def _register_font(name, path):
+    """Register True Type font with Reportlab reusing cached parse results."""
+
+    with resource_stream(__package__, path) as file_object:
+        data = file_object.read()
+
+    key = cache.get_key(name, data, reportlab.Version)
+
+    font = cache.load('font', key)
+    if isinstance(font, TTFont):
+        font.face._ttf_data = data
+    else:
+        font = TTFont(name, io.BytesIO(data))
+        cache.store('font', key, font, _FontPickler)
+
+    pdfmetrics.registerFont(font)
+    _REGISTERED.add(name)
+
+
+class _FontPickler(pickle.Pickler):
+    """Pickler of parsed True Type fonts without their raw file contents."""
+
+    dispatch_table = copyreg.dispatch_table.copy()
+
+    dispatch_table[weakref.WeakKeyDictionary] = \
+        lambda obj: (weakref.WeakKeyDictionary, ())
+
+    dispatch_table[TTFontFace] = \
+        lambda obj: (TTFontFace.__new__, (TTFontFace,), _get_face_state(obj))
+
+
+class _PdfScale:
+    """Picklable conversion from glyph units to 1/1000 of an em."""
+
+    def __init__(self, units_per_em):
+        self.factor = 1000 / units_per_em if units_per_em != 1000 else None
+
+    def __call__(self, value):
+        return value if self.factor is None else value * self.factor
+
+
+def _get_face_state(face):
+    """Return picklable attributes of a parsed font face."""
+
+    state = dict(vars(face))
+    state.pop('_ttf_data', None)
+
+    if '_pdfScale' in state:
+        state['_pdfScale'] = _PdfScale(face.unitsPerEm)
+
+    return state
+
+
+_REGISTERED = set()
+
+# Server jobs render on several threads, which may register the same font
+_LOCK = threading.Lock()
@@ -24,7 +24,6 @@
 Stroke and fill properties.
 """
 
-import copy
 import enum
 
 from ogre.pdf.rgba import RgbaColor
@@ -46,14 +45,6 @@ class Fill(RgbaColor):
         else:
             raise AttributeError("Fill has no attribute '%s'" % key)
 
-    def __deepcopy__(self, memo):
-        """Return a deep copy of this instance without _viewport."""
-        obj = Fill(self._viewport)
-        obj._color = self._color
-        obj._alpha = self._alpha
-        obj.apply()
-        return obj
-
     def _apply(self, color, alpha):
         """Set color and alpha channel of viewport's fill property."""
         self._viewport.setFillColor(color, alpha)
@@ -93,19 +84,6 @@ class Stroke(RgbaColor):
         else:
             raise AttributeError("Stroke has no attribute '%s'" % key)
 
-    def __deepcopy__(self, memo):
-        """Return a deep copy of this instance without _viewport."""
-        obj = Stroke(self._viewport)
-        obj._color = self._color
-        obj._alpha = self._alpha
-        obj._line_width = self._line_width
-        obj._line_cap = self._line_cap
-        obj._line_join = self._line_join
-        obj._miter_limit = self._miter_limit
-        obj._line_dash = copy.deepcopy(self._line_dash, memo)
-        obj.apply()
-        return obj
-
     def apply(self):
         """Apply properties on demand."""
 
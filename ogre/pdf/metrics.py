@@ -0,0 +1,235 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Text measurement based on cumulative advance widths of font glyphs.
+
+Widths are accumulated in integer glyph units (1/1000 of an em) so that
+the width of any substring can be looked up in constant time and binary
+searched without losing precision compared to Reportlab's stringWidth().
+"""
+
+import array
+import itertools
+
+from reportlab.pdfbase import pdfmetrics
+
+
+class AdvanceTable:
+    """Codepoint-indexed advance widths of font glyphs in glyph units."""
+
+    BMP_SIZE = 0x10000
+
+    def __init__(self, char_widths, default_width):
+
+        self._default = default_width
+        self._bmp = array.array('H', [default_width]) * AdvanceTable.BMP_SIZE
+        self._astral = {}
+
+        for code, width in char_widths.items():
+            if code < AdvanceTable.BMP_SIZE:
+                self._bmp[code] = width
+            else:
+                self._astral[code] = width
+
+    def advances(self, text):
+        """Return an iterator over advance widths of consecutive characters."""
+
+        codes = text.encode('utf-16-le', 'surrogatepass')
+
+        if len(codes) == 2 * len(text):
+            return map(self._bmp.__getitem__, memoryview(codes).cast('H'))
+
+        return map(self._advance, map(ord, text))
+
+    def units(self, text):
+        """Return the sum of advance widths of text."""
+        return sum(self.advances(text))
+
+    def cumulative(self, text):
+        """Return a list of advance widths of all prefixes of text."""
+        return list(itertools.accumulate(
+            itertools.chain([0], self.advances(text))))
+
+    def _advance(self, code):
+        """Return advance width of a single character given its code."""
+        if code < AdvanceTable.BMP_SIZE:
+            return self._bmp[code]
+        return self._astral.get(code, self._default)
+
+
+class TextMetrics:
+    """Measure text set with the given font, size and spacing in points."""
+
+    def __init__(self, font_name, size_pts, char_space_pts=0.0,
+                 word_space_pts=0.0):
+        self._table = get_advance_table(font_name)
+        self._scale = 0.001 * size_pts
+        self._char_space = char_space_pts
+        self._word_space = word_space_pts
+
+    @property
+    def is_monotonic(self):
+        """Return true if appending characters never makes text narrower."""
+        return self._char_space >= 0 and self._word_space >= 0
+
+    def width(self, text):
+        """Return the width of a single line of text in points."""
+        return self._width(self._table.units(text),
+                           len(text),
+                           len(text.split()))
+
+    def widths(self, texts):
+        """Return a list of widths in points of many lines of text at once.
+
+        All lines are measured in a single pass over their concatenation.
+        """
+
+        texts = list(texts)
+        units = self._table.cumulative(''.join(texts))
+
+        result, start = [], 0
+        for text in texts:
+            end = start + len(text)
+            result.append(self._width(units[end] - units[start],
+                                      len(text),
+                                      len(text.split())))
+            start = end
+
+        return result
+
+    def wrap(self, text, fits):
+        """Return a list of text lines, each with as many words as fit.
+
+        The fits argument is a callable accepting the width in points.
+        When a single word cannot fit the line it will not be hyphenated.
+        """
+
+        words = text.split()
+        units = self._table.cumulative(' '.join(words))
+
+        starts, ends = [], []
+        for word in words:
+            starts.append(ends[-1] + 1 if ends else 0)
+            ends.append(starts[-1] + len(word))
+
+        def line_width(i, j):
+            """Return the width of words[i:j] joined with spaces."""
+            start, end = starts[i], ends[j - 1]
+            return self._width(units[end] - units[start], end - start, j - i)
+
+        lines = []
+
+        i = 0
+        while i < len(words):
+            j = self._find_last(i + 1, len(words),
+                                lambda j: fits(line_width(i, j)))
+            lines.append(' '.join(words[i:j]))
+            i = j
+
+        return lines or words
+
+    def fit(self, text, fits, head='', tail=''):
+        """Return the length of the longest prefix of text that fits.
+
+        The prefix is measured together with the head and the tail, e.g.
+        a label and an ellipsis, as head + text[:length] + tail. The fits
+        argument is a callable accepting the width in points.
+        """
+
+        units = self._table.cumulative(text)
+        extra_units = self._table.units(head) + self._table.units(tail)
+
+        # Words in head + text[:length] are counted by their first letters
+        words = count_words(head + text)[len(head):]
+        tail_words = len(tail.split())
+        joins_tail = bool(tail) and not tail[0].isspace()
+
+        def num_words(length):
+            """Return the number of words in head + text[:length] + tail."""
+            last = text[length - 1] if length > 0 else head[-1:]
+            merged = joins_tail and last != '' and not last.isspace()
+            return words[length] + tail_words - merged
+
+        def prefix_width(length):
+            """Return the width of head + text[:length] + tail."""
+            return self._width(units[length] + extra_units,
+                               len(head) + length + len(tail),
+                               num_words(length))
+
+        return self._find_last(0, len(text),
+                               lambda length: fits(prefix_width(length)))
+
+    def _find_last(self, lo, hi, predicate):
+        """Return the greatest value in (lo, hi] satisfying predicate or lo.
+
+        Falls back to a linear scan when widths are not monotonic.
+        """
+
+        if not self.is_monotonic:
+            for value in range(hi, lo, -1):
+                if predicate(value):
+                    return value
+            return lo
+
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if predicate(mid):
+                lo = mid
+            else:
+                hi = mid - 1
+
+        return lo
+
+    def _width(self, units, num_chars, num_words):
+        """Return the width in points including char and word spacing."""
+        return sum([
+            self._scale * units,
+            self._char_space * (num_chars - 1),
+            self._word_space * (num_words - 1)
+        ])
+
+
+def count_words(text):
+    """Return a list of the numbers of words in all prefixes of text."""
+
+    counts, count, previous = [0], 0, ' '
+    for char in text:
+        if previous.isspace() and not char.isspace():
+            count += 1
+        counts.append(count)
+        previous = char
+
+    return counts
+
+
+def get_advance_table(font_name):
+    """Return cached advance table of a registered True Type font."""
+
+    if font_name not in _TABLES:
+        face = pdfmetrics.getFont(font_name).face
+        _TABLES[font_name] = AdvanceTable(face.charWidths, face.defaultWidth)
+
+    return _TABLES[font_name]
+
+
+_TABLES = {}
@@ -226,7 +226,7 @@ class _Table:
     def rows_y(self):
         """Return a generator of consecutive rows' y coordinates."""
         y = self.y + self.header.height
-        for row in xrange(self.num_rows):
+        for row in range(self.num_rows):
             yield y
             y += self.row_height
         yield y
@@ -0,0 +1,237 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Reportlab's canvas proxy, which tracks the graphics state of the current page.
+
+Stroke and fill settings are re-applied liberally, e.g. whenever a saved
+graphics state gets restored. The proxy remembers the most recently emitted
+value of each graphics state operator and skips those that would not change
+anything, which keeps the content streams small.
+
+Consecutive runs of text are batched into a single pending text object, which
+only gets drawn when the page needs anything else, such as a path or a page
+break. Font and spacing operators are likewise emitted only on change.
+
+Calls made to the proxy and its text objects can be recorded and replayed
+later onto another page or document, e.g. to reuse a cached page fragment.
+Text objects are not picklable, so recorded calls refer to the pending one.
+Operators known to be redundant since the recording began are left out.
+"""
+
+import functools
+
+# Graphics state operators permitted inside of a text object by reportlab
+TEXT_OPERATORS = frozenset(['setStrokeColor', 'setFillColor'])
+
+
+class Viewport:
+    """Reportlab's canvas with redundant graphics state operators removed."""
+
+    def __init__(self, canvas):
+        self._canvas = canvas
+        self._current = {}
+        self._text = None
+        self._calls = None
+        self._recorded = set()
+
+    def __getattr__(self, name):
+        self.end_text()
+        attr = getattr(self._canvas, name)
+        if self._calls is not None and callable(attr):
+            return functools.partial(self._call, name, attr)
+        return attr
+
+    def record(self, calls):
+        """Append subsequent calls to a list or stop recording if None.
+
+        Return the list of calls recorded so far, if any.
+        """
+        previous, self._calls = self._calls, calls
+        self._recorded = set()
+        return previous
+
+    def replay(self, calls):
+        """Repeat the recorded calls on this proxy."""
+        for is_text, name, args in calls:
+            target = self._text if is_text else self
+            getattr(target, name)(*args)
+
+    def showPage(self):
+        """Close the current page and forget its graphics state."""
+        self.end_text()
+        self._canvas.showPage()
+        self._current.clear()
+
+    def beginText(self, x, y):
+        """Return the pending text object moved to (x, y) or a new one."""
+        if self._calls is not None:
+            self._calls.append((False, 'beginText', (x, y)))
+        if self._text is None:
+            self._text = TextObject(self._canvas.beginText(x, y), x, y)
+        else:
+            self._text.move_to(x, y)
+        self._text.record(self._calls, moved=True)
+        return self._text
+
+    def end_text(self):
+        """Draw the pending text object if there is one."""
+        if self._text is not None:
+            text, self._text = self._text, None
+            self._canvas.drawText(text.unwrap())
+
+    def setLineWidth(self, width):
+        """Set line width unless already set."""
+        self._set('setLineWidth', width)
+
+    def setLineCap(self, mode):
+        """Set line cap unless already set."""
+        self._set('setLineCap', mode)
+
+    def setLineJoin(self, mode):
+        """Set line join unless already set."""
+        self._set('setLineJoin', mode)
+
+    def setMiterLimit(self, limit):
+        """Set miter limit unless already set."""
+        self._set('setMiterLimit', limit)
+
+    def setDash(self, array):
+        """Set line dash pattern unless already set."""
+        self._set('setDash', array)
+
+    def setStrokeColor(self, color, alpha):
+        """Set stroke color and alpha channel unless already set."""
+        self._set('setStrokeColor', color, alpha)
+
+    def setFillColor(self, color, alpha):
+        """Set fill color and alpha channel unless already set."""
+        self._set('setFillColor', color, alpha)
+
+    def _set(self, operator, *args):
+        """Call the canvas method if its arguments differ from last time.
+
+        Colors go to the pending text object, if any, to preserve the order
+        of operators. Other operators need the text object drawn first.
+        """
+        changed = self._current.get(operator) != args
+        if self._calls is not None:
+            if changed or operator not in self._recorded:
+                self._calls.append((False, operator, args))
+                self._recorded.add(operator)
+        if changed:
+            if self._text is not None and operator in TEXT_OPERATORS:
+                getattr(self._text.unwrap(), operator)(*args)
+            else:
+                self.end_text()
+                getattr(self._canvas, operator)(*args)
+            self._current[operator] = args
+
+    def _call(self, name, method, *args):
+        """Record a call to the canvas method and return its result."""
+        self._calls.append((False, name, args))
+        return method(*args)
+
+
+class TextObject:
+    """Reportlab's text object with redundant text state operators removed.
+
+    Unlike the graphics state, the text state is tracked per text object,
+    because reportlab resets it whenever a new text object begins.
+    """
+
+    def __init__(self, text_object, x, y):
+        self._text_object = text_object
+        self._current = {}
+        self._origin = (x, y)
+        self._calls = None
+        self._recorded = set()
+
+    def __getattr__(self, name):
+        return getattr(self._text_object, name)
+
+    def unwrap(self):
+        """Return the underlying reportlab text object."""
+        return self._text_object
+
+    def record(self, calls, moved=False):
+        """Append subsequent calls to a list or stop recording if None.
+
+        The moved flag tells whether a recorded call has just set the origin.
+        """
+        if calls is not self._calls:
+            self._calls = calls
+            self._recorded = set()
+        if moved and calls is not None:
+            self._recorded.add('setTextOrigin')
+
+    def setTextOrigin(self, x, y):
+        """Move to the start of a new line unless already there."""
+        if self._calls is not None:
+            if self._origin != (x, y) or 'setTextOrigin' not in self._recorded:
+                self._calls.append((True, 'setTextOrigin', (x, y)))
+                self._recorded.add('setTextOrigin')
+        self.move_to(x, y)
+
+    def move_to(self, x, y):
+        """Move to the start of a new line without recording the call."""
+        if self._origin != (x, y):
+            self._text_object.setTextOrigin(x, y)
+            self._origin = (x, y)
+
+    def textLine(self, text):
+        """Print a line of text and move to the start of the next one."""
+        if self._calls is not None:
+            self._calls.append((True, 'textLine', (text,)))
+        self._text_object.textLine(text)
+        self._origin = None
+
+    def setFont(self, name, size, leading):
+        """Set font face, size and leading unless already set."""
+        self._set('setFont', name, size, leading)
+
+    def setTextRenderMode(self, mode):
+        """Set text render mode unless already set."""
+        self._set('setTextRenderMode', mode)
+
+    def setCharSpace(self, char_space):
+        """Set character spacing unless already set."""
+        self._set('setCharSpace', char_space)
+
+    def setWordSpace(self, word_space):
+        """Set word spacing unless already set."""
+        self._set('setWordSpace', word_space)
+
+    def setRise(self, rise):
+        """Set text rise unless already set."""
+        self._set('setRise', rise)
+
+    def _set(self, operator, *args):
+        """Call the text object method if its arguments differ from last time."""
+        changed = self._current.get(operator) != args
+        if self._calls is not None:
+            if changed or operator not in self._recorded:
+                self._calls.append((True, operator, args))
+                self._recorded.add(operator)
+        if changed:
+            getattr(self._text_object, operator)(*args)
+            self._current[operator] = args
@@ -0,0 +1,618 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Minimal PDF writer tailored to the fixed layout of the report.
+
+It implements only the part of reportlab's canvas interface that the viewport
+needs, i.e. rectangles, lines, paths, grids and plain text set in TrueType
+fonts. Content streams, embedded font subsets and the cross-reference table are
+written out directly, bypassing reportlab's general-purpose object model.
+Reportlab is only consulted for parsing colors and subsetting fonts.
+
+Fonts are embedded as composite fonts with two-byte glyph identifiers, which
+lifts the limit of 256 characters per subset. Because word spacing does not
+apply to two-byte codes, it is emulated with explicit glyph displacements.
+"""
+
+import hashlib
+import concurrent.futures
+
+from reportlab.lib.colors import toColor
+from reportlab.pdfbase import pdfmetrics
+
+# Operators painting a path with the even-odd rule indexed by (stroke, fill)
+PATH_OPS = {
+    (0, 0): 'n',
+    (1, 0): 'S',
+    (0, 1): 'f*',
+    (1, 1): 'B*',
+}
+
+# Code points of characters affected by word spacing
+SPACES = (0x20, 0xa0)
+
+
+class Writer:
+    """Drop-in replacement of reportlab's canvas with a subset of its API."""
+
+    def __init__(self, file_object, pagesize, compression):
+        self._file = file_object
+        self._width, self._height = pagesize
+        self._compression = compression
+        self._executor = None
+        self._info = {}
+        self._pages = []
+        self._fonts = {}
+        self._ext_gstates = {}
+        self._code = []
+        self._alpha = {'CA': 1.0, 'ca': 1.0}
+
+    def setAuthor(self, author):
+        """Set the author of the document."""
+        self._info['Author'] = author
+
+    def setCreator(self, creator):
+        """Set the creator of the document."""
+        self._info['Creator'] = creator
+
+    def setKeywords(self, keywords):
+        """Set the keywords of the document."""
+        self._info['Keywords'] = keywords
+
+    def setSubject(self, subject):
+        """Set the subject of the document."""
+        self._info['Subject'] = subject
+
+    def setTitle(self, title):
+        """Set the title of the document."""
+        self._info['Title'] = title
+
+    def showPage(self):
+        """Close the current page and start a new one."""
+        content = '\n'.join(self._code).encode('ascii')
+        self._pages.append(self._submit(content))
+        self._code = []
+        self._alpha = {'CA': 1.0, 'ca': 1.0}
+
+    def save(self):
+        """Close the current page if needed and write out the document."""
+
+        if self._code or not self._pages:
+            self.showPage()
+
+        try:
+            _Serializer(self).write(self._file)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def setLineWidth(self, width):
+        """Set the width of lines in points."""
+        self._code.append('%s w' % _format(width))
+
+    def setLineCap(self, mode):
+        """Set the shape of line endings: 0=butt, 1=round, 2=square."""
+        self._code.append('%d J' % mode)
+
+    def setLineJoin(self, mode):
+        """Set the shape of line corners: 0=miter, 1=round, 2=bevel."""
+        self._code.append('%d j' % mode)
+
+    def setMiterLimit(self, limit):
+        """Set the miter limit."""
+        self._code.append('%s M' % _format(limit))
+
+    def setDash(self, array):
+        """Set the line dash pattern as lengths of "on" and "off" segments."""
+        self._code.append('[%s] 0 d' % _format(*array))
+
+    def setStrokeColor(self, color, alpha):
+        """Set the color and alpha channel of lines."""
+        self._code.extend(self._color_ops(color, alpha, 'RG', 'CA'))
+
+    def setFillColor(self, color, alpha):
+        """Set the color and alpha channel of shapes and text."""
+        self._code.extend(self._color_ops(color, alpha, 'rg', 'ca'))
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        """Draw a rectangle with lower left corner at (x, y)."""
+        self._code.append('n %s re %s' % (
+            _format(x, y, width, height), PATH_OPS[stroke, fill]))
+
+    def line(self, x1, y1, x2, y2):
+        """Draw a line segment from (x1, y1) to (x2, y2)."""
+        self._code.append('n %s m %s l S' % (_format(x1, y1), _format(x2, y2)))
+
+    def grid(self, xlist, ylist):
+        """Draw vertical and horizontal lines at the given positions."""
+
+        x0, x1 = xlist[0], xlist[-1]
+        y0, y1 = ylist[0], ylist[-1]
+
+        self._code.append('n')
+        for x in xlist:
+            self._code.append('%s m %s l' % (_format(x, y0), _format(x, y1)))
+        for y in ylist:
+            self._code.append('%s m %s l' % (_format(x0, y), _format(x1, y)))
+        self._code.append('S')
+
+    def beginPath(self):
+        """Return a new path."""
+        return Path()
+
+    def drawPath(self, path, stroke=1, fill=0):
+        """Paint the given path."""
+        self._code.append('%s %s' % (path.getCode(), PATH_OPS[stroke, fill]))
+
+    def beginText(self, x=0, y=0):
+        """Return a new text object positioned at (x, y)."""
+        return TextObject(self, x, y)
+
+    def drawText(self, text_object):
+        """Paint the given text object."""
+        self._code.append(text_object.getCode())
+
+    def _color_ops(self, color, alpha, color_operator, alpha_key):
+        """Return a list of operators setting color and alpha channel."""
+
+        rgb = toColor(color)
+        ops = ['%s %s' % (_format(rgb.red, rgb.green, rgb.blue), color_operator)]
+
+        if self._alpha[alpha_key] != alpha:
+            self._alpha[alpha_key] = alpha
+            ops.append('/%s gs' % self._get_ext_gstate(alpha_key, alpha))
+
+        return ops
+
+    def _get_ext_gstate(self, key, value):
+        """Return the resource name of a graphics state parameter dict."""
+        return self._ext_gstates.setdefault(
+            (key, value), 'GS%d' % (len(self._ext_gstates) + 1))
+
+    def _get_font(self, name):
+        """Return the embedded font with the given name."""
+        if name not in self._fonts:
+            resource_name = 'F%d' % (len(self._fonts) + 1)
+            self._fonts[name] = EmbeddedFont(name, resource_name)
+        return self._fonts[name]
+
+    def _submit(self, content):
+        """Return a future of a tuple with encoded content and a filter."""
+
+        if not self._compression.enabled:
+            future = concurrent.futures.Future()
+            future.set_result((content, None))
+            return future
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._compression.threads)
+
+        return self._executor.submit(self._encode, content)
+
+    def _encode(self, content):
+        """Return a tuple with compressed or original content and a filter."""
+        compressed = self._compression.compress(content)
+        if compressed is None:
+            return content, None
+        return compressed, 'FlateDecode'
+
+
+class Path:
+    """Sequence of connected line segments."""
+
+    def __init__(self):
+        self._code = ['n']
+
+    def moveTo(self, x, y):
+        """Begin a new subpath at (x, y)."""
+        self._code.append('%s m' % _format(x, y))
+
+    def lineTo(self, x, y):
+        """Append a line segment ending at (x, y)."""
+        self._code.append('%s l' % _format(x, y))
+
+    def getCode(self):
+        """Return path construction operators."""
+        return ' '.join(self._code)
+
+
+class TextObject:
+    """Lines of text with their positions and text state."""
+
+    def __init__(self, writer, x, y):
+        self._writer = writer
+        self._code = ['BT']
+        self._font = None
+        self._size = 0
+        self._leading = 0
+        self._word_space = 0
+        self._x0 = self._y0 = self._y = 0
+        self.setTextOrigin(x, y)
+
+    def getCode(self):
+        """Return text operators enclosed in a text object."""
+        return ' '.join(self._code + ['ET'])
+
+    def getY(self):
+        """Return the current vertical position."""
+        return self._y
+
+    def getStartOfLine(self):
+        """Return the position where the current line begins."""
+        return self._x0, self._y0
+
+    def setTextOrigin(self, x, y):
+        """Move to the start of a new line at (x, y)."""
+        self._code.append('1 0 0 1 %s Tm' % _format(x, y))
+        self._x0 = x
+        self._y0 = self._y = y
+
+    def setFont(self, name, size, leading):
+        """Set the font face, its size and the distance between lines."""
+        self._font = self._writer._get_font(name)
+        self._size = size
+        self._leading = leading
+        self._code.append('/%s %s Tf %s TL' % (
+            self._font.resource_name, _format(size), _format(leading)))
+
+    def setTextRenderMode(self, mode):
+        """Set the text rendering mode, e.g. 0=fill, 1=stroke."""
+        self._code.append('%d Tr' % mode)
+
+    def setCharSpace(self, char_space):
+        """Set the extra space after each character."""
+        self._code.append('%s Tc' % _format(char_space))
+
+    def setWordSpace(self, word_space):
+        """Set the extra space after each space character."""
+        self._word_space = word_space
+
+    def setRise(self, rise):
+        """Move the baseline up or down."""
+        self._code.append('%s Ts' % _format(rise))
+        self._y -= rise
+
+    def setStrokeColor(self, color, alpha):
+        """Set the color and alpha channel of text outlines."""
+        self._code.extend(self._writer._color_ops(color, alpha, 'RG', 'CA'))
+
+    def setFillColor(self, color, alpha):
+        """Set the color and alpha channel of text."""
+        self._code.extend(self._writer._color_ops(color, alpha, 'rg', 'ca'))
+
+    def textLine(self, text=''):
+        """Show a line of text and move to the start of the next one."""
+        self._code.append('%s T*' % self._show(text))
+        self._y0 = self._y = self._y - self._leading
+
+    def _show(self, text):
+        """Return an operator showing the text in the current font."""
+
+        assert self._font is not None, 'font must be set before text'
+
+        glyphs = self._font.encode(text)
+
+        if not self._word_space or not any(x in text for x in ' \xa0'):
+            return '<%s> Tj' % ''.join('%04X' % x for x in glyphs)
+
+        # Negative displacement moves the next glyph to the right
+        displacement = _format(-self._word_space * 1000.0 / self._size)
+
+        items, run = [], []
+        for char, glyph in zip(text, glyphs):
+            run.append('%04X' % glyph)
+            if ord(char) in SPACES:
+                items.append('<%s> %s' % (''.join(run), displacement))
+                run = []
+        if run:
+            items.append('<%s>' % ''.join(run))
+
+        return '[%s] TJ' % ' '.join(items)
+
+
+class EmbeddedFont:
+    """Subset of a registered TrueType font with two-byte glyph identifiers."""
+
+    def __init__(self, name, resource_name):
+        self.name = name
+        self.resource_name = resource_name
+        self._face = pdfmetrics.getFont(name).face
+        self._codes = []
+        self._glyphs = {}
+        self._new_glyphs = {0: 0}
+        self._widths = [self._face.defaultWidth]
+
+    @property
+    def base_font(self):
+        """Return font name prefixed with a tag unique to the subset."""
+        digest = hashlib.sha1(repr(self._codes).encode('ascii')).digest()
+        tag = ''.join(chr(ord('A') + x % 26) for x in digest[:6])
+        return '%s+%s' % (tag, self._face.name.decode('latin-1'))
+
+    def encode(self, text):
+        """Return a list of glyph identifiers in the subset."""
+
+        glyphs = []
+        for char in text:
+            code = ord(char)
+            if code == 0xa0:
+                code = 0x20
+            glyph = self._glyphs.get(code)
+            if glyph is None:
+                glyph = self._add(code)
+            glyphs.append(glyph)
+
+        return glyphs
+
+    def get_widths(self):
+        """Return a list of advance widths indexed by glyph identifiers."""
+        return self._widths
+
+    def get_cmap(self):
+        """Return a CMap translating glyph identifiers back to Unicode."""
+
+        chars = {}
+        for code in self._codes:
+            chars.setdefault(self._glyphs[code], code)
+
+        lines = [
+            '/CIDInit /ProcSet findresource begin',
+            '12 dict begin',
+            'begincmap',
+            '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def',
+            '/CMapName /Adobe-Identity-UCS def',
+            '/CMapType 2 def',
+            '1 begincodespacerange',
+            '<0000> <FFFF>',
+            'endcodespacerange']
+
+        items = sorted(chars.items())
+        for i in range(0, len(items), 100):
+            chunk = items[i:i + 100]
+            lines.append('%d beginbfchar' % len(chunk))
+            for glyph, code in chunk:
+                utf16 = chr(code).encode('utf-16-be', 'surrogatepass')
+                lines.append('<%04X> <%s>' % (glyph, utf16.hex().upper()))
+            lines.append('endbfchar')
+
+        lines.extend([
+            'endcmap',
+            'CMapName currentdict /CMap defineresource pop',
+            'end',
+            'end'])
+
+        return '\n'.join(lines).encode('ascii')
+
+    def get_descriptor(self):
+        """Return a dict with font descriptor entries."""
+        face = self._face
+        return {
+            'Ascent': face.ascent,
+            'CapHeight': face.capHeight,
+            'Descent': face.descent,
+            'Flags': (face.flags & ~(1 << 5)) | (1 << 2),  # symbolic
+            'FontBBox': face.bbox,
+            'ItalicAngle': face.italicAngle,
+            'StemV': face.stemV,
+        }
+
+    def make_subset(self):
+        """Return the subset font program in TrueType format."""
+        return self._face.makeSubset(self._codes)
+
+    def _add(self, code):
+        """Assign a glyph identifier to the code point and return it.
+
+        The identifiers follow the order in which reportlab's subsetter
+        renumbers glyphs, i.e. the order of first use of the code points.
+        """
+
+        old_glyph = self._face.charToGlyph.get(code)
+        if old_glyph is None:
+            self._glyphs[code] = 0
+            return 0
+
+        self._codes.append(code)
+
+        glyph = self._new_glyphs.get(old_glyph)
+        if glyph is None:
+            glyph = self._new_glyphs[old_glyph] = len(self._new_glyphs)
+            self._widths.append(self._face.getCharWidth(code))
+
+        self._glyphs[code] = glyph
+        return glyph
+
+
+class _Serializer:
+    """Writer of the PDF file structure."""
+
+    CATALOG, PAGES, INFO, RESOURCES = 1, 2, 3, 4
+
+    def __init__(self, writer):
+        self._writer = writer
+        self._objects = {}
+        self._next_number = _Serializer.RESOURCES + 1
+
+    def write(self, file_object):
+        """Write the whole document into the file object."""
+
+        writer = self._writer
+
+        page_numbers = [self._add_page(x) for x in writer._pages]
+        font_numbers = {
+            font.resource_name: self._add_font(font)
+            for font in writer._fonts.values()}
+
+        self._objects[_Serializer.CATALOG] = b'<< /Type /Catalog /Pages %d 0 R >>' % _Serializer.PAGES
+        self._objects[_Serializer.PAGES] = _dict({
+            'Type': '/Pages',
+            'Kids': '[%s]' % ' '.join('%d 0 R' % x for x in page_numbers),
+            'Count': len(page_numbers)})
+        self._objects[_Serializer.INFO] = _dict(dict(
+            {key: _string(value) for key, value in writer._info.items()},
+            Producer=_string('ogre')))
+        self._objects[_Serializer.RESOURCES] = _dict({
+            'Font': _dict({
+                key: '%d 0 R' % value
+                for key, value in sorted(font_numbers.items())}).decode(),
+            'ExtGState': _dict({
+                name: '<< /Type /ExtGState /%s %s >>' % (key, _format(value))
+                for (key, value), name in writer._ext_gstates.items()}).decode(),
+            'ProcSet': '[/PDF /Text]'})
+
+        file_object.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+        offsets = []
+        for number in range(1, self._next_number):
+            offsets.append(file_object.tell())
+            file_object.write(b'%d 0 obj\n' % number)
+            file_object.write(self._resolve(self._objects[number]))
+            file_object.write(b'\nendobj\n')
+
+        xref_offset = file_object.tell()
+        file_object.write(b'xref\n0 %d\n' % (len(offsets) + 1))
+        file_object.write(b'0000000000 65535 f \n')
+        for offset in offsets:
+            file_object.write(b'%010d 00000 n \n' % offset)
+
+        file_object.write(b'trailer\n')
+        file_object.write(_dict({
+            'Size': len(offsets) + 1,
+            'Root': '%d 0 R' % _Serializer.CATALOG,
+            'Info': '%d 0 R' % _Serializer.INFO}))
+        file_object.write(b'\nstartxref\n%d\n%%%%EOF\n' % xref_offset)
+
+    def _reserve(self):
+        """Return the next free object number."""
+        number = self._next_number
+        self._next_number += 1
+        return number
+
+    def _add_page(self, content):
+        """Add page with its content stream and return the page number."""
+
+        number, content_number = self._reserve(), self._reserve()
+
+        self._objects[number] = _dict({
+            'Type': '/Page',
+            'Parent': '%d 0 R' % _Serializer.PAGES,
+            'MediaBox': '[0 0 %s]' % _format(
+                self._writer._width, self._writer._height),
+            'Resources': '%d 0 R' % _Serializer.RESOURCES,
+            'Contents': '%d 0 R' % content_number})
+
+        self._objects[content_number] = content
+
+        return number
+
+    def _add_font(self, font):
+        """Add composite font with its descendants and return its number."""
+
+        numbers = [self._reserve() for _ in range(5)]
+        number, cid_number, descriptor_number, file_number, cmap_number = numbers
+
+        base_font = '/' + font.base_font
+
+        self._objects[number] = _dict({
+            'Type': '/Font',
+            'Subtype': '/Type0',
+            'BaseFont': base_font,
+            'Encoding': '/Identity-H',
+            'DescendantFonts': '[%d 0 R]' % cid_number,
+            'ToUnicode': '%d 0 R' % cmap_number})
+
+        self._objects[cid_number] = _dict({
+            'Type': '/Font',
+            'Subtype': '/CIDFontType2',
+            'BaseFont': base_font,
+            'CIDSystemInfo': '<< /Registry (Adobe) /Ordering (Identity) /Supplement 0 >>',
+            'FontDescriptor': '%d 0 R' % descriptor_number,
+            'DW': font.get_widths()[0],
+            'W': '[0 [%s]]' % _format(*font.get_widths()),
+            'CIDToGIDMap': '/Identity'})
+
+        descriptor = {
+            key: '[%s]' % _format(*value) if isinstance(value, (list, tuple)) else value
+            for key, value in font.get_descriptor().items()}
+        descriptor.update({
+            'Type': '/FontDescriptor',
+            'FontName': base_font,
+            'FontFile2': '%d 0 R' % file_number})
+        self._objects[descriptor_number] = _dict(descriptor)
+
+        program = font.make_subset()
+        self._objects[file_number] = (
+            self._writer._submit(program), {'Length1': len(program)})
+
+        self._objects[cmap_number] = self._writer._submit(font.get_cmap())
+
+        return number
+
+    @staticmethod
+    def _resolve(obj):
+        """Return bytes of the object, waiting for streams if needed."""
+
+        if isinstance(obj, bytes):
+            return obj
+
+        extra = {}
+        if isinstance(obj, tuple):
+            obj, extra = obj
+
+        content, filter_name = obj.result()
+
+        entries = dict(extra, Length=len(content))
+        if filter_name is not None:
+            entries['Filter'] = '/' + filter_name
+
+        return _dict(entries) + b'\nstream\n' + content + b'\nendstream'
+
+
+def _format(*numbers):
+    """Return numbers formatted as compact PDF operands."""
+    return ' '.join(map(_format_number, numbers))
+
+
+def _format_number(number):
+    """Return a number rounded to 4 decimal places without trailing zeros."""
+
+    if isinstance(number, int):
+        return str(number)
+
+    text = ('%.4f' % number).rstrip('0').rstrip('.')
+
+    return '0' if text == '-0' else text
+
+
+def _string(text):
+    """Return text encoded as a PDF string with a byte order mark."""
+    return '<FEFF%s>' % text.encode('utf-16-be').hex().upper()
+
+
+def _dict(entries):
+    """Return bytes of a PDF dictionary with sorted keys."""
+    return ('<< %s >>' % ' '.join(
+        '/%s %s' % (key, value) for key, value in sorted(entries.items()))
+    ).encode('latin-1')
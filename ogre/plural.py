@@ -26,6 +26,9 @@ String formatter with support for optional plural form.
 
 import re
 import string
+import functools
+
+_PLURAL_FORM = re.compile(r'([^(]+)\(([^,]+)\s*,\s*([^)]+)\)')
 
 
 class PluralFormatter(string.Formatter):
@@ -40,10 +43,20 @@ class PluralFormatter(string.Formatter):
         if key in kwargs:
             return kwargs[key]
 
-        matcher = re.match(r'([^(]+)\(([^,]+)\s*,\s*([^)]+)\)', key)
+        plural_form = _parse_plural_form(key)
 
-        if matcher:
-            key, singular, plural = matcher.groups()
-            return singular.strip() if kwargs[key] == 1 else plural.strip()
+        if plural_form:
+            key, singular, plural = plural_form
+            return singular if kwargs[key] == 1 else plural
 
         raise KeyError(key)
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_plural_form(key):
+    """Return a tuple of key, singular and plural or None if no match."""
+    matcher = _PLURAL_FORM.match(key)
+    if matcher:
+        key, singular, plural = matcher.groups()
+        return key, singular.strip(), plural.strip()
+    return None
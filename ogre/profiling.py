@@ -0,0 +1,150 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Wall and CPU time spent in the stages of a run and on individual items.
+"""
+
+import time
+import contextlib
+import collections
+
+Timing = collections.namedtuple('Timing', 'wall cpu')
+
+
+class Profiler:
+    """Disabled by default to keep the hooks nearly free of overhead.
+
+    Listeners are notified when a top-level stage starts or finishes and
+    after each item, e.g. to take memory snapshots at stage boundaries.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._stages = collections.OrderedDict()
+        self._items = collections.defaultdict(list)
+        self._stack = []
+        self.listeners = []
+
+    @property
+    def stages(self):
+        """Return exclusive timings of stages in order of appearance."""
+        return collections.OrderedDict(
+            (name, Timing(*values)) for name, values in self._stages.items())
+
+    def items(self, kind):
+        """Return a list of (name, timing) tuples sorted by wall time."""
+        return sorted(((name, Timing(wall, cpu))
+                       for name, wall, cpu in self._items[kind]),
+                      key=lambda x: x[1].wall,
+                      reverse=True)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Accumulate time spent in a stage, excluding nested stages."""
+
+        if not self.enabled:
+            yield
+            return
+
+        if not self._stack:
+            for listener in self.listeners:
+                listener.stage_started(name)
+
+        frame = [time.perf_counter(), time.process_time(), 0.0, 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+
+            wall = time.perf_counter() - frame[0]
+            cpu = time.process_time() - frame[1]
+
+            if self._stack:
+                self._stack[-1][2] += wall
+                self._stack[-1][3] += cpu
+
+            total = self._stages.setdefault(name, [0.0, 0.0])
+            total[0] += wall - frame[2]
+            total[1] += cpu - frame[3]
+
+        if not self._stack:
+            for listener in self.listeners:
+                listener.stage_finished(name)
+
+    @contextlib.contextmanager
+    def item(self, kind, name):
+        """Record time spent on a single item such as a file or a debtor."""
+
+        if not self.enabled:
+            yield
+            return
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._items[kind].append((name,
+                                      time.perf_counter() - wall,
+                                      time.process_time() - cpu))
+
+        for listener in self.listeners:
+            listener.item_finished(kind, name)
+
+    def summary(self, top=10):
+        """Return lines of text with stages and the slowest items ranked."""
+
+        lines = ['{:<12}{:>12}{:>12}'.format('Stage', 'Wall [s]', 'CPU [s]')]
+
+        stages = self.stages
+        for name, timing in stages.items():
+            lines.append('{:<12}{:>12.3f}{:>12.3f}'.format(name, *timing))
+
+        lines.append('{:<12}{:>12.3f}{:>12.3f}'.format(
+            'total',
+            sum(x.wall for x in stages.values()),
+            sum(x.cpu for x in stages.values())))
+
+        for kind in sorted(self._items):
+            items = self.items(kind)
+            lines.append('')
+            lines.append('Slowest {} of {}:'.format(kind, len(items)))
+            for i, (name, timing) in enumerate(items[:top]):
+                lines.append('{:>4}. {:>9.3f} s  {}'.format(
+                    i + 1, timing.wall, name))
+
+        return lines
+
+
+def profiler():
+    """Return a global instance of the profiler."""
+
+    global _INSTANCE
+
+    if _INSTANCE is None:
+        _INSTANCE = Profiler()
+
+    return _INSTANCE
+
+
+_INSTANCE = None
@@ -0,0 +1,228 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Machine-readable export of bank replies, one row per debtor and bank.
+
+Rows are generated lazily straight from the model in the same order as in the
+PDF report and written out one at a time, so memory usage does not depend on
+the number of replies. Spreadsheets are written in the Office Open XML format
+as a streamed zip archive without third-party libraries, starting another
+worksheet whenever one reaches the row limit of Excel.
+"""
+
+import os
+import re
+import csv
+import json
+import logging
+import datetime
+import zipfile
+import itertools
+
+from xml.sax.saxutils import escape
+
+from ogre.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of rows in a worksheet, including the header, imposed by Excel
+MAX_XLSX_ROWS = 1048576
+
+# Control characters which are not allowed anywhere in an XML 1.0 document
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+FIELDS = (
+    'identity_name',
+    'identity_value',
+    'name',
+    'bank_code',
+    'bank_name',
+    'bank_prefix',
+    'date',
+    'has_account',
+    'file_path',
+)
+
+
+def get_rows(model):
+    """Return a generator of tuples with values of FIELDS for each reply."""
+    for debtor in model.sorted_debtors:
+        replies = model.replies[debtor]
+        for bank in sorted(replies, key=lambda x: x.name):
+            reply = replies[bank]
+            yield (
+                debtor.identity.name,
+                debtor.identity.raw_value,
+                debtor.name,
+                bank.code,
+                bank.name,
+                bank.prefix,
+                _format_date(reply.date),
+                reply.has_account,
+                reply.file_path,
+            )
+
+
+def export(model, path, format_):
+    """Write replies from the model to a file in the given format."""
+
+    writer = WRITERS[format_]
+
+    if format_ == 'xlsx':
+        with open(path, 'wb') as file_object:
+            writer(get_rows(model), file_object)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as file_object:
+            writer(get_rows(model), file_object)
+
+    metrics().increment('bytes.written', os.path.getsize(path))
+    logger.info('Saved file as %s', os.path.abspath(path))
+
+
+def write_csv(rows, file_object):
+    """Write rows as comma-separated values with a header line."""
+    writer = csv.writer(file_object)
+    writer.writerow(FIELDS)
+    for row in rows:
+        writer.writerow(_replace_booleans(row))
+
+
+def write_json(rows, file_object):
+    """Write rows as an array of JSON objects, one object per line."""
+
+    file_object.write('[')
+
+    separator = '\n'
+    for row in rows:
+        file_object.write(separator)
+        file_object.write(json.dumps(dict(zip(FIELDS, row)),
+                                     ensure_ascii=False))
+        separator = ',\n'
+
+    file_object.write('\n]\n')
+
+
+def write_xlsx(rows, file_object):
+    """Write rows as worksheets of an Excel workbook, each with a header."""
+
+    rows = iter(rows)
+
+    with zipfile.ZipFile(file_object, 'w', zipfile.ZIP_DEFLATED) as archive:
+
+        num_sheets = 0
+        while True:
+
+            num_sheets += 1
+            name = 'xl/worksheets/sheet%d.xml' % num_sheets
+            with archive.open(name, 'w', force_zip64=True) as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/'
+                    b'spreadsheetml/2006/main"><sheetData>')
+                sheet.write(_xlsx_row(FIELDS))
+                for row in itertools.islice(rows, MAX_XLSX_ROWS - 1):
+                    sheet.write(_xlsx_row(row))
+                sheet.write(b'</sheetData></worksheet>')
+
+            row = next(rows, None)
+            if row is None:
+                break
+            rows = itertools.chain([row], rows)
+
+        for name, content in _get_xlsx_parts(num_sheets).items():
+            archive.writestr(name, content)
+
+
+WRITERS = {
+    'csv': write_csv,
+    'json': write_json,
+    'xlsx': write_xlsx,
+}
+
+
+def _format_date(date):
+    """Return ISO 8601 date and time or the original string."""
+    if isinstance(date, datetime.datetime):
+        return date.isoformat()
+    return date
+
+
+def _replace_booleans(row):
+    """Return a row with booleans replaced by lowercase strings."""
+    return [str(x).lower() if isinstance(x, bool) else x for x in row]
+
+
+def _xlsx_row(values):
+    """Return bytes of a spreadsheet row with inline cell values."""
+
+    cells = []
+    for value in values:
+        if isinstance(value, bool):
+            cells.append('<c t="b"><v>%d</v></c>' % value)
+        elif value is None:
+            cells.append('<c/>')
+        else:
+            cells.append('<c t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>'
+                         % escape(_ILLEGAL_XML_CHARS.sub('', str(value))))
+
+    return ('<row>%s</row>' % ''.join(cells)).encode('utf-8')
+
+
+def _get_xlsx_parts(num_sheets):
+    """Return a dict of workbook parts referring to the given worksheets."""
+
+    numbers = range(1, num_sheets + 1)
+
+    return {
+        '[Content_Types].xml':
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + ''.join('<Override PartName="/xl/worksheets/sheet%d.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' % i
+                      for i in numbers) +
+            '</Types>',
+        '_rels/.rels':
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>',
+        'xl/workbook.xml':
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets>'
+            + ''.join('<sheet name="%s" sheetId="%d" r:id="rId%d"/>'
+                      % ('Ognivo' if i == 1 else 'Ognivo %d' % i, i, i)
+                      for i in numbers) +
+            '</sheets>'
+            '</workbook>',
+        'xl/_rels/workbook.xml.rels':
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + ''.join('<Relationship Id="rId%d" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet%d.xml"/>' % (i, i)
+                      for i in numbers) +
+            '</Relationships>',
+    }
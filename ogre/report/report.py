@@ -27,9 +27,14 @@ PDF report based on XML replies.
 import os
 import logging
 
+from ogre.pdf import Backend
+from ogre.pdf import Compression
 from ogre.pdf import Document
 from ogre.config import config
-from ogre.report.template import Template
+from ogre.memory import memory_report
+from ogre.metrics import metrics
+from ogre.profiling import profiler
+from ogre.report.template import Template, prune_fragments
 
 logger = logging.getLogger(__name__)
 
@@ -37,18 +42,21 @@ logger = logging.getLogger(__name__)
 class Report:
     """PDF document with bank replies grouped by debtor."""
 
-    def __init__(self, model):
+    def __init__(self, model, settings=None):
 
         self._rendered = False
+        self._settings = settings or config().snapshot()
 
-        self._document = Document()
+        self._document = Document(get_compression(), get_backend())
         self._set_metadata(model)
         self._render(model)
 
     def save(self, path):
         """Return true upon successful save to a given file path."""
         if self._rendered and self._document.canvas.num_pages > 0:
-            self._document.save(path)
+            with profiler().stage('save'):
+                self._document.save(path)
+            metrics().increment('bytes.written', os.path.getsize(path))
             logger.info('Saved file as %s', os.path.abspath(path))
             return True
         else:
@@ -57,24 +65,63 @@ class Report:
 
     def _set_metadata(self, model):
         """Set document metadata populated from the configuration."""
-        cfg = config()
-        self._document.metadata.author = cfg.get('metadata', 'author')
-        self._document.metadata.creator = cfg.get('metadata', 'creator')
-        self._document.metadata.keywords = cfg.get('metadata', 'keywords')
-        self._document.metadata.subject = cfg.get('metadata', 'subject')
-        self._document.metadata.title = cfg.get('metadata', 'title',
-                                                num_banks=len(model.banks),
-                                                num_debtors=len(model.debtors))
+        set_metadata(self._document.metadata,
+                     len(model.banks),
+                     len(model.debtors))
 
     def _render(self, model):
         """Interpolate template with the data model."""
         if len(model.replies) > 0:
             logger.info('Please wait while generating report...')
-            template = Template(self._document.canvas)
-            for i, debtor in enumerate(model.sorted_debtors):
-                logger.debug('Rendering template %d. %s',
-                             i + 1, str(debtor))
-                template.render(debtor, model.replies[debtor])
+            template = Template(self._document.canvas, self._settings)
+            with profiler().stage('sort'):
+                debtors = model.sorted_debtors
+            with profiler().stage('render'):
+                for i, debtor in enumerate(debtors):
+                    logger.debug('Rendering template %d. %s',
+                                 i + 1, str(debtor))
+                    with profiler().item('debtors', str(debtor)):
+                        template.render(debtor, model.replies[debtor])
+            memory_report().retain('Canvas', self._document.canvas)
+            if self._settings.cache_fragments:
+                prune_fragments()
             self._rendered = True
         else:
             self._rendered = False
+
+
+def set_metadata(metadata, num_banks, num_debtors):
+    """Populate document metadata from the configuration."""
+    cfg = config()
+    metadata.author = cfg.get('metadata', 'author')
+    metadata.creator = cfg.get('metadata', 'creator')
+    metadata.keywords = cfg.get('metadata', 'keywords')
+    metadata.subject = cfg.get('metadata', 'subject')
+    metadata.title = cfg.get('metadata', 'title',
+                             num_banks=num_banks,
+                             num_debtors=num_debtors)
+
+
+def get_compression():
+    """Return page stream compression settings from the configuration."""
+
+    cfg = config()
+
+    level = cfg.get('pdf', 'compression').strip().lower()
+    if level in ('', 'default'):
+        level = Compression.DEFAULT
+    elif level in ('off', 'false', 'none'):
+        level = Compression.OFF
+    else:
+        level = int(level)
+
+    threads = int(cfg.get('pdf', 'compression_threads') or 0)
+    min_size = int(cfg.get('pdf', 'compression_min_size') or 0)
+
+    return Compression(level, threads or None, min_size)
+
+
+def get_backend():
+    """Return the PDF writer selected in the configuration."""
+    name = config().get('pdf', 'backend').strip().lower()
+    return Backend(name) if name else Backend.REPORTLAB
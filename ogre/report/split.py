@@ -0,0 +1,133 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+One PDF document per debtor written into a directory.
+
+Documents are rendered concurrently by a pool of worker processes, each of
+which receives a single debtor with its replies. Only a limited number of
+debtors is submitted ahead of the workers, so the memory stays bounded
+regardless of the size of the model. Workers are spawned rather than forked,
+since the parent may run other threads, e.g. in the report server, whose
+locks a forked child would inherit in an arbitrary state.
+"""
+
+import os
+import re
+import logging
+import multiprocessing
+import concurrent.futures
+
+import ogre.config
+
+from ogre.pdf import Document
+from ogre.config import Config, config
+from ogre.metrics import metrics
+from ogre.profiling import profiler
+from ogre.report.report import set_metadata, get_compression, get_backend
+from ogre.report.template import Template, prune_fragments
+
+logger = logging.getLogger(__name__)
+
+
+def save_split(model, directory, max_workers=None):
+    """Return true upon successful save of one file per debtor."""
+
+    if len(model.replies) == 0:
+        logger.error('There are no pages to be rendered')
+        return False
+
+    os.makedirs(directory, exist_ok=True)
+
+    max_workers = max_workers or os.cpu_count() or 1
+
+    logger.info('Please wait while generating %d reports...',
+                len(model.replies))
+
+    with profiler().stage('sort'):
+        debtors = model.sorted_debtors
+
+    settings = config().snapshot()
+
+    with profiler().stage('render'), concurrent.futures.ProcessPoolExecutor(
+            max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(config().get_all(),)) as executor:
+
+        pending = set()
+        for debtor in debtors:
+
+            if len(pending) >= 2 * max_workers:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    _collect(future.result())
+
+            path = os.path.join(directory, get_filename(debtor))
+            pending.add(executor.submit(
+                _save_debtor, path, debtor, model.replies[debtor], settings))
+
+        for future in concurrent.futures.as_completed(pending):
+            _collect(future.result())
+
+    if settings.cache_fragments:
+        prune_fragments()
+
+    logger.info('Saved files in %s', os.path.abspath(directory))
+
+    return True
+
+
+def get_filename(debtor):
+    """Return PDF file name made of the debtor's identity."""
+    name = '{}_{}'.format(debtor.identity.name, debtor.identity.value)
+    return re.sub(r'[^\w-]', '_', name) + '.pdf'
+
+
+def _init_worker(sections):
+    """Share configuration with the worker process and set up its logging."""
+    ogre.config._INSTANCE = Config(sections)
+    logging.basicConfig(
+        format=config().get('logger', 'format', logging.BASIC_FORMAT),
+        level=config().get('logger', 'level', 'INFO'))
+
+
+def _save_debtor(path, debtor, replies, settings=None):
+    """Return the number of pages and bytes of a document saved to a file."""
+
+    document = Document(get_compression(), get_backend())
+    set_metadata(document.metadata, len(replies), 1)
+
+    Template(document.canvas, settings).render(debtor, replies)
+
+    document.save(path)
+
+    return document.canvas.num_pages, os.path.getsize(path)
+
+
+def _collect(result):
+    """Account for pages and bytes written by a worker process."""
+    num_pages, num_bytes = result
+    registry = metrics()
+    registry.increment('pages', num_pages)
+    registry.increment('bytes.written', num_bytes)
@@ -22,15 +22,25 @@
 
 """
 Template for a single sheet of paper of the report.
+
+Pages rendered for each debtor can be cached as fragments keyed by a hash of
+the debtor, its replies and the relevant configuration. When the report gets
+generated again, unchanged debtors are drawn from their cached fragments with
+page numbers recomputed, skipping the layout altogether.
 """
 
 import abc
 import math
+import logging
 import datetime
 import itertools
 import collections
 
+import ogre
+
+from ogre import cache
 from ogre.config import config
+from ogre.plural import PluralFormatter
 
 from ogre.pdf import FontFamily
 from ogre.pdf import FontWeight
@@ -38,38 +48,95 @@ from ogre.pdf import HAlign, VAlign
 from ogre.pdf import Table, TableAlign, Header, Column
 from ogre.pdf.table import _Table
 
+logger = logging.getLogger(__name__)
+
 
 class Template:
     """Template for a single sheet of paper (front and rear side)."""
 
-    def __init__(self, canvas):
+    def __init__(self, canvas, settings=None):
         self._canvas = canvas
-        self._watermark = Watermark()
+        self._settings = settings or config().snapshot()
+        self._watermark = Watermark(self._settings.watermark)
+        self._footer = Footer()
         self._page_number = itertools.count(1)
 
     def render(self, debtor, replies):
         """Fill the template with debtor and render it onto the canvas."""
 
-        front_side = FrontSide(self._canvas, self._watermark)
+        if not self._settings.cache_fragments:
+            self._render(debtor, replies)
+            return
+
+        key = self._get_key(debtor, replies)
+        fragments = cache.load('fragments', key)
+
+        if fragments is None:
+            self._canvas.start_recording()
+            try:
+                self._render(debtor, replies)
+            finally:
+                fragments = self._canvas.stop_recording()
+            cache.store('fragments', key, fragments, compress=True)
+        else:
+            for fragment in fragments:
+                self._canvas.add_page()
+                self._canvas.draw_fragment(fragment)
+                self._footer.render(self._canvas, next(self._page_number))
+
+    def _render(self, debtor, replies):
+        """Lay out pages of the debtor and render them onto the canvas."""
+
+        show_rear = self._settings.show_rear
+
+        front_side = FrontSide(self._canvas, self._watermark,
+                               self._settings.show_time)
         rear_side = RearSide(self._canvas, self._watermark)
 
         chunks = list(chunked(replies, front_side.num_rows))
         for chunk in chunks:
             front_side.render(debtor, chunk, next(self._page_number))
-            if self._should_show_rear():
+            if show_rear:
                 rear_side.render(next(self._page_number))
 
-        if not self._should_show_rear():
+        if not show_rear:
             if len(chunks) & 1:
                 blank_page = BlankPage(self._canvas, self._watermark)
                 blank_page.render(next(self._page_number))
 
-    def _should_show_rear(self):
-        """Return True if the rear page should be rendered."""
-        show_rear = config().get('template', 'show_rear')
-        if show_rear:
-            return show_rear.lower() == 'true'
-        return False
+    def _get_key(self, debtor, replies):
+        """Return a hash of everything that affects the rendered pages."""
+
+        parts = [ogre.__version__, self._watermark.value,
+                 self._settings.backend]
+
+        for name, value in self._settings.template:
+            if not name.startswith('cache_'):
+                parts.extend([name, value])
+
+        parts.extend([debtor.identity.name, debtor.identity.value, debtor.name])
+
+        for bank in sorted(replies, key=lambda x: x.name):
+            reply = replies[bank]
+            parts.extend([bank.code, bank.name, bank.prefix,
+                          reply.date_string, reply.time_string,
+                          str(reply.has_account)])
+
+        return cache.get_key(*map(str, parts))
+
+
+def prune_fragments():
+    """Remove cached pages of debtors unused for the configured days."""
+
+    max_age = config().get('template', 'cache_max_age').strip()
+    if not max_age:
+        return 0
+
+    removed = cache.prune('fragments', float(max_age) * 24 * 60 * 60)
+    if removed:
+        logger.debug('Removed %d cached pages of debtors', removed)
+
+    return removed
 
 
 class PageSide(metaclass=abc.ABCMeta):
@@ -81,21 +148,9 @@ class PageSide(metaclass=abc.ABCMeta):
         self._watermark = watermark
 
     def _render_footer(self, page_number):
-        """Render footer at the bottom of the page."""
-
-        self._canvas.push_state()
-        self._canvas.set_default_state()
-
-        self._canvas.font.family = FontFamily.SANS
-        self._canvas.font.weight = FontWeight.NORMAL
-        self._canvas.font.size_mm = 2.5
-
-        self._canvas.text(
-            'Strona ' + str(page_number),
-            0, self._canvas.height - 8.5,
-            self._canvas.width, halign=HAlign.CENTER)
-
-        self._canvas.pop_state()
+        """Render footer at the bottom of the page, which is never cached."""
+        with self._canvas.skip_recording():
+            Footer().render(self._canvas, page_number)
 
 
 class BlankPage(PageSide):
@@ -145,8 +200,9 @@ class TabularPageSide(PageSide, metaclass=abc.ABCMeta):
 class FrontSide(TabularPageSide):
     """Front side of a single sheet of paper."""
 
-    def __init__(self, canvas, watermark):
+    def __init__(self, canvas, watermark, show_time=False):
         super().__init__(canvas, watermark)
+        self._show_time = show_time
 
     def render(self, debtor, chunk, page_number):
         """Render the front side of the current sheet of paper."""
@@ -184,14 +240,11 @@ class FrontSide(TabularPageSide):
         id_ = '{} # {}'.format(debtor.identity.name, debtor.identity.value)
         available_space = table.width - self._canvas.get_text_width_mm(id_)
 
-        def get_width(title):
-            return self._canvas.get_text_width_mm('Ognivo: ' + title + '\u2026')
-
         title = prefix + debtor.name
-        while get_width(title) > available_space:
-            title = title[:-1]
+        length = self._canvas.get_text_fit_mm(
+            title, available_space, head='Ognivo: ', tail='\u2026')
 
-        title = title.strip()
+        title = title[:length].strip()
 
         if title != (prefix + debtor.name):
             title += '\u2026'
@@ -223,7 +276,7 @@ class FrontSide(TabularPageSide):
             date = replies[bank].date_string
             time = replies[bank].time_string
 
-            if time and self._should_show_time():
+            if time and self._show_time:
                 table.cell(3, row, date, HAlign.CENTER, VAlign.TOP, padding=2)
                 table.cell(3, row, time, HAlign.CENTER, VAlign.BOTTOM, padding=2)
             else:
@@ -243,13 +296,6 @@ class FrontSide(TabularPageSide):
 
         self._canvas.pop_state()
 
-    def _should_show_time(self):
-        """Return True if the time component of a date should be rendered."""
-        show_time = config().get('template', 'show_time')
-        if show_time:
-            return show_time.lower() == 'true'
-        return False
-
 
 class RearSide(TabularPageSide):
     """Rear side of a single sheet of paper."""
@@ -291,11 +337,34 @@ class RearSide(TabularPageSide):
         self._canvas.pop_state()
 
 
+class Footer:
+    """Page number printed at the bottom of each page."""
+
+    def render(self, canvas, page_number):
+        """Render footer onto the canvas."""
+
+        canvas.push_state()
+        canvas.set_default_state()
+
+        canvas.font.family = FontFamily.SANS
+        canvas.font.weight = FontWeight.NORMAL
+        canvas.font.size_mm = 2.5
+
+        canvas.text(
+            'Strona ' + str(page_number),
+            0, canvas.height - 8.5,
+            canvas.width, halign=HAlign.CENTER)
+
+        canvas.pop_state()
+
+
 class Watermark:
     """An identifying pattern printed on each page."""
 
-    def __init__(self):
-        self.value = config().get('template', 'watermark', **self.local_date)
+    def __init__(self, template=None):
+        if template is None:
+            template = config().get('template', 'watermark')
+        self.value = PluralFormatter().format(template, **self.local_date)
 
     def render(self, canvas):
         """Render watermark onto the canvas."""
@@ -0,0 +1,45 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Access to data files shipped with the package, e.g. fonts or configuration.
+
+Thin replacement of the pkg_resources functions, which take a considerable
+fraction of the startup time merely to import.
+"""
+
+from importlib.resources import files
+
+
+def resource_stream(package, resource_name):
+    """Return binary file object of a resource given by a slash-separated path."""
+    return _get_traversable(package, resource_name).open('rb')
+
+
+def resource_listdir(package, resource_name):
+    """Return names of entries in a resource directory."""
+    return [x.name for x in _get_traversable(package, resource_name).iterdir()]
+
+
+def _get_traversable(package, resource_name):
+    """Return traversable object of a resource within the package."""
+    return files(package).joinpath(*resource_name.split('/'))
@@ -0,0 +1,133 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Statistical profiler sampling the stack of a thread in the background.
+
+Unlike cProfile, which hooks into every function call, the sampler wakes up
+periodically to record where the profiled thread is, which keeps the
+overhead low enough for production runs. Samples are written as folded
+stacks, one per line with a count, which is the input format of flame graph
+tools such as flamegraph.pl or speedscope.
+"""
+
+import os
+import sys
+import logging
+import threading
+import collections
+
+logger = logging.getLogger(__name__)
+
+ENV_VARIABLE = 'OGRE_SAMPLE'
+ENV_VARIABLE_RATE = 'OGRE_SAMPLE_RATE'
+DEFAULT_RATE = 100
+
+
+class Sampler:
+    """Context manager sampling the thread which entered it."""
+
+    def __init__(self, path, rate=DEFAULT_RATE):
+        assert rate > 0, 'expected a positive sampling rate'
+        self.path = path
+        self.interval = 1.0 / rate
+        self.samples = collections.Counter()
+        self._thread_id = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+        self.save()
+
+    def start(self):
+        """Start sampling the current thread in the background."""
+        self._thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='sampler',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the background thread to finish."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+    def save(self):
+        """Write samples as folded stacks sorted by count."""
+        with open(self.path, 'w', encoding='utf-8') as file_object:
+            for stack, count in self.folded():
+                file_object.write('{} {}\n'.format(stack, count))
+        logger.info('Saved %d stack samples as %s',
+                    sum(self.samples.values()), os.path.abspath(self.path))
+
+    def folded(self):
+        """Return a list of (stack, count) tuples from the most frequent."""
+
+        stacks = collections.Counter()
+        for codes, count in self.samples.items():
+            stacks[';'.join(get_label(x) for x in reversed(codes))] += count
+
+        return stacks.most_common()
+
+    def _run(self):
+        """Take samples until stopped."""
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Record the current stack of the sampled thread."""
+
+        frame = sys._current_frames().get(self._thread_id)
+
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+
+        if codes:
+            self.samples[tuple(codes)] += 1
+
+
+def get_label(code):
+    """Return a name of the function with the file it was defined in."""
+    return '{}:{}'.format(os.path.basename(code.co_filename),
+                          getattr(code, 'co_qualname', code.co_name))
+
+
+def from_environment():
+    """Return a sampler configured with environment variables or None."""
+
+    path = os.environ.get(ENV_VARIABLE)
+    if not path:
+        return None
+
+    rate = os.environ.get(ENV_VARIABLE_RATE)
+
+    return Sampler(path, float(rate) if rate else DEFAULT_RATE)
@@ -0,0 +1,245 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Bartosz Zaczynski
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+Long-running local server which renders reports on request over HTTP.
+
+Modules, fonts, the collator and the configuration stay loaded between
+jobs. A job is posted as a JSON object and answered with a stream of JSON
+lines reporting its progress, followed by the path of the output or an error.
+
+Requests must carry the token of the server as a bearer token and, when
+posting jobs, the JSON content type. Web pages can't send such requests
+to the server without a CORS preflight, which it never answers. Paths
+of a job are confined to its working directory.
+"""
+
+import os
+import hmac
+import json
+import logging
+import secrets
+import threading
+import contextlib
+import collections
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+ENV_VARIABLE = 'OGRE_SERVER_TOKEN'
+
+Job = collections.namedtuple(
+    'Job', 'working_dir file_paths output format split force jobs')
+
+
+class ReportServer(ThreadingHTTPServer):
+    """Run at most the given number of jobs at a time, queueing others.
+
+    The runner is called with a job and a function accepting keyword
+    arguments of progress events, and should return path to the output.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, max_jobs, runner, token):
+        super().__init__(address, _RequestHandler)
+        self.runner = runner
+        self.token = token
+        self._slots = threading.BoundedSemaphore(max_jobs)
+        self._lock = threading.Lock()
+        self._counts = {'queued': 0, 'running': 0}
+
+    @property
+    def counts(self):
+        """Return a dict with the number of queued and running jobs."""
+        with self._lock:
+            return dict(self._counts)
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Wait until a job can be run."""
+
+        self._count('queued', 1)
+        self._slots.acquire()
+        self._count('queued', -1)
+        self._count('running', 1)
+        try:
+            yield
+        finally:
+            self._count('running', -1)
+            self._slots.release()
+
+    def _count(self, name, delta):
+        """Update the number of jobs in a given state."""
+        with self._lock:
+            self._counts[name] += delta
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Accept jobs at /jobs and report the server status at the root."""
+
+    def do_GET(self):
+        """Respond with the number of queued and running jobs."""
+        if not self._is_authorized():
+            self._send_json(401, {'status': 'failed', 'error': 'Unauthorized'})
+        elif self.path == '/':
+            self._send_json(200, dict(status='ok', **self.server.counts))
+        else:
+            self._send_json(404, {'status': 'failed', 'error': 'Not found'})
+
+    def do_POST(self):
+        """Run a job and stream its progress as JSON lines."""
+
+        if not self._is_authorized():
+            self._send_json(401, {'status': 'failed', 'error': 'Unauthorized'})
+            return
+
+        if self.path != '/jobs':
+            self._send_json(404, {'status': 'failed', 'error': 'Not found'})
+            return
+
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.split(';')[0].strip().lower() != 'application/json':
+            self._send_json(415, {'status': 'failed',
+                                  'error': 'Expected application/json'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            job = parse_job(json.loads(self.rfile.read(length).decode('utf-8')))
+        except ValueError as ex:
+            self._send_json(400, {'status': 'failed', 'error': str(ex)})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+
+        self._send_event(status='queued')
+        with self.server.slot():
+            self._send_event(status='running')
+            try:
+                output = self.server.runner(job, self._send_event)
+            except Exception as ex:
+                logger.error('Job failed in %s: %s', job.working_dir, ex)
+                logger.debug('Job failed', exc_info=True)
+                self._send_event(status='failed', error=str(ex))
+            else:
+                self._send_event(status='done', output=output)
+
+    def log_message(self, format_, *args):
+        """Log requests at the debug level instead of standard error."""
+        logger.debug('%s - ' + format_, self.address_string(), *args)
+
+    def _is_authorized(self):
+        """Return true if the request carries the token of the server."""
+        expected = 'Bearer ' + self.server.token
+        actual = self.headers.get('Authorization', '')
+        return hmac.compare_digest(expected.encode('utf-8'),
+                                   actual.encode('utf-8'))
+
+    def _send_json(self, code, obj):
+        """Send a complete response with the given JSON object."""
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_event(self, **event):
+        """Send a line of JSON unless the client has disconnected."""
+        try:
+            self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+            self.wfile.flush()
+        except OSError:
+            logger.debug('Client disconnected, job continues')
+
+
+def parse_job(obj):
+    """Return a job described by a JSON object or raise ValueError."""
+
+    if not isinstance(obj, dict):
+        raise ValueError('Expected a JSON object')
+
+    working_dir = obj.get('working_dir')
+    if not isinstance(working_dir, str) or not os.path.isdir(working_dir):
+        raise ValueError('Missing or invalid working_dir')
+
+    output = obj.get('output')
+    if not isinstance(output, str) or not output:
+        raise ValueError('Missing or invalid output')
+
+    file_paths = obj.get('files')
+    if file_paths is not None:
+        if not isinstance(file_paths, list) or \
+                not all(isinstance(x, str) for x in file_paths):
+            raise ValueError('Expected a list of file paths')
+        file_paths = [_resolve(working_dir, x) for x in file_paths]
+
+    jobs = obj.get('jobs')
+    if jobs is not None and (not isinstance(jobs, int) or jobs < 1):
+        raise ValueError('Expected a positive number of jobs')
+
+    return Job(working_dir=os.path.abspath(working_dir),
+               file_paths=file_paths,
+               output=_resolve(working_dir, output),
+               format=obj.get('format', 'pdf'),
+               split=bool(obj.get('split', False)),
+               force=bool(obj.get('force', False)),
+               jobs=jobs)
+
+
+def get_token():
+    """Return the token from the environment or a new random one."""
+    return os.environ.get(ENV_VARIABLE) or secrets.token_urlsafe(32)
+
+
+def _resolve(working_dir, path):
+    """Return a path relative to the working directory which stays within."""
+
+    if os.path.isabs(path):
+        raise ValueError('Expected a relative path: {}'.format(path))
+
+    base = os.path.realpath(working_dir)
+    resolved = os.path.realpath(os.path.join(base, path))
+
+    if os.path.commonpath([base, resolved]) != base or resolved == base:
+        raise ValueError('Path outside of working_dir: {}'.format(path))
+
+    return resolved
+
+
+def parse_address(text):
+    """Return a (host, port) tuple from text such as localhost:8765."""
+
+    host, _, port = text.rpartition(':')
+
+    try:
+        return host or DEFAULT_HOST, int(port)
+    except ValueError:
+        raise ValueError('Invalid address: {}'.format(text))
@@ -28,40 +28,258 @@ Command-line interface to Ognivo report.
 
 import os
 import time
+import cProfile
+import functools
+import contextlib
 import logging
 import logging.config
 import argparse
 import webbrowser
 
 import ogre.config
+import ogre.metrics
+import ogre.sampler
 
-from ogre.config import config
-from ogre.ognivo.model import Model
-from ogre.report.report import Report
+from ogre.cache import get_cache_dir
+from ogre.config import config, parse_size
+from ogre.memory import MemoryBudgetExceeded, memory_report
+from ogre.metrics import metrics
+from ogre.ognivo import quarantine
+from ogre.profiling import profiler
+from ogre.server import DEFAULT_HOST, DEFAULT_PORT, parse_address
 
 logger = logging.getLogger(__name__)
 
+FORMATS = ('pdf', 'csv', 'json', 'xlsx')
+
 
 def main(args):
     """Application entry point."""
     try:
-        init_config(args.config)
+        init_config(config(), args)
         init_logging(args.debug)
 
         logger.debug(str(config()))
 
-        if os.path.exists(args.output) and not args.force_overwrite:
+        if args.metrics:
+            profiler().enabled = True
+
+        if args.memory_report or args.memory_budget is not None:
+            memory_report().budget = args.memory_budget
+            memory_report().start(detailed=args.memory_report)
+
+        if args.warm_cache:
+            warm_cache()
+        elif args.serve is not None:
+            serve(args)
+        elif os.path.exists(args.output) and not args.force_overwrite:
             logger.error(
                 'File already exists. Use the -f flag to force overwrite.')
         else:
-            model = Model(get_file_paths())
-            report = Report(model)
-
-            if report.save(args.output):
-                webbrowser.open(args.output)
+            with get_sampler(args):
+                if args.profile is not None:
+                    profile(args)
+                else:
+                    run(args)
 
     except KeyboardInterrupt:
         logger.info('Aborted with ^C')
+    except MemoryBudgetExceeded as ex:
+        logger.error('%s', ex)
+    finally:
+        if memory_report().enabled:
+            if args.memory_report:
+                for line in memory_report().summary():
+                    logger.info(line)
+            memory_report().stop()
+        if args.metrics and args.serve is None:
+            metrics().dump(args.metrics)
+
+
+def run(args):
+    """Build the data model and write it in the requested format."""
+
+    # Defer importing reportlab, xmltodict and others until actually needed
+    from ogre.ognivo.model import Model
+    from ogre.report.export import export
+    from ogre.report.report import Report
+    from ogre.report.split import save_split
+
+    # Scanning proceeds lazily as the model parses files
+    file_paths = get_file_paths()
+
+    if args.quarantine is not None:
+        file_paths = quarantine_large_files(file_paths, args.quarantine)
+
+    model = Model(file_paths)
+
+    if args.slow_files:
+        for line in quarantine.summary(model.file_stats, args.slow_files):
+            logger.info(line)
+
+    if args.quarantine is not None and args.max_parse_time is not None:
+        for stats in model.file_stats:
+            if quarantine.is_over_budget(stats, args.max_parse_time):
+                quarantine.move_to_quarantine(
+                    stats.path, args.quarantine, get_working_dir())
+
+    if args.split:
+        save_split(model, args.output, args.jobs)
+    elif args.format == 'pdf':
+        report = Report(model)
+        if report.save(args.output):
+            webbrowser.open(args.output)
+    else:
+        with profiler().stage('save'):
+            export(model, args.output, args.format)
+
+
+def serve(args):
+    """Render reports requested over HTTP keeping resources loaded."""
+
+    # Load everything a job needs upfront rather than in the first one
+    import ogre.report.export
+    import ogre.report.report
+    import ogre.report.split
+
+    from ogre.ognivo.model import get_collator
+    from ogre.pdf.font import register_fonts_with_unicode_glyphs
+    from ogre.server import ReportServer, get_token
+
+    register_fonts_with_unicode_glyphs()
+    get_collator()
+
+    if args.profile is not None:
+        profiler().enabled = True
+
+    # The profiler and memory report are global to the process, and metrics
+    # of each job take the time of stages from the profiler
+    max_jobs = args.max_jobs
+    if max_jobs > 1 and (profiler().enabled or memory_report().enabled):
+        logger.warning('Running one job at a time to keep profiles and metrics apart')
+        max_jobs = 1
+
+    token = get_token()
+
+    runner = functools.partial(run_job, args)
+
+    server = ReportServer(args.serve, max_jobs, runner, token)
+    logger.info('Serving reports at http://%s:%d/jobs', *args.serve)
+    logger.info('Authorization: Bearer %s', token)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if args.profile is not None:
+            for line in profiler().summary():
+                logger.info(line)
+
+
+def run_job(args, job, progress):
+    """Run a job from the server with the configuration of its working dir.
+
+    Counters of the job are kept apart from other jobs and appended to the
+    metrics file, if any, when the job is over.
+    """
+
+    cfg = ogre.config.load()
+    init_config(cfg, args, job.working_dir)
+
+    with ogre.config.scope(cfg), ogre.metrics.scope() as registry:
+        try:
+            return _run_job(job, progress)
+        finally:
+            if args.metrics:
+                registry.dump(args.metrics)
+
+
+def _run_job(job, progress):
+    """Build the data model and write the output of a job from the server."""
+
+    from ogre.ognivo.model import Model
+    from ogre.report.export import export
+    from ogre.report.report import Report
+    from ogre.report.split import save_split
+
+    if job.format not in FORMATS:
+        raise ValueError('Unsupported format: {}'.format(job.format))
+
+    if job.split and job.format != 'pdf':
+        raise ValueError('Split works only with the pdf format')
+
+    output = job.output
+    suffix = '.' + job.format
+    if not job.split and not output.lower().endswith(suffix):
+        output += suffix
+
+    if os.path.exists(output) and not job.force:
+        raise FileExistsError('File already exists: {}'.format(output))
+
+    if job.file_paths is None:
+        file_paths = get_file_paths(job.working_dir)
+    else:
+        file_paths = job.file_paths
+
+    model = Model(file_paths)
+    progress(status='parsed', files=len(model.file_stats),
+             debtors=len(model.debtors))
+
+    progress(status='rendering')
+    if job.split:
+        saved = save_split(model, output, job.jobs)
+    elif job.format == 'pdf':
+        saved = Report(model).save(output)
+    else:
+        export(model, output, job.format)
+        saved = True
+
+    if not saved:
+        raise RuntimeError('There are no pages to be rendered')
+
+    return os.path.abspath(output)
+
+
+def quarantine_large_files(file_paths, quarantine_dir):
+    """Yield paths of files within the size limit, quarantining others."""
+
+    from ogre.ognivo.parser import get_limits
+
+    max_file_size = get_limits().max_file_size
+
+    for file_path in file_paths:
+        if max_file_size is None:
+            yield file_path
+            continue
+        try:
+            size = os.path.getsize(file_path)
+        except OSError as ex:
+            logger.error('Unable to access file at %s: %s', file_path, ex)
+            continue
+        if size <= max_file_size:
+            yield file_path
+        else:
+            quarantine.move_to_quarantine(
+                file_path, quarantine_dir, get_working_dir())
+
+
+def profile(args):
+    """Run with timings per stage, debtor and file reported at exit."""
+
+    profiler().enabled = True
+
+    stats = cProfile.Profile() if args.profile else None
+    try:
+        if stats is None:
+            run(args)
+        else:
+            stats.runcall(run, args)
+    finally:
+        for line in profiler().summary():
+            logger.info(line)
+        if stats is not None:
+            stats.dump_stats(args.profile)
+            logger.info('Saved profile statistics as %s',
+                        os.path.abspath(args.profile))
 
 
 def parse_args():
@@ -89,10 +307,126 @@ def parse_args():
                         dest='config',
                         help='path to custom configuration file')
 
+    parser.add_argument('--format',
+                        dest='format',
+                        choices=FORMATS,
+                        default='pdf',
+                        help='output file format (default: %(default)s)')
+
+    parser.add_argument('-s', '--split',
+                        dest='split',
+                        action='store_true',
+                        help='write one PDF per debtor into output directory')
+
+    parser.add_argument('-j', '--jobs',
+                        dest='jobs',
+                        type=int,
+                        help='number of parallel jobs (default: one per CPU)')
+
+    parser.add_argument('--profile',
+                        dest='profile',
+                        nargs='?',
+                        const='',
+                        metavar='PSTATS',
+                        help='report time spent per stage, debtor and file, '
+                             'optionally saving cProfile statistics')
+
+    parser.add_argument('--metrics',
+                        dest='metrics',
+                        metavar='FILE',
+                        help='append run metrics as a JSON line to the file')
+
+    parser.add_argument('--memory-report',
+                        dest='memory_report',
+                        action='store_true',
+                        help='report memory allocated per stage and object')
+
+    parser.add_argument('--memory-budget',
+                        dest='memory_budget',
+                        type=parse_size,
+                        metavar='SIZE',
+                        help='abort when the process uses more resident '
+                             'memory, e.g. 2G')
+
+    parser.add_argument('--sample',
+                        dest='sample',
+                        metavar='FILE',
+                        help='save folded stacks sampled in the background')
+
+    parser.add_argument('--sample-rate',
+                        dest='sample_rate',
+                        type=float,
+                        metavar='HZ',
+                        help='number of stack samples per second '
+                             '(default: %d)' % ogre.sampler.DEFAULT_RATE)
+
+    parser.add_argument('--slow-files',
+                        dest='slow_files',
+                        type=int,
+                        metavar='N',
+                        help='report N slowest and unusually large files')
+
+    parser.add_argument('--quarantine',
+                        dest='quarantine',
+                        metavar='DIR',
+                        help='move files over budget to this directory '
+                             '(overrides quarantine from the config)')
+
+    parser.add_argument('--max-file-size',
+                        dest='max_file_size',
+                        type=parse_size,
+                        metavar='SIZE',
+                        help='reject files bigger than this, e.g. 10M, '
+                             'instead of max_file_size from the config')
+
+    parser.add_argument('--read-ahead',
+                        dest='read_ahead',
+                        type=int,
+                        metavar='N',
+                        help='number of files read in the background while '
+                             'parsing, which helps on network drives only, '
+                             '0 to disable (default: read_ahead from the config)')
+
+    parser.add_argument('--max-parse-time',
+                        dest='max_parse_time',
+                        type=float,
+                        metavar='SECONDS',
+                        help='quarantine files parsed for longer than this')
+
+    parser.add_argument('--serve',
+                        dest='serve',
+                        nargs='?',
+                        const=(DEFAULT_HOST, DEFAULT_PORT),
+                        type=parse_address,
+                        metavar='ADDRESS',
+                        help='keep running and render reports requested '
+                             'over HTTP (default: %s:%d)' % (
+                                 DEFAULT_HOST, DEFAULT_PORT))
+
+    parser.add_argument('--max-jobs',
+                        dest='max_jobs',
+                        type=int,
+                        default=2,
+                        metavar='N',
+                        help='number of reports rendered at a time by the '
+                             'server (default: %(default)s)')
+
+    parser.add_argument('--warm-cache',
+                        dest='warm_cache',
+                        action='store_true',
+                        help='prebuild persistent cache and exit')
+
     namespace = parser.parse_args()
 
-    if not namespace.output.lower().endswith('.pdf'):
-        namespace.output += '.pdf'
+    if namespace.split and namespace.format != 'pdf':
+        parser.error('--split works only with the pdf format')
+
+    if namespace.max_parse_time is not None and namespace.quarantine is None:
+        parser.error('--max-parse-time requires --quarantine')
+
+    suffix = '.' + namespace.format
+    if not namespace.split and not namespace.output.lower().endswith(suffix):
+        namespace.output += suffix
 
     if namespace.debug:
         namespace.debug = 'DEBUG'
@@ -100,16 +434,28 @@ def parse_args():
     return namespace
 
 
-def init_config(path):
-    """Optionally override global configuration with local *.ini files."""
+def init_config(cfg, args, working_dir=None):
+    """Override configuration with local *.ini files and command line options."""
 
-    local_file = os.path.join(get_working_dir(), ogre.config.FILENAME)
+    if working_dir is None:
+        working_dir = get_working_dir()
+
+    local_file = os.path.join(working_dir, ogre.config.FILENAME)
 
     if os.path.exists(local_file):
-        config().override(local_file)
+        cfg.override(local_file)
+
+    if args.config is not None:
+        cfg.override(args.config)
 
-    if path is not None:
-        config().override(path)
+    if args.max_file_size is not None:
+        cfg.set('xml', 'max_file_size', str(args.max_file_size))
+
+    if args.read_ahead is not None:
+        cfg.set('xml', 'read_ahead', str(args.read_ahead))
+
+    if args.quarantine is not None:
+        cfg.set('xml', 'quarantine', args.quarantine)
 
 
 def init_logging(level=None):
@@ -139,19 +485,68 @@ def init_logging(level=None):
     })
 
 
+def get_sampler(args):
+    """Return a stack sampler requested by a flag, environment or neither."""
+
+    if args.sample is not None:
+        return ogre.sampler.Sampler(
+            args.sample, args.sample_rate or ogre.sampler.DEFAULT_RATE)
+
+    return ogre.sampler.from_environment() or contextlib.nullcontext()
+
+
+def warm_cache():
+    """Prebuild persistent cache of parsed fonts."""
+    from ogre.pdf.font import register_fonts_with_unicode_glyphs
+    logger.info('Warming up cache in %s...', get_cache_dir())
+    register_fonts_with_unicode_glyphs()
+
+
 def get_file_paths(working_dir=None):
-    """Recursively scan working directory for XML files."""
+    """Recursively scan working directory for XML files but quarantine.
+
+    Return a generator of paths in sorted order, which visits directories
+    only as the paths are consumed, so that scanning overlaps parsing.
+    """
 
     if working_dir is None:
         working_dir = get_working_dir()
 
-    file_paths = []
-    for root, _, filenames in os.walk(working_dir):
-        for filename in filenames:
-            if filename.lower().endswith('.xml'):
-                file_paths.append(os.path.join(root, filename))
-
-    return file_paths
+    exclude = quarantine.get_directory(working_dir)
+    if exclude is not None:
+        exclude = os.path.abspath(exclude)
+
+    def scan(directory):
+        """Yield paths under the directory sorted like whole strings."""
+
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError:
+            return
+
+        # A directory sorts by its name followed by the separator, which
+        # every path within it starts with
+        children = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                if not entry.is_symlink() and \
+                        os.path.abspath(entry.path) != exclude:
+                    children.append((entry.name + os.sep, entry.path))
+            elif entry.name.lower().endswith('.xml'):
+                children.append((entry.name, entry.path))
+
+        for name, path in sorted(children):
+            if name.endswith(os.sep):
+                yield from scan(path)
+            else:
+                yield path
+
+    return scan(working_dir)
 
 
 def get_working_dir():
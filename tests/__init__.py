@@ -0,0 +1,11 @@
+import os
+import atexit
+import shutil
+import tempfile
+
+from ogre import cache
+
+# Keep entries written by tests away from the user cache directory
+_CACHE_DIR = tempfile.mkdtemp(prefix='ogre-tests-')
+os.environ[cache.ENV_VARIABLE] = _CACHE_DIR
+atexit.register(shutil.rmtree, _CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,70 @@
+import unittest
+import os
+import tempfile
+
+from ogre.bench.corpus import DEFAULT_OPTIONS, write_corpus, get_bank_codes, get_pesel, get_nip, get_regon
+from ogre.ognivo.model import Model
+from ogre.ognivo.parser import BankReplyParser
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_should_use_configured_bank_prefixes(self):
+        self.assertListEqual(['10100000', '10200000'], get_bank_codes(2))
+
+    def test_should_return_unique_eight_digit_bank_codes(self):
+        codes = get_bank_codes(1500)
+        self.assertEqual({8}, set(map(len, codes)))
+        self.assertEqual(1500, len(set(codes)))
+
+    def test_should_write_one_file_per_bank_and_batch_of_debtors(self):
+        options = DEFAULT_OPTIONS._replace(debtors_per_file=10)
+        file_paths = write_corpus(self.temp_dir.name, 25, 3, options=options)
+        self.assertEqual(9, len(file_paths))
+        self.assertTrue(all(os.path.exists(path) for path in file_paths))
+
+    def test_should_write_parsable_replies(self):
+        path, = write_corpus(self.temp_dir.name, 10, 1)
+        parser = BankReplyParser(path)
+        self.assertEqual('10100000', parser.bank_code)
+        self.assertEqual(10, len(list(parser.entities)))
+
+    def test_should_be_deterministic(self):
+
+        options = DEFAULT_OPTIONS._replace(file_size_sigma=1.0, time_ratio=0.5, duplicate_ratio=0.1)
+
+        def read_all(directory):
+            file_paths = write_corpus(directory, 50, 2, seed=42, options=options)
+            contents = []
+            for path in file_paths:
+                with open(path, 'rb') as file_object:
+                    contents.append(file_object.read())
+            return contents
+
+        self.assertEqual(read_all(os.path.join(self.temp_dir.name, 'a')),
+                         read_all(os.path.join(self.temp_dir.name, 'b')))
+
+    def test_should_resend_duplicate_and_inconsistent_replies(self):
+
+        options = DEFAULT_OPTIONS._replace(duplicate_ratio=0.5, inconsistent_ratio=0.5)
+        file_paths = write_corpus(self.temp_dir.name, 10, 1, options=options)
+
+        self.assertEqual(2, len(file_paths))
+
+        model = Model(file_paths)
+        self.assertEqual(10, len(model.debtors))
+
+    def test_should_compute_pesel_checksum(self):
+        self.assertEqual('30010100012', get_pesel(0))
+        self.assertEqual('30010100005', get_pesel(0, female=True))
+
+    def test_should_return_unique_valid_identities(self):
+        self.assertEqual(1000, len({get_pesel(i) for i in range(1000)}))
+        self.assertEqual(1000, len({get_nip(i) for i in range(1000)}))
+        self.assertEqual('100000037', get_regon(3))
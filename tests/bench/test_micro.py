@@ -0,0 +1,71 @@
+import unittest
+
+from ogre.bench import micro
+
+
+class TestMicro(unittest.TestCase):
+
+    def test_should_register_primitives(self):
+        self.assertIn('canvas.text', micro.BENCHMARKS)
+        self.assertIn('state.push_pop', micro.BENCHMARKS)
+
+    def test_should_run_every_benchmark(self):
+        results = micro.run(number=2, repeat=1)
+        self.assertListEqual(list(micro.BENCHMARKS), list(results['benchmarks']))
+        for result in results['benchmarks'].values():
+            self.assertGreater(result['ops_per_sec'], 0)
+
+    def test_should_run_selected_benchmarks(self):
+        results = micro.run(['font.properties'], number=2, repeat=1)
+        self.assertListEqual(['font.properties'], list(results['benchmarks']))
+
+    def test_should_flag_slower_benchmarks(self):
+
+        def make_results(ops_per_sec):
+            return {'benchmarks': {'foo': {
+                'ops_per_sec': ops_per_sec,
+                'retained_blocks_per_call': 0.0,
+                'retained_bytes_per_call': 0.0}}}
+
+        self.assertListEqual([], micro.compare(make_results(85), make_results(100), 0.2))
+        self.assertListEqual([('foo', 'ops_per_sec', 0.5)],
+                             micro.compare(make_results(50), make_results(100), 0.2))
+
+    def test_should_flag_benchmarks_retaining_more_memory(self):
+
+        def make_results(retained_bytes):
+            return {'benchmarks': {'foo': {
+                'ops_per_sec': 100,
+                'retained_blocks_per_call': 1.0,
+                'retained_bytes_per_call': retained_bytes}}}
+
+        self.assertListEqual([], micro.compare(make_results(150), make_results(100), 0.2))
+        self.assertListEqual([('foo', 'retained_bytes_per_call', 3.0)],
+                             micro.compare(make_results(300), make_results(100), 0.2))
+
+    def test_should_flag_benchmarks_allocating_more_memory(self):
+
+        def make_results(peak_bytes):
+            return {'benchmarks': {'foo': {
+                'ops_per_sec': 100,
+                'peak_bytes_per_call': peak_bytes,
+                'retained_blocks_per_call': 0.0,
+                'retained_bytes_per_call': 0.0}}}
+
+        self.assertListEqual([], micro.compare(make_results(1100), make_results(1000), 0.2))
+        self.assertListEqual([('foo', 'peak_bytes_per_call', 2.0)],
+                             micro.compare(make_results(2000), make_results(1000), 0.2))
+
+    def test_should_measure_temporary_allocations(self):
+
+        def setup():
+            return lambda: len(bytearray(10000))
+
+        result = micro.measure(setup, number=10, repeat=1)
+
+        self.assertGreaterEqual(result['peak_bytes_per_call'], 10000)
+        self.assertLess(result['retained_bytes_per_call'], 100)
+
+    def test_should_ignore_benchmarks_missing_from_baseline(self):
+        results = {'benchmarks': {'foo': {'ops_per_sec': 1}}}
+        self.assertListEqual([], micro.compare(results, {}))
@@ -0,0 +1,50 @@
+import unittest
+import tracemalloc
+
+from ogre.bench import suite
+
+
+class TestSuite(unittest.TestCase):
+
+    def test_should_time_each_stage(self):
+
+        results = suite.run([suite.Scale('tiny', 3, 2)])
+
+        scale = results['scales']['tiny']
+        self.assertEqual(3, scale['debtors'])
+        self.assertEqual(2, scale['banks'])
+        self.assertEqual(6, scale['replies'])
+        self.assertGreater(scale['output_bytes'], 0)
+        self.assertListEqual(list(suite.STAGES), list(scale['stages']))
+        self.assertEqual(6, scale['stages']['parse']['items'])
+
+    def test_should_report_peak_traced_memory_per_stage(self):
+
+        tracemalloc.start()
+        try:
+            results = suite.run([suite.Scale('tiny', 3, 2)])
+        finally:
+            tracemalloc.stop()
+
+        for stage in results['scales']['tiny']['stages'].values():
+            self.assertGreaterEqual(stage['peak_traced_bytes'], 0)
+            self.assertGreater(stage['max_rss_bytes'] or 1, 0)
+
+        self.assertGreater(results['scales']['tiny']['stages']['render']['peak_traced_bytes'], 0)
+
+    def test_should_report_regressions_beyond_tolerance(self):
+
+        def make_results(**seconds):
+            return {'scales': {'small': {'stages': {
+                name: {'seconds': value} for name, value in seconds.items()
+            }}}}
+
+        baseline = make_results(parse=1.0, model=1.0, sort=0.0)
+        results = make_results(parse=1.05, model=1.5, sort=1.0, render=1.0)
+
+        self.assertListEqual([('small', 'model', 1.5)],
+                             suite.compare(results, baseline, tolerance=0.1))
+
+    def test_should_ignore_scales_missing_from_baseline(self):
+        results = {'scales': {'large': {'stages': {'parse': {'seconds': 1.0}}}}}
+        self.assertListEqual([], suite.compare(results, {'scales': {}}))
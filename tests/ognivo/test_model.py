@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from unittest import mock
 import collections
@@ -7,8 +9,10 @@ import datetime
 import dateutil.parser
 
 from ogre.config import Config
+from ogre.metrics import Registry
 from ogre.ognivo.parser import NaturalPerson, LegalEntity, Id
 from ogre.ognivo.model import Identity, Reply, Debtor, Bank, Model, _get_name_and_prefix
+from ogre.ognivo.model import read_ahead, _read_file
 
 from tests.commons import FakeFileObject
 
@@ -33,6 +37,10 @@ class TestIdentity(unittest.TestCase):
         identity = Identity('name', '000value00')
         self.assertEqual('value00', identity.value)
 
+    def test_should_keep_raw_value(self):
+        identity = Identity('name', '000value00')
+        self.assertEqual('000value00', identity.raw_value)
+
     def test_should_be_immutable(self):
 
         id1 = Identity('NIP', '123')
@@ -321,6 +329,54 @@ Hello world
             mock.call.error('Invalid or not well-formed XML content at %s', '/path/to/file2')
         ])
 
+    @mock.patch('ogre.ognivo.model.logger')
+    @mock.patch('codecs.open')
+    def test_should_log_reason_of_rejected_files(self, mock_open, mock_logger):
+
+        mock_open.side_effect = [
+            FakeFileObject(b'<!DOCTYPE a [<!ENTITY x "x">]><a>&x;</a>')
+        ]
+
+        Model(['/path/to/file'])
+
+        mock_logger.error.assert_called_once_with(
+            'Rejected XML file at %s: %s', '/path/to/file', mock.ANY)
+
+    @mock.patch('ogre.ognivo.model._get_size', side_effect=[1024, 10])
+    @mock.patch('ogre.ognivo.model.logger')
+    @mock.patch('codecs.open')
+    def test_should_record_file_stats(self, mock_open, mock_logger, mock_get_size):
+
+        mock_open.side_effect = [
+            self.valid_xml_file,
+            self.not_well_formed_xml_file
+        ]
+
+        model = Model(['/path/to/file1', '/path/to/file2'])
+
+        stats1, stats2 = model.file_stats
+
+        self.assertEqual(('/path/to/file1', 1024, 1), (stats1.path, stats1.size, stats1.entities))
+        self.assertEqual(('/path/to/file2', 10, None), (stats2.path, stats2.size, stats2.entities))
+        self.assertGreaterEqual(stats1.seconds, 0.0)
+
+    @mock.patch('ogre.ognivo.model.metrics', return_value=Registry())
+    @mock.patch('ogre.ognivo.model.logger')
+    @mock.patch('codecs.open')
+    def test_should_count_parsed_and_rejected_files(self, mock_open, mock_logger, mock_metrics):
+
+        mock_open.side_effect = [
+            self.valid_xml_file,
+            self.not_well_formed_xml_file
+        ]
+
+        Model(['/path/to/file1', '/path/to/file2'])
+
+        registry = mock_metrics.return_value
+        self.assertEqual(2, registry['files.scanned'])
+        self.assertEqual(1, registry['files.parsed'])
+        self.assertEqual(1, registry['files.rejected'])
+
     @mock.patch('ogre.ognivo.model.logger')
     @mock.patch('codecs.open')
     def test_should_skip_invalid_xml_files(self, mock_open, mock_logger):
@@ -420,6 +476,32 @@ class TestModel(unittest.TestCase):
         self.assertEqual(2, len(model.banks))
         self.assertEqual(0, len(model.debtors))
 
+    def test_should_sort_collection_of_paths(self):
+
+        self.mock_parser.entities = []
+
+        Model(['/path/to/file2', '/path/to/file1'])
+
+        self.assertListEqual(['/path/to/file1', '/path/to/file2'],
+                             [x[0][0] for x in self.mock_parser_class.call_args_list])
+
+    def test_should_consume_iterator_of_paths_lazily_in_given_order(self):
+
+        self.mock_parser.entities = []
+        consumed = []
+
+        def file_paths():
+            for file_path in ('/path/to/file2', '/path/to/file1'):
+                self.assertEqual(len(consumed), self.mock_parser_class.call_count)
+                consumed.append(file_path)
+                yield file_path
+
+        model = Model(file_paths())
+
+        self.assertListEqual(['/path/to/file2', '/path/to/file1'],
+                             [x[0][0] for x in self.mock_parser_class.call_args_list])
+        self.assertEqual(2, len(model.file_stats))
+
     def test_should_have_one_bank_with_one_debtor(self):
 
         self.mock_parser.entities = [self.JAN_KOWALSKI]
@@ -985,6 +1067,27 @@ class TestModel(unittest.TestCase):
             'Inconsistent replies from the same bank %s for %s',
             mock.ANY, debtor)
 
+    @mock.patch('ogre.ognivo.model.metrics', return_value=Registry())
+    @mock.patch('ogre.ognivo.model.logger')
+    def test_should_count_duplicate_and_contradicting_replies(self, mock_logger, mock_metrics):
+
+        self.mock_parser.bank_code = '00123'
+        self.mock_parser.entities = mock.PropertyMock(side_effect=[
+            [self.JAN_KOWALSKI, self.JAN_KOWALSKI, self.ANNA_NOWAK],
+            [self.JAN_KOWALSKI_2]
+        ])
+
+        Model(self.files.keys())
+
+        registry = mock_metrics.return_value
+        self.assertEqual(2, registry['files.scanned'])
+        self.assertEqual(2, registry['files.parsed'])
+        self.assertEqual(2, registry['replies.duplicates'])
+        self.assertEqual(1, registry['replies.conflicts'])
+        self.assertEqual(1, registry['banks'])
+        self.assertEqual(2, registry['debtors'])
+        self.assertEqual(1, registry['replies'])
+
     def test_should_sort_debtors_by_name_using_unicode_collation(self):
 
         it = itertools.count(1)
@@ -1142,3 +1245,35 @@ class TestGetBankNameAndPrefix(unittest.TestCase):
         }
 
         self.assertTupleEqual(('Dolor Bank', '001'), _get_name_and_prefix('00123'))
+
+
+class TestReadAhead(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_paths = []
+        for i in range(10):
+            path = os.path.join(self.temp_dir.name, '%d.xml' % i)
+            with open(path, 'wb') as file_object:
+                file_object.write(b'x' * i)
+            self.file_paths.append(path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_should_not_read_files_when_disabled(self):
+        self.assertListEqual([(x, None) for x in self.file_paths],
+                             list(read_ahead(self.file_paths, window=0)))
+
+    def test_should_yield_contents_in_order(self):
+        self.assertListEqual([(x, b'x' * i) for i, x in enumerate(self.file_paths)],
+                             list(read_ahead(self.file_paths, window=3)))
+
+    def test_should_yield_none_for_unreadable_file(self):
+        missing_path = os.path.join(self.temp_dir.name, 'missing.xml')
+        self.assertListEqual([(missing_path, None), (self.file_paths[1], b'x')],
+                             list(read_ahead([missing_path, self.file_paths[1]], window=2)))
+
+    def test_should_not_return_content_over_size_limit(self):
+        self.assertEqual(b'xxxxx', _read_file(self.file_paths[5], max_size=5))
+        self.assertIsNone(_read_file(self.file_paths[6], max_size=5))
@@ -8,6 +8,8 @@ from dateutil.tz import tzoffset
 
 from ogre.ognivo.parser import BankReplyParser, LegalEntity, NaturalPerson, Id
 from ogre.ognivo.parser import XmlDocument, XmlElement
+from ogre.ognivo.parser import Limits, XmlLimitExceeded, CHUNK_SIZE, get_limits
+from tests.commons import FakeFileObject
 
 
 class TestBankReplyParser(unittest.TestCase):
@@ -304,6 +306,23 @@ class TestXmlDocument(unittest.TestCase):
         XmlDocument('/path/to/file.xml')
         mock_open.assert_called_with('/path/to/file.xml', encoding='utf-8')
 
+    @mock.patch('codecs.open')
+    def test_should_parse_given_content_without_opening_file(self, mock_open):
+        document = XmlDocument('/path/to/file.xml', data='<root>zażółć</root>'.encode('utf-8'))
+        self.assertEqual('zażółć', document.get('/root'))
+        mock_open.assert_not_called()
+
+    def test_should_decode_given_content_as_utf8_despite_declaration(self):
+        data = '<?xml version="1.0" encoding="windows-1250"?><root>zażółć</root>'.encode('utf-8')
+        document = XmlDocument('/path/to/file.xml', data=data)
+        self.assertEqual('zażółć', document.get('/root'))
+
+    @mock.patch('ogre.ognivo.parser._parse', return_value={})
+    def test_should_pass_given_content_as_bytes(self, mock_parse):
+        XmlDocument('/path/to/file.xml', data=b'<root/>')
+        file_object = mock_parse.call_args[0][0]
+        self.assertEqual(b'<root/>', file_object.read())
+
     @mock.patch('codecs.open')
     def test_should_get_child_recursively(self, mock_open):
         mock_open.return_value.__enter__.return_value = io.StringIO(
@@ -379,3 +398,75 @@ class TestXmlElement(unittest.TestCase):
 
         self.assertDictEqual({'name': 'John'}, child1.value)
         self.assertDictEqual({'name': 'Mary'}, child2.value)
+
+
+class TestXmlLimits(unittest.TestCase):
+
+    def setUp(self):
+        self.limits = Limits(max_file_size=None, max_depth=None, max_debtors=None)
+
+    def parse(self, text, **limits):
+        with mock.patch('codecs.open') as mock_open:
+            mock_open.return_value.__enter__.return_value = io.StringIO(text)
+            return XmlDocument('/path/to/file.xml', self.limits._replace(**limits))
+
+    def test_should_parse_within_limits(self):
+        document = self.parse('<a><b><c>value</c></b></a>', max_file_size=100, max_depth=3)
+        self.assertEqual('value', document.get('/a/b/c'))
+
+    def test_should_reject_file_bigger_than_limit_while_reading(self):
+        with self.assertRaisesRegex(XmlLimitExceeded, 'file size'):
+            self.parse('<a>' + 'x' * 100 + '</a>', max_file_size=50)
+
+    def test_should_count_bytes_of_multibyte_characters(self):
+        with self.assertRaisesRegex(XmlLimitExceeded, 'file size'):
+            self.parse('<a>' + 'ż' * 30 + '</a>', max_file_size=50)
+
+    @mock.patch('os.path.getsize', return_value=1024)
+    def test_should_reject_file_bigger_than_limit_before_reading(self, mock_getsize):
+        with mock.patch('codecs.open') as mock_open:
+            with self.assertRaisesRegex(XmlLimitExceeded, '1024 bytes'):
+                XmlDocument('/path/to/file.xml', self.limits._replace(max_file_size=1000))
+            mock_open.assert_not_called()
+
+    def test_should_reject_given_content_bigger_than_limit(self):
+        with self.assertRaisesRegex(XmlLimitExceeded, '11 bytes'):
+            XmlDocument('/path/to/file.xml', self.limits._replace(max_file_size=10), data=b'<a>xxxx</a>')
+
+    def test_should_reject_elements_nested_too_deep(self):
+        with self.assertRaisesRegex(XmlLimitExceeded, 'depth'):
+            self.parse(10 * '<a>' + 10 * '</a>', max_depth=9)
+
+    def test_should_reject_too_many_debtors(self):
+        with self.assertRaisesRegex(XmlLimitExceeded, 'debtors'):
+            self.parse('<Dluznicy>' + 3 * '<Dluznik/>' + '</Dluznicy>', max_debtors=2)
+
+    def test_should_count_debtors_with_namespace_prefix(self):
+        with self.assertRaisesRegex(XmlLimitExceeded, 'debtors'):
+            self.parse('<x:Dluznicy xmlns:x="ns">' + 2 * '<x:Dluznik/>' + '</x:Dluznicy>',
+                       max_debtors=1)
+
+    def test_should_stop_reading_at_first_violation(self):
+        stream = io.StringIO('<a><b><c/></b></a>' + 'x' * (4 * CHUNK_SIZE))
+        with mock.patch('codecs.open') as mock_open:
+            mock_open.return_value.__enter__.return_value = stream
+            with self.assertRaises(XmlLimitExceeded):
+                XmlDocument('/path/to/file.xml', self.limits._replace(max_depth=2))
+        self.assertLessEqual(stream.tell(), CHUNK_SIZE)
+
+    def test_should_reject_entity_expansion(self):
+        with self.assertRaisesRegex(XmlLimitExceeded, 'entity'):
+            self.parse('<!DOCTYPE a [<!ENTITY x "xxxxxxxxxx"><!ENTITY y "&x;&x;&x;">]><a>&y;</a>')
+
+    def test_should_allow_document_type_without_entities(self):
+        self.assertEqual('value', self.parse('<!DOCTYPE a><a>value</a>').get('/a'))
+
+    @mock.patch('ogre.config.resource_stream')
+    def test_should_read_limits_from_configuration(self, mock_resource_stream):
+        mock_resource_stream.return_value = FakeFileObject(b'''\
+[xml]
+max_file_size=2K
+max_depth=
+max_debtors=10''')
+        with mock.patch('ogre.config._INSTANCE', None):
+            self.assertEqual((2048, None, 10), get_limits())
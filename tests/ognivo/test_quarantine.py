@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ogre.ognivo.model import FileStats
+from ogre.ognivo.quarantine import (get_slowest, get_outliers, is_over_budget,
+                                    get_directory, move_to_quarantine, summary)
+
+
+class TestQuarantine(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = [
+            FileStats('/a.xml', 0.1, 1000, 10),
+            FileStats('/b.xml', 0.5, 1200, 10),
+            FileStats('/c.xml', 0.2, 900, 10),
+            FileStats('/d.xml', 0.3, 50000, 5),
+            FileStats('/e.xml', 0.4, 30, None),
+        ]
+
+    def test_should_return_slowest_files_first(self):
+        self.assertEqual(['/b.xml', '/e.xml', '/d.xml'],
+                         [x.path for x in get_slowest(self.stats, top=3)])
+
+    def test_should_return_outliers_by_bytes_per_entity(self):
+        outliers = get_outliers(self.stats, factor=10.0)
+        self.assertEqual([(self.stats[3], 10000.0)], outliers)
+
+    def test_should_treat_file_without_entities_as_one_entity(self):
+        stats = self.stats + [FileStats('/f.xml', 0.1, 5000, 0)]
+        self.assertIn('/f.xml', [x.path for x, _ in get_outliers(stats, 4.0)])
+
+    def test_should_not_return_outliers_of_a_single_file(self):
+        self.assertEqual([], get_outliers(self.stats[:1]))
+
+    def test_should_check_time_and_size_budget(self):
+        stats = FileStats('/a.xml', 2.0, 1000, 1)
+        self.assertFalse(is_over_budget(stats))
+        self.assertTrue(is_over_budget(stats, max_seconds=1.0))
+        self.assertFalse(is_over_budget(stats, max_seconds=3.0))
+        self.assertTrue(is_over_budget(stats, max_size=999))
+        self.assertFalse(is_over_budget(stats, max_size=1000))
+        self.assertFalse(is_over_budget(FileStats('/a.xml', 0, None, None), max_size=1))
+
+    @mock.patch('ogre.ognivo.quarantine.logger')
+    def test_should_move_file_keeping_relative_path(self, mock_logger):
+        with tempfile.TemporaryDirectory() as working_dir:
+            source = os.path.join(working_dir, 'bank', 'reply.xml')
+            os.makedirs(os.path.dirname(source))
+            open(source, 'w').close()
+
+            directory = os.path.join(working_dir, 'quarantine')
+            target = move_to_quarantine(source, directory, working_dir)
+
+            self.assertEqual(os.path.join(directory, 'bank', 'reply.xml'), target)
+            self.assertTrue(os.path.exists(target))
+            self.assertFalse(os.path.exists(source))
+
+    @mock.patch('ogre.ognivo.quarantine.logger')
+    def test_should_skip_file_which_cannot_be_moved(self, mock_logger):
+        with tempfile.TemporaryDirectory() as working_dir:
+            source = os.path.join(working_dir, 'missing.xml')
+            directory = os.path.join(working_dir, 'quarantine')
+            self.assertIsNone(move_to_quarantine(source, directory, working_dir))
+            mock_logger.error.assert_called_once()
+            mock_logger.warning.assert_not_called()
+
+    @mock.patch('ogre.ognivo.quarantine.config')
+    def test_should_return_configured_directory_within_working_dir(self, mock_config):
+        mock_config.return_value.get.return_value = 'quarantine'
+        self.assertEqual(os.path.join('/work', 'quarantine'), get_directory('/work'))
+        mock_config.return_value.get.assert_called_once_with('xml', 'quarantine')
+
+    @mock.patch('ogre.ognivo.quarantine.config')
+    def test_should_return_none_if_directory_not_configured(self, mock_config):
+        mock_config.return_value.get.return_value = ' '
+        self.assertIsNone(get_directory('/work'))
+
+    def test_should_summarize_slowest_files_and_outliers(self):
+        lines = summary(self.stats, top=2, factor=10.0)
+        self.assertListEqual([
+            'Slowest files of 5:',
+            '   1.     0.500 s         1200 B    10 entities  /b.xml',
+            '   2.     0.400 s           30 B        invalid  /e.xml',
+            '',
+            'Files over 10x the median size per entity:',
+            '         10000 B/entity  /d.xml',
+        ], lines)
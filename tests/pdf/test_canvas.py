@@ -3,6 +3,7 @@ from unittest import mock
 
 from reportlab.lib.pagesizes import letter
 
+from ogre.metrics import Registry
 from ogre.pdf.canvas import Canvas
 from ogre.pdf.metadata import Metadata
 from ogre.pdf.line import Fill
@@ -96,6 +97,13 @@ class TestCanvas(unittest.TestCase):
         mock_save.assert_called_once_with()
         mock_open.assert_called_once_with('/path/to/file', 'wb')
 
+    @mock.patch('ogre.pdf.compression.StreamCompressor.close')
+    @mock.patch('reportlab.pdfgen.canvas.Canvas.save', side_effect=OSError)
+    def test_should_close_compressor_when_viewport_fails_to_save(self, mock_save, mock_close):
+        with self.assertRaises(OSError):
+            Canvas().save('/path/to/file')
+        mock_close.assert_called_once_with()
+
     @mock.patch('reportlab.pdfgen.canvas.Canvas.showPage')
     def test_should_not_insert_page_break_when_no_other_pages(self, mock_show_page):
         Canvas().add_page()
@@ -121,6 +129,16 @@ class TestCanvas(unittest.TestCase):
 
         self.assertEqual(3, canvas.num_pages)
 
+    @mock.patch('ogre.pdf.canvas.metrics', return_value=Registry())
+    def test_should_count_pages(self, mock_metrics):
+
+        canvas = Canvas()
+
+        canvas.add_page()
+        canvas.add_page()
+
+        self.assertEqual(2, mock_metrics.return_value['pages'])
+
     @mock.patch('ogre.pdf.line.Fill.apply')
     @mock.patch('ogre.pdf.line.Stroke.apply')
     def test_should_not_restore_state_on_zeroth_page(self, mock_stroke_apply, mock_fill_apply):
@@ -137,15 +155,48 @@ class TestCanvas(unittest.TestCase):
         self.assertTrue(mock_stroke_apply.called)
         self.assertTrue(mock_fill_apply.called)
 
-    @mock.patch('ogre.pdf.line.Fill.apply')
-    @mock.patch('ogre.pdf.line.Stroke.apply')
-    def test_should_retain_same_state_after_push(self, mock_stroke_apply, mock_fill_apply):
+    @mock.patch('reportlab.pdfgen.canvas.Canvas')
+    def test_should_not_emit_operators_on_push(self, mock_viewport):
         canvas = Canvas()
+        mock_viewport.reset_mock()
         canvas.push_state()
-        self.assertTrue(mock_stroke_apply.called)
-        self.assertTrue(mock_fill_apply.called)
+        self.assertEqual([], mock_viewport.return_value.mock_calls)
 
-    def test_should_make_deep_copies_on_push(self):
+    @mock.patch('reportlab.pdfgen.canvas.Canvas')
+    def test_should_emit_only_changed_operators_on_pop(self, mock_viewport):
+
+        canvas = Canvas()
+        canvas.push_state()
+        canvas.stroke.line_width = 2
+        canvas.fill.alpha = 0.5
+
+        mock_viewport.reset_mock()
+        canvas.pop_state()
+
+        self.assertEqual([
+            mock.call.setLineWidth(0.2834645669291339),
+            mock.call.setFillColor('#000000', 1.0)],
+            mock_viewport.return_value.mock_calls)
+
+    @mock.patch('reportlab.pdfgen.canvas.Canvas')
+    def test_should_not_emit_operators_on_unchanged_default_state(self, mock_viewport):
+        canvas = Canvas()
+        mock_viewport.reset_mock()
+        canvas.set_default_state()
+        self.assertEqual([], mock_viewport.return_value.mock_calls)
+
+    def test_should_not_share_state_with_saved_copy(self):
+
+        canvas = Canvas()
+        set_state(canvas, STATE_1)
+        canvas.push_state()
+        set_state(canvas, STATE_2)
+
+        assert_same(self, STATE_2, get_state(canvas))
+        canvas.pop_state()
+        assert_same(self, STATE_1, get_state(canvas))
+
+    def test_should_make_copies_on_push(self):
 
         canvas = Canvas()
 
@@ -313,6 +364,76 @@ class TestCanvas(unittest.TestCase):
         Canvas().text('lorem ipsum dolor sit amet', 10, 10)
         mock_obj.return_value.textLine.assert_called_once_with('lorem ipsum dolor sit amet')
 
+    @mock.patch('reportlab.pdfgen.canvas.Canvas.drawText')
+    @mock.patch('reportlab.pdfgen.canvas.Canvas.beginText')
+    def test_should_batch_consecutive_runs_of_text(self, mock_obj, mock_draw):
+
+        canvas = Canvas()
+        canvas.text('lorem', 10, 10)
+        canvas.text('ipsum', 20, 20, 50, halign=HAlign.CENTER)
+        canvas.font.size_pts = 20
+        canvas.text('dolor', 30, 30)
+
+        mock_obj.assert_called_once_with(28.34645669291339, 803.9433070866143)
+        mock_draw.assert_not_called()
+
+        mock_obj.return_value.setFont.assert_has_calls([
+            mock.call('FreeSerif', 12.0, 14.399999999999999),
+            mock.call('FreeSerif', 20.0, 24.0)])
+
+        mock_obj.return_value.textLine.assert_has_calls([
+            mock.call('lorem'),
+            mock.call('ipsum'),
+            mock.call('dolor')])
+
+        canvas.line(0, 0, 10, 10)
+        mock_draw.assert_called_once_with(mock_obj.return_value)
+
+    def test_should_record_one_fragment_per_page(self):
+
+        canvas = Canvas()
+        canvas.start_recording()
+        canvas.add_page()
+        canvas.text('lorem', 10, 10)
+        canvas.add_page()
+        canvas.line(0, 0, 10, 10)
+        fragments = canvas.stop_recording()
+
+        self.assertEqual(2, len(fragments))
+        self.assertIn((True, 'textLine', ('lorem',)), fragments[0])
+        self.assertEqual(['line'], [name for _, name, _ in fragments[1]])
+
+    def test_should_skip_recording(self):
+
+        canvas = Canvas()
+        canvas.start_recording()
+        canvas.add_page()
+        canvas.text('lorem', 10, 10)
+        with canvas.skip_recording():
+            canvas.text('ipsum', 10, 20)
+        canvas.text('dolor', 10, 30)
+        fragment, = canvas.stop_recording()
+
+        self.assertIn((True, 'textLine', ('lorem',)), fragment)
+        self.assertNotIn((True, 'textLine', ('ipsum',)), fragment)
+        self.assertIn((True, 'textLine', ('dolor',)), fragment)
+
+    @mock.patch('ogre.pdf.canvas.register_font')
+    @mock.patch('reportlab.pdfgen.canvas.Canvas')
+    def test_should_draw_fragment_with_fonts_registered(self, mock_canvas, mock_register_font):
+
+        canvas = Canvas()
+        canvas.add_page()
+        canvas.draw_fragment([
+            (False, 'beginText', (1, 2)),
+            (True, 'setFont', ('FreeSans', 10, 12)),
+            (True, 'textLine', ('lorem',))])
+
+        mock_register_font.assert_called_once_with('FreeSans')
+        mock_canvas.return_value.beginText.return_value.assert_has_calls([
+            mock.call.setFont('FreeSans', 10, 12),
+            mock.call.textLine('lorem')])
+
     def test_should_return_cursor_position_after_drawing_line_of_text(self):
         self.assertAlmostEqual(31.09, Canvas().text('lorem ipsum', 10, 10), places=2)
 
@@ -625,6 +746,19 @@ class TestCanvas(unittest.TestCase):
         self.assertAlmostEqual(55.44, width, 2)
 
 
+    def test_should_return_widths_of_many_lines_of_text(self):
+
+        canvas = Canvas()
+        canvas.font.size_pts = 10
+        canvas.font.char_space_pts = 1.5
+
+        lines = self.TEXT.split('\n')
+
+        self.assertEqual(
+            [canvas.get_text_width_mm(line) for line in lines],
+            canvas.get_text_widths_mm(lines))
+
+
 def set_attribute(obj, path, value):
     """Recursively traverse object attributes and set values of the leafs."""
     names = path.split('.')
@@ -0,0 +1,128 @@
+import unittest
+from unittest import mock
+import zlib
+import os
+import tempfile
+
+from reportlab import rl_config
+
+from ogre.pdf.canvas import Canvas
+from ogre.pdf.compression import Compression
+from ogre.pdf.compression import StreamCompressor
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_should_use_default_level(self):
+        self.assertEqual(zlib.Z_DEFAULT_COMPRESSION, Compression().level)
+
+    def test_should_use_one_thread_per_cpu_by_default(self):
+        with mock.patch('os.cpu_count', return_value=7):
+            self.assertEqual(7, Compression().threads)
+
+    def test_should_use_given_number_of_threads(self):
+        self.assertEqual(3, Compression(threads=3).threads)
+
+    def test_should_be_enabled_by_default(self):
+        self.assertTrue(Compression().enabled)
+
+    def test_should_be_disabled_when_off(self):
+        self.assertFalse(Compression(Compression.OFF).enabled)
+
+    def test_should_reject_invalid_level(self):
+        with self.assertRaises(AssertionError):
+            Compression(10)
+
+    def test_should_reject_invalid_threads(self):
+        with self.assertRaises(AssertionError):
+            Compression(threads=-1)
+
+    def test_should_compress_content_with_level(self):
+        content = b'lorem ipsum dolor sit amet ' * 100
+        self.assertEqual(zlib.compress(content, 9), Compression(9).compress(content))
+
+    def test_should_not_compress_short_content(self):
+        self.assertIsNone(Compression(min_size=10).compress(b'lorem'))
+
+    def test_should_compress_content_of_min_size(self):
+        self.assertIsNotNone(Compression(min_size=5).compress(b'lorem'))
+
+
+class TestStreamCompressor(unittest.TestCase):
+
+    def test_should_disable_page_compression_when_off(self):
+        mock_canvas = mock.Mock()
+        StreamCompressor(mock_canvas, Compression(Compression.OFF))
+        mock_canvas.setPageCompression.assert_called_once_with(0)
+        mock_canvas.setPageCallBack.assert_not_called()
+
+    def test_should_compress_pages_as_they_are_finished(self):
+        mock_canvas = mock.Mock()
+        compressor = StreamCompressor(mock_canvas, Compression())
+        mock_canvas.setPageCallBack.assert_called_once_with(compressor._on_page)
+
+    def test_should_close_without_pages(self):
+        StreamCompressor(mock.Mock(), Compression()).close()
+
+    def test_should_leave_pages_to_reportlab_when_missing_private_api(self):
+        mock_canvas = mock.Mock(spec=['setPageCompression', 'setPageCallBack'])
+        compressor = StreamCompressor(mock_canvas, Compression())
+        compressor._on_page(1)
+        mock_canvas.setPageCallBack.assert_called_with(None)
+        self.assertIsNone(compressor._executor)
+
+
+class TestCompressedDocument(unittest.TestCase):
+
+    def setUp(self):
+        self.use_a85 = rl_config.useA85
+        self.invariant = rl_config.invariant
+        rl_config.useA85 = 0
+        rl_config.invariant = 1
+
+    def tearDown(self):
+        rl_config.useA85 = self.use_a85
+        rl_config.invariant = self.invariant
+
+    def render(self, compression, private_api=True):
+
+        canvas = Canvas(compression=compression)
+        if not private_api:
+            viewport = canvas._viewport
+            canvas._compressor._canvas = mock.Mock(
+                spec=['setPageCallBack'],
+                setPageCallBack=viewport.setPageCallBack)
+        for i in range(3):
+            canvas.add_page()
+            canvas.grid([10, 20, 30], [10, 20, 30])
+            canvas.text('lorem ipsum %d' % i, 10, 10)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'document.pdf')
+            canvas.save(path)
+            with open(path, 'rb') as file_object:
+                return file_object.read()
+
+    def test_should_compress_all_pages(self):
+        data = self.render(Compression(threads=2))
+        self.assertEqual(3, data.count(b'/Contents'))
+        self.assertNotIn(b'lorem ipsum', data)
+
+    def test_should_not_compress_pages_when_off(self):
+        data = self.render(Compression(Compression.OFF))
+        for i in range(3):
+            self.assertIn(b'(lorem ipsum %d) Tj' % i, data)
+
+    def test_should_not_compress_pages_shorter_than_min_size(self):
+        data = self.render(Compression(min_size=100000))
+        self.assertIn(b'(lorem ipsum 0) Tj', data)
+
+    def test_should_compress_pages_serially_when_missing_private_api(self):
+        data = self.render(Compression(), private_api=False)
+        self.assertEqual(3, data.count(b'/Contents'))
+        self.assertNotIn(b'lorem ipsum', data)
+
+    def test_should_produce_same_document_regardless_of_threads(self):
+        self.assertEqual(
+            self.render(Compression(threads=1)),
+            self.render(Compression(threads=4)))
@@ -1,8 +1,17 @@
+import os
+import tempfile
+import threading
+import time
 import unittest
 from unittest import mock
 
 from reportlab.pdfbase import pdfmetrics
 
+import ogre.pdf.font
+
+from ogre import cache
+
+from ogre.pdf.font import register_font
 from ogre.pdf.font import register_fonts_with_unicode_glyphs
 
 from ogre.pdf.font import Font
@@ -26,25 +35,111 @@ class TestFont(unittest.TestCase):
             Font().size = 12
 
     @mock.patch('ogre.pdf.font.register_fonts_with_unicode_glyphs')
-    def test_should_register_fonts_on_first_instantiation(self, mock_register):
+    def test_should_not_register_fonts_on_instantiation(self, mock_register):
 
         unregister_custom_fonts()
 
         Font()
 
-        self.assertTrue(mock_register.called)
-        self.assertTrue(Font.registered)
+        self.assertFalse(mock_register.called)
+        self.assertNotIn('FreeSerif', pdfmetrics.getRegisteredFontNames())
 
-    @mock.patch('ogre.pdf.font.register_fonts_with_unicode_glyphs')
-    def test_should_not_register_fonts_on_subsequent_instantiations(self, mock_register):
+    def test_should_register_only_used_font_on_first_use(self):
 
         unregister_custom_fonts()
 
-        Font()
+        font = Font()
+        font.family = FontFamily.SANS
+        font.weight = FontWeight.BOLD
 
-        Font()
+        self.assertEqual('FreeSansBold', font.name)
+        self.assertEqual(['FreeSansBold'], sorted(
+            name for name in pdfmetrics.getRegisteredFontNames()
+            if name not in ('Symbol', 'ZapfDingbats')))
+
+    def test_should_not_register_font_on_subsequent_use(self):
+
+        unregister_custom_fonts()
+
+        font = Font()
+        font.name
+
+        with mock.patch('ogre.pdf.font._register_font') as mock_register:
+            font.name
+
+        self.assertFalse(mock_register.called)
+
+    def test_should_not_register_fonts_again(self):
+
+        register_fonts_with_unicode_glyphs()
+
+        with mock.patch('ogre.pdf.font._register_font') as mock_register:
+            register_fonts_with_unicode_glyphs()
+
+        self.assertFalse(mock_register.called)
+
+    def test_should_register_font_once_from_many_threads(self):
+
+        unregister_custom_fonts()
+
+        register = ogre.pdf.font._register_font
+
+        def slow_register(*args):
+            time.sleep(0.01)
+            register(*args)
+
+        barrier = threading.Barrier(4)
+
+        def use_font():
+            barrier.wait()
+            Font().name
+
+        with mock.patch('ogre.pdf.font._register_font', side_effect=slow_register) as mock_register:
+            threads = [threading.Thread(target=use_font) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        mock_register.assert_called_once()
+
+    def test_should_list_font_files_once(self):
+
+        ogre.pdf.font._list_font_files.cache_clear()
+
+        with mock.patch('ogre.pdf.font.resource_listdir', return_value=['FreeSans.ttf']) as mock_listdir:
+            ogre.pdf.font._list_font_files('fonts')
+            ogre.pdf.font._list_font_files('fonts')
+
+        ogre.pdf.font._list_font_files.cache_clear()
+
+        mock_listdir.assert_called_once_with('ogre.pdf', 'fonts')
+
+    def test_should_register_font_with_italic_instead_of_oblique(self):
+
+        unregister_custom_fonts()
+
+        register_font('FreeMonoBoldItalic')
+
+        self.assertIn('FreeMonoBoldItalic', pdfmetrics.getRegisteredFontNames())
+
+    def test_should_reuse_cached_font_on_subsequent_registration(self):
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with mock.patch.dict(os.environ, {cache.ENV_VARIABLE: temp_dir}):
+
+                unregister_custom_fonts()
+                register_font('FreeSans')
+                expected = pdfmetrics.stringWidth('Zażółć gęślą jaźń', 'FreeSans', 10)
+
+                unregister_custom_fonts()
+                with mock.patch('ogre.pdf.font.TTFont.__init__') as mock_init:
+                    register_font('FreeSans')
+                    self.assertFalse(mock_init.called)
 
-        self.assertEqual(1, len(mock_register.mock_calls))
+                actual = pdfmetrics.stringWidth('Zażółć gęślą jaźń', 'FreeSans', 10)
+                self.assertEqual(expected, actual)
+                self.assertTrue(pdfmetrics.getFont('FreeSans').face.makeSubset([65, 66]))
 
     def test_should_have_default_properties(self):
 
@@ -241,4 +336,4 @@ def unregister_custom_fonts():
     for name in list(pdfmetrics._fonts.keys())[:]:
         if name not in ('Symbol', 'ZapfDingbats'):
             del pdfmetrics._fonts[name]
-    Font.registered = False
+    ogre.pdf.font._REGISTERED.clear()
@@ -0,0 +1,98 @@
+import unittest
+
+from reportlab.pdfbase import pdfmetrics
+
+from ogre.pdf.font import register_fonts_with_unicode_glyphs
+from ogre.pdf.metrics import AdvanceTable, TextMetrics, count_words, get_advance_table
+
+
+class TestAdvanceTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = AdvanceTable({ord('a'): 500, ord('b'): 600, 0x1d538: 700}, 1000)
+
+    def test_should_return_advances_of_known_and_unknown_characters(self):
+        self.assertEqual([500, 600, 1000], list(self.table.advances('abc')))
+
+    def test_should_return_advances_of_characters_outside_basic_plane(self):
+        self.assertEqual([500, 700, 1000], list(self.table.advances('a\U0001d538\U0001d539')))
+
+    def test_should_return_sum_of_advances(self):
+        self.assertEqual(2200, self.table.units('abba'))
+
+    def test_should_return_cumulative_advances(self):
+        self.assertEqual([0, 500, 1100, 2100], self.table.cumulative('abc'))
+
+    def test_should_cache_table_per_font(self):
+        register_fonts_with_unicode_glyphs()
+        self.assertIs(get_advance_table('FreeSans'), get_advance_table('FreeSans'))
+        self.assertIsNot(get_advance_table('FreeSans'), get_advance_table('FreeSansBold'))
+
+
+class TestTextMetrics(unittest.TestCase):
+
+    TEXT = 'Zażółć gęślą jaźń, lorem ipsum dolor sit amet  consectetur'
+
+    @classmethod
+    def setUpClass(cls):
+        register_fonts_with_unicode_glyphs()
+
+    def test_should_return_same_width_as_reportlab(self):
+        metrics = TextMetrics('FreeSans', 10)
+        self.assertEqual(pdfmetrics.stringWidth(self.TEXT, 'FreeSans', 10), metrics.width(self.TEXT))
+
+    def test_should_include_char_and_word_space_in_width(self):
+        metrics = TextMetrics('FreeSans', 10, 1.5, 2.5)
+        expected = pdfmetrics.stringWidth('lorem ipsum', 'FreeSans', 10) + 1.5 * 10 + 2.5 * 1
+        self.assertAlmostEqual(expected, metrics.width('lorem ipsum'))
+
+    def test_should_return_widths_of_many_lines_at_once(self):
+        metrics = TextMetrics('FreeSerif', 10, 1.5, 2.5)
+        lines = ['lorem ipsum', '', 'dolor \U0001d538 sit', self.TEXT]
+        self.assertEqual([metrics.width(line) for line in lines], metrics.widths(lines))
+
+    def test_should_wrap_words_greedily(self):
+        metrics = TextMetrics('FreeSans', 10)
+        max_width = metrics.width('lorem ipsum dolor')
+        self.assertEqual(
+            ['lorem ipsum dolor', 'sit amet', 'consectetur'],
+            metrics.wrap('lorem ipsum dolor sit amet consectetur', lambda x: x <= max_width))
+
+    def test_should_not_hyphenate_words_too_long_to_fit(self):
+        metrics = TextMetrics('FreeSans', 10)
+        self.assertEqual(['lorem', 'ipsum'], metrics.wrap('lorem ipsum', lambda x: x <= 1))
+
+    def test_should_wrap_empty_text(self):
+        self.assertEqual([], TextMetrics('FreeSans', 10).wrap('', lambda x: True))
+
+    def test_should_fit_longest_prefix_with_head_and_tail(self):
+
+        metrics = TextMetrics('FreeSansBold', 12, 0.5, 1.0)
+
+        for max_width in (0, 50, 100, 150, 1000):
+            length = metrics.fit(self.TEXT, lambda x: x <= max_width, 'Ognivo: ', '…')
+            expected = len(self.TEXT)
+            while expected > 0 and metrics.width('Ognivo: ' + self.TEXT[:expected] + '…') > max_width:
+                expected -= 1
+            self.assertEqual(expected, length)
+
+    def test_should_fit_tail_joined_with_last_word(self):
+
+        metrics = TextMetrics('FreeSans', 10, 0, 100)
+        text = 'ab cd '
+
+        for length in range(len(text) + 1):
+            width = metrics.width('x' + text[:length] + 'y z')
+            self.assertEqual(length, metrics.fit(text, lambda x: x <= width, 'x', 'y z'))
+
+    def test_should_count_words_in_all_prefixes(self):
+        self.assertEqual([0, 0, 1, 1, 1, 1, 2], count_words(' ab  c'))
+
+    def test_should_fit_with_negative_char_space(self):
+
+        metrics = TextMetrics('FreeSans', 10, -20)
+
+        self.assertFalse(metrics.is_monotonic)
+
+        length = metrics.fit('ab', lambda x: x <= 0)
+        self.assertEqual(2, length)
@@ -0,0 +1,277 @@
+import unittest
+from unittest import mock
+
+from ogre.pdf.viewport import Viewport, TextObject
+
+
+class TestViewport(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_canvas = mock.Mock()
+        self.viewport = Viewport(self.mock_canvas)
+
+    def test_should_delegate_other_methods(self):
+        self.viewport.rect(1, 2, 3, 4)
+        self.mock_canvas.rect.assert_called_once_with(1, 2, 3, 4)
+
+    def test_should_emit_operator_on_first_use(self):
+        self.viewport.setLineWidth(2.5)
+        self.mock_canvas.setLineWidth.assert_called_once_with(2.5)
+
+    def test_should_skip_redundant_operators(self):
+
+        self.viewport.setLineWidth(2.5)
+        self.viewport.setLineWidth(2.5)
+        self.viewport.setDash([1, 2])
+        self.viewport.setDash([1, 2])
+        self.viewport.setFillColor('red', 0.5)
+        self.viewport.setFillColor('red', 0.5)
+
+        self.assertEqual([
+            mock.call.setLineWidth(2.5),
+            mock.call.setDash([1, 2]),
+            mock.call.setFillColor('red', 0.5)],
+            self.mock_canvas.mock_calls)
+
+    def test_should_emit_changed_operators(self):
+
+        self.viewport.setStrokeColor('red', 1.0)
+        self.viewport.setStrokeColor('red', 0.5)
+        self.viewport.setLineCap(0)
+        self.viewport.setLineCap(2)
+
+        self.assertEqual([
+            mock.call.setStrokeColor('red', 1.0),
+            mock.call.setStrokeColor('red', 0.5),
+            mock.call.setLineCap(0),
+            mock.call.setLineCap(2)],
+            self.mock_canvas.mock_calls)
+
+    def test_should_track_operators_independently(self):
+
+        self.viewport.setLineJoin(1)
+        self.viewport.setMiterLimit(1)
+        self.viewport.setLineJoin(1)
+
+        self.assertEqual([
+            mock.call.setLineJoin(1),
+            mock.call.setMiterLimit(1)],
+            self.mock_canvas.mock_calls)
+
+    def test_should_forget_state_on_new_page(self):
+
+        self.viewport.setFillColor('red', 1.0)
+        self.viewport.showPage()
+        self.viewport.setFillColor('red', 1.0)
+
+        self.assertEqual([
+            mock.call.setFillColor('red', 1.0),
+            mock.call.showPage(),
+            mock.call.setFillColor('red', 1.0)],
+            self.mock_canvas.mock_calls)
+
+    def test_should_reuse_pending_text_object(self):
+
+        first = self.viewport.beginText(1, 2)
+        second = self.viewport.beginText(3, 4)
+
+        self.assertIs(first, second)
+        self.mock_canvas.beginText.assert_called_once_with(1, 2)
+        self.mock_canvas.beginText.return_value.setTextOrigin.assert_called_once_with(3, 4)
+
+    def test_should_not_draw_text_before_other_operations(self):
+        self.viewport.beginText(1, 2).textLine('lorem ipsum')
+        self.mock_canvas.drawText.assert_not_called()
+
+    def test_should_draw_pending_text_before_other_operations(self):
+
+        self.viewport.beginText(1, 2).textLine('lorem ipsum')
+        self.viewport.grid([1, 2], [3, 4])
+
+        self.assertEqual([
+            mock.call.beginText(1, 2),
+            mock.call.beginText().textLine('lorem ipsum'),
+            mock.call.drawText(self.mock_canvas.beginText.return_value),
+            mock.call.grid([1, 2], [3, 4])],
+            self.mock_canvas.mock_calls)
+
+    def test_should_draw_pending_text_before_new_page(self):
+
+        self.viewport.beginText(1, 2)
+        self.viewport.showPage()
+        self.viewport.beginText(1, 2)
+
+        self.assertEqual([
+            mock.call.beginText(1, 2),
+            mock.call.drawText(self.mock_canvas.beginText.return_value),
+            mock.call.showPage(),
+            mock.call.beginText(1, 2)],
+            self.mock_canvas.mock_calls)
+
+    def test_should_end_text_only_once(self):
+        self.viewport.beginText(1, 2)
+        self.viewport.end_text()
+        self.viewport.end_text()
+        self.mock_canvas.drawText.assert_called_once_with(
+            self.mock_canvas.beginText.return_value)
+
+    def test_should_set_colors_inside_of_pending_text_object(self):
+
+        mock_text_object = self.mock_canvas.beginText.return_value
+
+        self.viewport.beginText(1, 2)
+        self.viewport.setFillColor('red', 0.5)
+        self.viewport.setStrokeColor('red', 0.5)
+
+        mock_text_object.setFillColor.assert_called_once_with('red', 0.5)
+        mock_text_object.setStrokeColor.assert_called_once_with('red', 0.5)
+        self.mock_canvas.setFillColor.assert_not_called()
+        self.mock_canvas.drawText.assert_not_called()
+
+    def test_should_draw_pending_text_before_line_settings(self):
+
+        self.viewport.beginText(1, 2)
+        self.viewport.setLineWidth(2.5)
+
+        self.assertEqual([
+            mock.call.beginText(1, 2),
+            mock.call.drawText(self.mock_canvas.beginText.return_value),
+            mock.call.setLineWidth(2.5)],
+            self.mock_canvas.mock_calls)
+
+    def test_should_not_draw_pending_text_before_redundant_line_settings(self):
+        self.viewport.setLineWidth(2.5)
+        self.viewport.beginText(1, 2)
+        self.viewport.setLineWidth(2.5)
+        self.mock_canvas.drawText.assert_not_called()
+
+    def test_should_record_calls(self):
+
+        calls = []
+        self.viewport.record(calls)
+
+        self.viewport.setLineWidth(2.5)
+        self.viewport.rect(1, 2, 3, 4)
+        text = self.viewport.beginText(1, 2)
+        text.setFont('FreeSans', 10, 12)
+        text.textLine('foo')
+
+        self.assertEqual([
+            (False, 'setLineWidth', (2.5,)),
+            (False, 'rect', (1, 2, 3, 4)),
+            (False, 'beginText', (1, 2)),
+            (True, 'setFont', ('FreeSans', 10, 12)),
+            (True, 'textLine', ('foo',))],
+            calls)
+
+    def test_should_record_operators_set_before_recording(self):
+
+        self.viewport.setLineWidth(2.5)
+
+        calls = []
+        self.viewport.record(calls)
+        self.viewport.setLineWidth(2.5)
+        self.viewport.setLineWidth(2.5)
+
+        self.assertEqual([(False, 'setLineWidth', (2.5,))], calls)
+
+    def test_should_not_record_redundant_text_origin(self):
+
+        calls = []
+        self.viewport.record(calls)
+
+        text = self.viewport.beginText(1, 2)
+        text.setTextOrigin(1, 2)
+        text.textLine('foo')
+        text.setTextOrigin(1, 2)
+
+        self.assertEqual([
+            (False, 'beginText', (1, 2)),
+            (True, 'textLine', ('foo',)),
+            (True, 'setTextOrigin', (1, 2))],
+            calls)
+
+    def test_should_stop_recording(self):
+
+        calls = []
+        self.viewport.record(calls)
+        self.viewport.setLineWidth(2.5)
+
+        self.assertIs(calls, self.viewport.record(None))
+        self.viewport.setLineWidth(1.5)
+        self.viewport.beginText(1, 2).textLine('foo')
+
+        self.assertEqual([(False, 'setLineWidth', (2.5,))], calls)
+
+    def test_should_replay_calls(self):
+
+        self.viewport.replay([
+            (False, 'setLineWidth', (2.5,)),
+            (False, 'beginText', (1, 2)),
+            (True, 'textLine', ('foo',)),
+            (False, 'rect', (1, 2, 3, 4))])
+
+        mock_text_object = self.mock_canvas.beginText.return_value
+        self.assertEqual([
+            mock.call.setLineWidth(2.5),
+            mock.call.beginText(1, 2),
+            mock.call.beginText().textLine('foo'),
+            mock.call.drawText(mock_text_object),
+            mock.call.rect(1, 2, 3, 4)],
+            self.mock_canvas.mock_calls)
+
+
+class TestTextObject(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_text_object = mock.Mock()
+        self.text_object = TextObject(self.mock_text_object, 1, 2)
+
+    def test_should_delegate_other_methods(self):
+        self.text_object.getY()
+        self.mock_text_object.getY.assert_called_once_with()
+
+    def test_should_unwrap_text_object(self):
+        self.assertIs(self.mock_text_object, self.text_object.unwrap())
+
+    def test_should_skip_redundant_operators(self):
+
+        for _ in range(2):
+            self.text_object.setFont('FreeSans', 10, 12)
+            self.text_object.setTextRenderMode(0)
+            self.text_object.setCharSpace(1.5)
+            self.text_object.setWordSpace(2.5)
+            self.text_object.setRise(0.0)
+
+        self.assertEqual([
+            mock.call.setFont('FreeSans', 10, 12),
+            mock.call.setTextRenderMode(0),
+            mock.call.setCharSpace(1.5),
+            mock.call.setWordSpace(2.5),
+            mock.call.setRise(0.0)],
+            self.mock_text_object.mock_calls)
+
+    def test_should_emit_changed_operators(self):
+
+        self.text_object.setFont('FreeSans', 10, 12)
+        self.text_object.setFont('FreeSansBold', 10, 12)
+
+        self.assertEqual([
+            mock.call.setFont('FreeSans', 10, 12),
+            mock.call.setFont('FreeSansBold', 10, 12)],
+            self.mock_text_object.mock_calls)
+
+    def test_should_skip_redundant_text_origin(self):
+        self.text_object.setTextOrigin(1, 2)
+        self.mock_text_object.setTextOrigin.assert_not_called()
+
+    def test_should_move_text_origin_after_line_of_text(self):
+
+        self.text_object.textLine('lorem ipsum')
+        self.text_object.setTextOrigin(1, 2)
+        self.text_object.setTextOrigin(1, 2)
+
+        self.assertEqual([
+            mock.call.textLine('lorem ipsum'),
+            mock.call.setTextOrigin(1, 2)],
+            self.mock_text_object.mock_calls)
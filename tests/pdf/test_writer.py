@@ -0,0 +1,286 @@
+import unittest
+import io
+import os
+import re
+import tempfile
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+
+from ogre.pdf.align import HAlign, VAlign
+from ogre.pdf.canvas import Backend
+from ogre.pdf.canvas import Canvas
+from ogre.pdf.compression import Compression
+from ogre.pdf.font import FontFamily
+from ogre.pdf.font import FontWeight
+from ogre.pdf.font import register_fonts_with_unicode_glyphs
+from ogre.pdf.line import LineCap
+from ogre.pdf.writer import EmbeddedFont
+from ogre.pdf.writer import Writer
+
+
+class TestWriter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        register_fonts_with_unicode_glyphs()
+
+    def setUp(self):
+        self.buffer = io.BytesIO()
+        self.writer = Writer(self.buffer, A4, Compression(Compression.OFF))
+
+    def test_should_draw_rect(self):
+        self.writer.rect(1, 2, 3.5, 4.25, 1, 1)
+        self.assertEqual(['n 1 2 3.5 4.25 re B*'], self.writer._code)
+
+    def test_should_draw_line(self):
+        self.writer.line(1, 2, 3, 4)
+        self.assertEqual(['n 1 2 m 3 4 l S'], self.writer._code)
+
+    def test_should_draw_grid(self):
+        self.writer.grid([1, 2], [3, 4])
+        self.assertEqual([
+            'n',
+            '1 3 m 1 4 l',
+            '2 3 m 2 4 l',
+            '1 3 m 2 3 l',
+            '1 4 m 2 4 l',
+            'S'], self.writer._code)
+
+    def test_should_draw_path(self):
+        path = self.writer.beginPath()
+        path.moveTo(1, 2)
+        path.lineTo(3, 4)
+        self.writer.drawPath(path)
+        self.assertEqual(['n 1 2 m 3 4 l S'], self.writer._code)
+
+    def test_should_set_line_properties(self):
+        self.writer.setLineWidth(0.28346456)
+        self.writer.setLineCap(2)
+        self.writer.setLineJoin(1)
+        self.writer.setMiterLimit(28.3464)
+        self.writer.setDash([1, 2])
+        self.assertEqual(
+            ['0.2835 w', '2 J', '1 j', '28.3464 M', '[1 2] 0 d'],
+            self.writer._code)
+
+    def test_should_set_colors(self):
+        self.writer.setStrokeColor('#ff0000', 1.0)
+        self.writer.setFillColor('black', 1.0)
+        self.assertEqual(['1 0 0 RG', '0 0 0 rg'], self.writer._code)
+
+    def test_should_set_alpha_only_on_change(self):
+
+        self.writer.setFillColor('black', 0.5)
+        self.writer.setFillColor('black', 0.5)
+        self.writer.setStrokeColor('black', 0.5)
+
+        self.assertEqual([
+            '0 0 0 rg', '/GS1 gs',
+            '0 0 0 rg',
+            '0 0 0 RG', '/GS2 gs'], self.writer._code)
+
+    def test_should_reset_alpha_on_new_page(self):
+
+        self.writer.setFillColor('black', 0.5)
+        self.writer.showPage()
+        self.writer.setFillColor('black', 0.5)
+
+        self.assertEqual(['0 0 0 rg', '/GS1 gs'], self.writer._code)
+
+    def test_should_show_text(self):
+
+        text = self.writer.beginText(10, 20)
+        text.setFont('FreeSans', 10, 12)
+        text.textLine('abba')
+
+        self.assertEqual(
+            'BT 1 0 0 1 10 20 Tm /F1 10 Tf 12 TL <0001000200020001> Tj T* ET',
+            text.getCode())
+
+    def test_should_move_down_after_line_of_text(self):
+        text = self.writer.beginText(10, 20)
+        text.setFont('FreeSans', 10, 12)
+        text.textLine('lorem')
+        self.assertEqual(8, text.getY())
+        self.assertEqual((10, 8), text.getStartOfLine())
+
+    def test_should_emulate_word_spacing(self):
+
+        text = self.writer.beginText(10, 20)
+        text.setFont('FreeSans', 10, 12)
+        text.setWordSpace(2.5)
+        text.textLine('a b')
+
+        self.assertEqual(
+            'BT 1 0 0 1 10 20 Tm /F1 10 Tf 12 TL [<00010002> -250 <0003>] TJ T* ET',
+            text.getCode())
+
+    def test_should_not_emulate_word_spacing_without_spaces(self):
+        text = self.writer.beginText(10, 20)
+        text.setFont('FreeSans', 10, 12)
+        text.setWordSpace(2.5)
+        text.textLine('ab')
+        self.assertIn('<00010002> Tj', text.getCode())
+
+    def test_should_share_fonts_between_text_objects(self):
+        self.writer.beginText().setFont('FreeSans', 10, 12)
+        self.writer.beginText().setFont('FreeSerif', 10, 12)
+        self.writer.beginText().setFont('FreeSans', 10, 12)
+        self.assertEqual(['FreeSans', 'FreeSerif'], list(self.writer._fonts))
+
+    def test_should_write_valid_file_structure(self):
+
+        self.writer.setTitle('Zażółć')
+        self.writer.line(1, 2, 3, 4)
+        self.writer.save()
+
+        data = self.buffer.getvalue()
+
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertTrue(data.endswith(b'%%EOF\n'))
+        self.assertIn(b'/Title <FEFF005A0061017C00F301420107>', data)
+        self.assertIn(b'n 1 2 m 3 4 l S', data)
+
+        xref = int(data.rsplit(b'startxref\n', 1)[1].split(b'\n')[0])
+        self.assertTrue(data[xref:].startswith(b'xref\n0 '))
+
+        for number, offset in enumerate(re.findall(rb'(\d{10}) 00000 n', data), 1):
+            self.assertTrue(data[int(offset):].startswith(b'%d 0 obj' % number))
+
+    def test_should_compress_page_streams(self):
+
+        writer = Writer(self.buffer, A4, Compression(threads=2))
+        writer.line(1, 2, 3, 4)
+        writer.save()
+
+        data = self.buffer.getvalue()
+
+        self.assertIn(b'/Filter /FlateDecode', data)
+        self.assertNotIn(b'n 1 2 m 3 4 l S', data)
+
+
+class TestEmbeddedFont(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        register_fonts_with_unicode_glyphs()
+
+    def setUp(self):
+        self.font = EmbeddedFont('FreeSans', 'F1')
+
+    def test_should_number_glyphs_in_order_of_first_use(self):
+        self.assertEqual([1, 2, 2, 1], self.font.encode('abba'))
+        self.assertEqual([3, 1], self.font.encode('ca'))
+
+    def test_should_map_missing_glyphs_to_notdef(self):
+        self.assertEqual([1, 0, 2], self.font.encode('a\U0001F600b'))
+
+    def test_should_map_non_breaking_space_to_space(self):
+        self.assertEqual([1, 1], self.font.encode(' \xa0'))
+
+    def test_should_return_widths_by_glyph(self):
+        face = pdfmetrics.getFont('FreeSans').face
+        self.font.encode('ab')
+        self.assertEqual(
+            [face.defaultWidth, face.getCharWidth(ord('a')), face.getCharWidth(ord('b'))],
+            self.font.get_widths())
+
+    def test_should_make_cmap_with_unicode_values(self):
+        self.font.encode('aę\U00010000')
+        cmap = self.font.get_cmap()
+        self.assertIn(b'<0001> <0061>', cmap)
+        self.assertIn(b'<0002> <0119>', cmap)
+
+    def test_should_prefix_font_name_with_subset_tag(self):
+        self.font.encode('a')
+        self.assertRegex(self.font.base_font, r'^[A-Z]{6}\+FreeSans$')
+
+    def test_should_make_subset_with_glyphs_in_the_same_order(self):
+
+        self.font.encode('ba')
+
+        face = pdfmetrics.getFont('FreeSans').face
+        subset = self.font.make_subset()
+
+        self.assertTrue(subset.startswith(b'\x00\x01\x00\x00'))
+        self.assertLess(len(subset), len(face._ttf_data))
+
+
+class TestBackends(unittest.TestCase):
+    """Output of the native writer checked against reportlab's one."""
+
+    # Operators compared along with their operands
+    OPERATORS = {
+        b'w', b'J', b'j', b'M', b'd', b'rg', b'RG', b'n', b'm', b'l', b're',
+        b'S', b'f*', b'B*', b'Tm', b'T*', b'Tc'}
+
+    # Operators showing text compared without operands
+    SHOW = {b'Tj', b'TJ'}
+
+    TOKEN = re.compile(
+        rb'\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f]*>|\[[^\]]*\]|/[^\s/\[\]()<>]+|[^\s/\[\]()<>]+')
+
+    def render(self, backend):
+
+        canvas = Canvas(compression=Compression(Compression.OFF), backend=backend)
+
+        canvas.add_page()
+        canvas.stroke.line_cap = LineCap.SQUARE
+        canvas.grid([10, 50, 90], [10, 20, 30, 40])
+        canvas.font.family = FontFamily.SANS
+        canvas.font.weight = FontWeight.BOLD
+        canvas.text('Zażółć gęślą jaźń', 10, 5)
+        canvas.font.weight = FontWeight.NORMAL
+        canvas.text('lorem ipsum dolor sit amet', 10, 10, 40, 10,
+                    HAlign.CENTER, VAlign.MIDDLE, word_wrap=True)
+        canvas.fill.alpha = 0.5
+        canvas.fill.color = '#ff0000'
+        canvas.text('TAK', 50, 10, 40, 10, HAlign.RIGHT, VAlign.BOTTOM)
+        canvas.rect(10, 50, 80, 20, fill=True)
+
+        canvas.add_page()
+        canvas.stroke.line_dash = '-- '
+        canvas.polyline(10, 10, 50, 50, 90, 10)
+        canvas.font.char_space_pts = 1.5
+        canvas.text('Strona 2', 0, 280, canvas.width, halign=HAlign.CENTER)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'document.pdf')
+            canvas.save(path)
+            with open(path, 'rb') as file_object:
+                return file_object.read()
+
+    def trace(self, data):
+        """Return a list of operators with rounded operands in all pages."""
+
+        operators = []
+
+        for number in re.findall(rb'/Contents (\d+) 0 R', data):
+            match = re.search(
+                rb'\n%s 0 obj\s*<<.*?>>\s*stream\r?\n(.*?)endstream' % number,
+                data, re.S)
+            operands = []
+            for token in self.TOKEN.findall(match.group(1)):
+                if token in self.OPERATORS:
+                    operators.append((token, tuple(operands)))
+                elif token in self.SHOW:
+                    operators.append((b'show', ()))
+                elif token[:1] in b'[(<' or re.match(rb'^[a-zA-Z\'"*]+$', token):
+                    pass
+                elif not token.startswith(b'/'):
+                    operands.append(round(float(token), 2))
+                    continue
+                operands = []
+
+        return operators
+
+    def test_should_draw_the_same_as_reportlab(self):
+        expected = self.trace(self.render(Backend.REPORTLAB))
+        actual = self.trace(self.render(Backend.NATIVE))
+        self.assertEqual(expected, actual)
+
+    def test_should_embed_fonts(self):
+        data = self.render(Backend.NATIVE)
+        self.assertEqual(2, len(re.findall(rb'/Subtype /Type0', data)))
+        self.assertEqual(2, len(re.findall(rb'/FontFile2', data)))
@@ -0,0 +1,131 @@
+import unittest
+from unittest import mock
+import io
+import csv
+import json
+import zipfile
+import datetime
+
+from ogre.report.export import FIELDS, get_rows, export, write_csv, write_json, write_xlsx, _xlsx_row
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        bank1 = mock.Mock(code='10100000', prefix='101')
+        bank1.name = 'NBP'
+        bank2 = mock.Mock(code='10200000', prefix='102')
+        bank2.name = 'Bank A & B'
+        debtor1 = mock.Mock(identity=mock.Mock(value='2345678901', raw_value='02345678901'), is_person=True)
+        debtor1.identity.name = 'PESEL'
+        debtor1.name = 'Jan Kowalski'
+        debtor2 = mock.Mock(identity=mock.Mock(value='1234567890', raw_value='1234567890'), is_person=False)
+        debtor2.identity.name = 'NIP'
+        debtor2.name = 'Firma <sp. z o.o.>'
+        self.model = mock.Mock(sorted_debtors=[debtor2, debtor1], replies={
+            debtor1: {
+                bank2: mock.Mock(date=datetime.datetime(2016, 5, 1, 12, 30), has_account=True, file_path='/a.xml'),
+                bank1: mock.Mock(date='unknown', has_account=False, file_path='/b.xml'),
+            },
+            debtor2: {
+                bank1: mock.Mock(date=datetime.datetime(2016, 5, 2), has_account=False, file_path='/c.xml'),
+            }
+        })
+
+    def test_should_yield_rows_in_sorted_debtors_and_bank_name_order(self):
+        rows = list(get_rows(self.model))
+        self.assertListEqual([
+            ('NIP', '1234567890', 'Firma <sp. z o.o.>', '10100000', 'NBP', '101', '2016-05-02T00:00:00', False, '/c.xml'),
+            ('PESEL', '02345678901', 'Jan Kowalski', '10200000', 'Bank A & B', '102', '2016-05-01T12:30:00', True, '/a.xml'),
+            ('PESEL', '02345678901', 'Jan Kowalski', '10100000', 'NBP', '101', 'unknown', False, '/b.xml'),
+        ], rows)
+
+    def test_should_return_generator(self):
+        rows = get_rows(self.model)
+        self.assertIs(rows, iter(rows))
+
+    def test_should_write_csv_with_header(self):
+        file_object = io.StringIO(newline='')
+        write_csv(get_rows(self.model), file_object)
+        lines = list(csv.reader(io.StringIO(file_object.getvalue(), newline='')))
+        self.assertEqual(list(FIELDS), lines[0])
+        self.assertEqual(4, len(lines))
+        self.assertEqual('true', lines[2][7])
+        self.assertEqual('false', lines[3][7])
+
+    def test_should_write_json_array_of_objects(self):
+        file_object = io.StringIO()
+        write_json(get_rows(self.model), file_object)
+        objects = json.loads(file_object.getvalue())
+        self.assertEqual(3, len(objects))
+        self.assertSetEqual(set(FIELDS), set(objects[0]))
+        self.assertIs(True, objects[1]['has_account'])
+        self.assertEqual('Bank A & B', objects[1]['bank_name'])
+
+    def test_should_write_empty_json_array(self):
+        file_object = io.StringIO()
+        write_json(iter([]), file_object)
+        self.assertListEqual([], json.loads(file_object.getvalue()))
+
+    def test_should_write_xlsx_workbook(self):
+        file_object = io.BytesIO()
+        write_xlsx(get_rows(self.model), file_object)
+        with zipfile.ZipFile(file_object) as archive:
+            self.assertIn('[Content_Types].xml', archive.namelist())
+            self.assertIn('xl/workbook.xml', archive.namelist())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(4, sheet.count('<row>'))
+        self.assertIn('Firma &lt;sp. z o.o.&gt;', sheet)
+        self.assertIn('Bank A &amp; B', sheet)
+        self.assertIn('<c t="b"><v>1</v></c>', sheet)
+
+    def test_should_remove_control_characters_illegal_in_xml(self):
+        sheet = _xlsx_row(['a\x00b\x0bc\x1fd\te\nf']).decode('utf-8')
+        self.assertIn('>abcd\te\nf<', sheet)
+
+    @mock.patch('ogre.report.export.MAX_XLSX_ROWS', 3)
+    def test_should_split_rows_into_worksheets_at_row_limit(self):
+        file_object = io.BytesIO()
+        write_xlsx(iter([('a',), ('b',), ('c',), ('d',), ('e',)]), file_object)
+        with zipfile.ZipFile(file_object) as archive:
+            sheets = [archive.read('xl/worksheets/sheet%d.xml' % i).decode('utf-8') for i in (1, 2, 3)]
+            self.assertNotIn('xl/worksheets/sheet4.xml', archive.namelist())
+            workbook = archive.read('xl/workbook.xml').decode('utf-8')
+            content_types = archive.read('[Content_Types].xml').decode('utf-8')
+        self.assertListEqual([3, 3, 2], [x.count('<row>') for x in sheets])
+        self.assertTrue(all('identity_name' in x for x in sheets))
+        self.assertIn('>e<', sheets[2])
+        self.assertIn('<sheet name="Ognivo 3" sheetId="3" r:id="rId3"/>', workbook)
+        self.assertIn('/xl/worksheets/sheet3.xml', content_types)
+
+    @mock.patch('ogre.report.export.MAX_XLSX_ROWS', 3)
+    def test_should_not_add_empty_worksheet_when_rows_fill_the_last_one(self):
+        file_object = io.BytesIO()
+        write_xlsx(iter([('a',), ('b',), ('c',), ('d',)]), file_object)
+        with zipfile.ZipFile(file_object) as archive:
+            self.assertNotIn('xl/worksheets/sheet3.xml', archive.namelist())
+
+    def test_should_write_worksheet_in_zip64_format(self):
+        file_object = io.BytesIO()
+        write_xlsx(get_rows(self.model), file_object)
+        with zipfile.ZipFile(file_object) as archive:
+            info = archive.getinfo('xl/worksheets/sheet1.xml')
+        self.assertGreaterEqual(info.extract_version, zipfile.ZIP64_VERSION)
+
+    @mock.patch('os.path.getsize', return_value=0)
+    @mock.patch('ogre.report.export.logger')
+    @mock.patch('ogre.report.export.open', create=True)
+    def test_should_open_file_in_binary_mode_for_xlsx(self, mock_open, mock_logger, mock_getsize):
+        mock_open.return_value = io.BytesIO()
+        with mock.patch.dict('ogre.report.export.WRITERS', xlsx=mock.Mock()):
+            export(self.model, '/path/to/file.xlsx', 'xlsx')
+        mock_open.assert_called_once_with('/path/to/file.xlsx', 'wb')
+
+    @mock.patch('os.path.getsize', return_value=0)
+    @mock.patch('ogre.report.export.logger')
+    @mock.patch('ogre.report.export.open', create=True)
+    def test_should_open_file_in_text_mode_for_csv(self, mock_open, mock_logger, mock_getsize):
+        mock_open.return_value = io.StringIO()
+        with mock.patch.dict('ogre.report.export.WRITERS', csv=mock.Mock()):
+            export(self.model, '/path/to/file.csv', 'csv')
+        mock_open.assert_called_once_with('/path/to/file.csv', 'w', encoding='utf-8', newline='')
@@ -4,7 +4,9 @@ import os
 
 import ogre.config
 
-from ogre.report.report import Report
+from ogre.pdf import Backend
+from ogre.pdf import Compression
+from ogre.report.report import Report, get_backend, get_compression
 from tests.commons import FakeFileObject
 
 
@@ -26,8 +28,9 @@ class TestReport(unittest.TestCase):
             mock.call.info('Please wait while generating report...'),
             mock.call.error('There are no pages to be rendered')])
 
+    @mock.patch('os.path.getsize', return_value=0)
     @mock.patch('ogre.report.report.logger')
-    def test_should_return_true_on_successful_save(self, mock_logger):
+    def test_should_return_true_on_successful_save(self, mock_logger, mock_getsize):
 
         report = Report(self.mock_model)
         report._rendered = True
@@ -63,3 +66,56 @@ keywords=dolor
         self.assertEqual('Ja\u017a\u0144', report._document.metadata.subject)
         self.assertEqual('Odpowiedzi z 3 bank\xf3w dla 1 zobowi\u0105zanego.', report._document.metadata.title)
         self.assertEqual('dolor', report._document.metadata.keywords)
+
+    @mock.patch('ogre.config.resource_stream')
+    def test_should_use_default_compression_when_not_configured(self, mock_resource_stream):
+
+        ogre.config._INSTANCE = None
+        mock_resource_stream.return_value = FakeFileObject(b'')
+
+        compression = get_compression()
+
+        self.assertEqual(Compression.DEFAULT, compression.level)
+        self.assertEqual(0, compression.min_size)
+
+    @mock.patch('ogre.config.resource_stream')
+    def test_should_read_compression_from_configuration(self, mock_resource_stream):
+
+        ogre.config._INSTANCE = None
+        mock_resource_stream.return_value = FakeFileObject(b'''[pdf]
+compression=9
+compression_threads=3
+compression_min_size=512
+''')
+
+        compression = get_compression()
+
+        self.assertEqual(9, compression.level)
+        self.assertEqual(3, compression.threads)
+        self.assertEqual(512, compression.min_size)
+
+    @mock.patch('ogre.config.resource_stream')
+    def test_should_turn_compression_off(self, mock_resource_stream):
+
+        ogre.config._INSTANCE = None
+        mock_resource_stream.return_value = FakeFileObject(b'''[pdf]
+compression=off
+''')
+
+        self.assertFalse(get_compression().enabled)
+
+    @mock.patch('ogre.config.resource_stream')
+    def test_should_use_reportlab_backend_by_default(self, mock_resource_stream):
+        ogre.config._INSTANCE = None
+        mock_resource_stream.return_value = FakeFileObject(b'')
+        self.assertEqual(Backend.REPORTLAB, get_backend())
+
+    @mock.patch('ogre.config.resource_stream')
+    def test_should_read_backend_from_configuration(self, mock_resource_stream):
+
+        ogre.config._INSTANCE = None
+        mock_resource_stream.return_value = FakeFileObject(b'''[pdf]
+backend=native
+''')
+
+        self.assertEqual(Backend.NATIVE, get_backend())
@@ -0,0 +1,95 @@
+import unittest
+from unittest import mock
+import os
+import concurrent.futures
+import datetime
+import tempfile
+
+from ogre.metrics import Registry
+from ogre.ognivo.model import Debtor, Bank, Reply
+from ogre.ognivo.parser import NaturalPerson, LegalEntity, Id
+from ogre.report.split import save_split, get_filename, _save_debtor
+
+
+class TestSplit(unittest.TestCase):
+
+    def setUp(self):
+
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        bank = Bank('10200000')
+        self.jan = Debtor(NaturalPerson('Jan', 'Kowalski', Id('PESEL', '12345678900'), False))
+        self.firma = Debtor(LegalEntity('Firma Sp. z O.O.', Id('NIP', '1234567890'), True))
+
+        self.model = mock.Mock(
+            sorted_debtors=[self.firma, self.jan],
+            replies={
+                self.jan: {bank: Reply(bank, datetime.datetime(2016, 5, 1), False, '/a.xml')},
+                self.firma: {bank: Reply(bank, datetime.datetime(2016, 5, 2), True, '/b.xml')}
+            })
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_should_name_file_after_identity(self):
+        self.assertEqual('PESEL_12345678900.pdf', get_filename(self.jan))
+
+    def test_should_replace_unsafe_characters_in_file_name(self):
+        debtor = mock.Mock()
+        debtor.identity.name = 'NIP'
+        debtor.identity.value = '../123 456'
+        self.assertEqual('NIP____123_456.pdf', get_filename(debtor))
+
+    @mock.patch('ogre.report.split.logger')
+    def test_should_return_false_and_log_error_when_no_replies(self, mock_logger):
+        self.assertFalse(save_split(mock.Mock(replies={}), self.temp_dir.name))
+        mock_logger.error.assert_called_once_with('There are no pages to be rendered')
+
+    def test_should_save_document_for_a_single_debtor(self):
+        path = os.path.join(self.temp_dir.name, 'file.pdf')
+        _save_debtor(path, self.jan, self.model.replies[self.jan])
+        with open(path, 'rb') as file_object:
+            self.assertTrue(file_object.read().startswith(b'%PDF'))
+
+    def test_should_return_number_of_pages_and_bytes(self):
+        path = os.path.join(self.temp_dir.name, 'file.pdf')
+        num_pages, num_bytes = _save_debtor(path, self.jan, self.model.replies[self.jan])
+        self.assertEqual(2, num_pages)
+        self.assertEqual(os.path.getsize(path), num_bytes)
+
+    @mock.patch('ogre.report.split.logger')
+    def test_should_save_one_file_per_debtor(self, mock_logger):
+
+        directory = os.path.join(self.temp_dir.name, 'output')
+
+        self.assertTrue(save_split(self.model, directory, max_workers=2))
+
+        self.assertListEqual(
+            ['NIP_1234567890.pdf', 'PESEL_12345678900.pdf'],
+            sorted(os.listdir(directory)))
+
+    @mock.patch('ogre.report.split.metrics', return_value=Registry())
+    @mock.patch('ogre.report.split.logger')
+    def test_should_count_pages_and_bytes_of_all_files(self, mock_logger, mock_metrics):
+
+        directory = os.path.join(self.temp_dir.name, 'output')
+
+        save_split(self.model, directory, max_workers=2)
+
+        registry = mock_metrics.return_value
+        self.assertEqual(4, registry['pages'])
+        self.assertEqual(sum(os.path.getsize(os.path.join(directory, x))
+                             for x in os.listdir(directory)),
+                         registry['bytes.written'])
+
+    @mock.patch('ogre.report.split.logger')
+    def test_should_spawn_rather_than_fork_workers(self, mock_logger):
+
+        directory = os.path.join(self.temp_dir.name, 'output')
+
+        with mock.patch('concurrent.futures.ProcessPoolExecutor',
+                        wraps=concurrent.futures.ProcessPoolExecutor) as mock_executor:
+            save_split(self.model, directory, max_workers=1)
+
+        context = mock_executor.call_args[1]['mp_context']
+        self.assertEqual('spawn', context.get_start_method())
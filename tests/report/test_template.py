@@ -9,15 +9,34 @@ import ogre.config
 
 from ogre.pdf.canvas import Canvas
 from ogre.pdf import HAlign, VAlign
-from ogre.config import Config
-from ogre.report.template import Template, BlankPage, FrontSide, RearSide, Watermark, chunked
+from ogre.config import Config, Snapshot
+from ogre.report.template import Template, BlankPage, FrontSide, RearSide, Watermark, chunked, prune_fragments
 
 
 Chunk = collections.namedtuple('Chunk', 'num count data')
 
 
+def make_settings(**kwargs):
+    return Snapshot(**dict({
+        'show_time': False,
+        'show_rear': False,
+        'cache_fragments': False,
+        'watermark': '',
+        'backend': 'reportlab',
+        'template': (),
+    }, **kwargs))
+
+
 class TestTemplate(unittest.TestCase):
 
+    def setUp(self):
+        self.patcher = mock.patch('ogre.report.template.cache')
+        self.mock_cache = self.patcher.start()
+        self.mock_cache.load.return_value = None
+
+    def tearDown(self):
+        self.patcher.stop()
+
     @mock.patch('ogre.report.template.Watermark')
     @mock.patch('ogre.report.template.RearSide')
     @mock.patch('ogre.report.template.FrontSide')
@@ -30,61 +49,146 @@ class TestTemplate(unittest.TestCase):
         self.assertTrue(mock_front.return_value.render.called)
         self.assertFalse(mock_rear.return_value.render.called)
 
-    @mock.patch('ogre.report.template.config')
     @mock.patch('ogre.report.template.RearSide')
     @mock.patch('ogre.report.template.FrontSide')
-    def test_should_render_front_and_back_side(self, mock_front, mock_rear, mock_config):
-
-        mock_config.return_value.get = mock.Mock(return_value='true')
+    def test_should_render_front_and_back_side(self, mock_front, mock_rear):
 
-        template = Template(Canvas())
+        template = Template(Canvas(), make_settings(show_rear=True))
 
         template.render(mock.Mock(), {mock.Mock(): mock.Mock()})
 
         mock_front.return_value.render.assert_called_once_with(mock.ANY, mock.ANY, 1)
         mock_rear.return_value.render.assert_called_once()
 
-    @mock.patch('ogre.report.template.config')
     @mock.patch('ogre.report.template.BlankPage')
     @mock.patch('ogre.report.template.RearSide')
     @mock.patch('ogre.report.template.FrontSide')
-    def test_should_render_blank_page_when_odd_number_of_chunks(self, mock_front, mock_rear, mock_blank_page, mock_config):
+    def test_should_render_blank_page_when_odd_number_of_chunks(self, mock_front, mock_rear, mock_blank_page):
 
-        mock_config.return_value.get = mock.Mock(return_value='false')
-        template = Template(Canvas())
+        template = Template(Canvas(), make_settings())
 
         template.render(mock.Mock(), {mock.Mock(): mock.Mock()})
 
         mock_blank_page.return_value.render.assert_called_once()
 
-    @mock.patch('ogre.report.template.config')
     @mock.patch('ogre.report.template.BlankPage')
     @mock.patch('ogre.report.template.RearSide')
     @mock.patch('ogre.report.template.FrontSide')
     @mock.patch('ogre.report.template.chunked')
-    def test_should_not_render_blank_page_when_even_number_of_chunks(self, mock_chunked, mock_front, mock_rear, mock_blank_page, mock_config):
+    def test_should_not_render_blank_page_when_even_number_of_chunks(self, mock_chunked, mock_front, mock_rear, mock_blank_page):
 
         mock_chunked.return_value = ['one', 'two']
-        mock_config.return_value.get = mock.Mock(return_value='false')
-        template = Template(Canvas())
+        template = Template(Canvas(), make_settings())
 
         template.render(mock.Mock(), {mock.Mock(): mock.Mock()})
 
         mock_blank_page.return_value.render.assert_not_called()
 
-    @mock.patch('ogre.report.template.config')
     @mock.patch('ogre.report.template.BlankPage')
     @mock.patch('ogre.report.template.RearSide')
     @mock.patch('ogre.report.template.FrontSide')
-    def test_should_not_render_blank_page_in_rear_page_mode(self, mock_front, mock_rear, mock_blank_page, mock_config):
+    def test_should_not_render_blank_page_in_rear_page_mode(self, mock_front, mock_rear, mock_blank_page):
 
-        mock_config.return_value.get = mock.Mock(return_value='true')
-        template = Template(Canvas())
+        template = Template(Canvas(), make_settings(show_rear=True))
 
         template.render(mock.Mock(), {mock.Mock(): mock.Mock()})
 
         mock_blank_page.return_value.render.assert_not_called()
 
+    @mock.patch('ogre.report.template.FrontSide')
+    def test_should_not_cache_fragments_by_default(self, mock_front):
+
+        template = Template(Canvas())
+
+        template.render(mock.Mock(), {mock.Mock(): mock.Mock()})
+
+        self.mock_cache.load.assert_not_called()
+        self.mock_cache.store.assert_not_called()
+
+    @mock.patch('ogre.report.template.RearSide')
+    @mock.patch('ogre.report.template.FrontSide')
+    def test_should_record_and_cache_fragments_on_cache_miss(self, mock_front, mock_rear):
+
+        mock_canvas = mock.Mock()
+        mock_canvas.stop_recording.return_value = [['fragment']]
+
+        Template(mock_canvas, make_settings(show_rear=True, cache_fragments=True)).render(mock.Mock(), {mock.Mock(): mock.Mock()})
+
+        self.assertEqual([
+            mock.call.start_recording(),
+            mock.call.stop_recording()],
+            mock_canvas.mock_calls)
+        mock_front.return_value.render.assert_called_once_with(mock.ANY, mock.ANY, 1)
+        self.mock_cache.store.assert_called_once_with(
+            'fragments', self.mock_cache.get_key.return_value, [['fragment']], compress=True)
+
+    @mock.patch('ogre.report.template.Footer')
+    @mock.patch('ogre.report.template.FrontSide')
+    def test_should_draw_cached_fragments_with_page_numbers(self, mock_front, mock_footer):
+
+        self.mock_cache.load.return_value = [['foo'], ['bar']]
+        mock_canvas = mock.Mock()
+
+        template = Template(mock_canvas, make_settings(cache_fragments=True))
+        template.render(mock.Mock(), {mock.Mock(): mock.Mock()})
+        template.render(mock.Mock(), {mock.Mock(): mock.Mock()})
+
+        mock_front.return_value.render.assert_not_called()
+        self.mock_cache.store.assert_not_called()
+        self.assertEqual(4, mock_canvas.add_page.call_count)
+        mock_canvas.draw_fragment.assert_has_calls([
+            mock.call(['foo']), mock.call(['bar']),
+            mock.call(['foo']), mock.call(['bar'])])
+        mock_footer.return_value.render.assert_has_calls([
+            mock.call(mock_canvas, 1), mock.call(mock_canvas, 2),
+            mock.call(mock_canvas, 3), mock.call(mock_canvas, 4)])
+
+    def test_should_key_fragments_by_debtor_and_replies(self):
+
+        template = Template(mock.Mock(), make_settings(
+            cache_fragments=True, template=(('show_time', 'true'),)))
+
+        def make_key(name, has_account):
+            debtor = mock.Mock()
+            debtor.name = name
+            debtor.identity.name = 'PESEL'
+            debtor.identity.value = '12345678901'
+            bank = mock.Mock(code='10100000', prefix='101')
+            bank.name = 'NBP'
+            reply = mock.Mock(date_string='2016-05-01', time_string='', has_account=has_account)
+            template._get_key(debtor, {bank: reply})
+            return self.mock_cache.get_key.call_args[0]
+
+        self.assertEqual(make_key('Jan', True), make_key('Jan', True))
+        self.assertNotEqual(make_key('Jan', True), make_key('Jan', False))
+        self.assertNotEqual(make_key('Jan', True), make_key('Janina', True))
+
+    def test_should_not_key_fragments_by_cache_settings(self):
+
+        debtor = mock.Mock()
+
+        def make_key(template_settings):
+            template = Template(mock.Mock(), make_settings(
+                cache_fragments=True, template=template_settings))
+            template._get_key(debtor, {})
+            return self.mock_cache.get_key.call_args[0]
+
+        self.assertEqual(make_key((('cache_max_age', '30'),)),
+                         make_key((('cache_max_age', '7'),)))
+
+    @mock.patch('ogre.report.template.config')
+    def test_should_prune_fragments_older_than_configured_days(self, mock_config):
+        mock_config.return_value.get.return_value = '2'
+        self.mock_cache.prune.return_value = 5
+        self.assertEqual(5, prune_fragments())
+        self.mock_cache.prune.assert_called_once_with('fragments', 2 * 24 * 60 * 60)
+
+    @mock.patch('ogre.report.template.config')
+    def test_should_keep_fragments_without_configured_age(self, mock_config):
+        mock_config.return_value.get.return_value = ''
+        self.assertEqual(0, prune_fragments())
+        self.mock_cache.prune.assert_not_called()
+
 
 class TestBlankPage(unittest.TestCase):
 
@@ -162,7 +266,6 @@ class TestFrontSide(unittest.TestCase):
         # body
         mock_canvas.return_value.assert_has_calls([
             mock.call.setLineCap(2),
-            mock.call.setLineWidth(0.2834645669291339),
             mock.call.grid([49.60629921259835, 162.9921259842519, 233.85826771653538, 318.89763779527556, 389.763779527559, 474.8031496062992, 545.6692913385826], [758.2677165354331, 727.0866141732284, 695.9055118110236, 664.7244094488188, 633.5433070866142, 602.3622047244095, 571.1811023622047, 540.0, 508.81889763779526, 477.6377952755905, 446.4566929133858, 415.27559055118104, 384.09448818897636, 352.9133858267716, 321.7322834645669, 290.55118110236214, 259.37007874015745, 228.1889763779527, 197.00787401574797, 165.82677165354323, 134.64566929133852, 103.46456692913371, 72.28346456692898, 41.10236220472425])])
 
         # header
@@ -197,31 +300,16 @@ class TestFrontSide(unittest.TestCase):
 
         FrontSide(Canvas(), mock.Mock()).render(self.mock_debtor, Chunk(1, 1, {}), 0)
 
-        mock_canvas.return_value.beginText.return_value.assert_has_calls([
-
-            mock.call.setFont('FreeSansBold', 12.755905511811026, 15.30708661417323),
-            mock.call.setTextRenderMode(0),
-            mock.call.setCharSpace(0.0),
-            mock.call.setWordSpace(0.0),
-            mock.call.setRise(0.0),
-            mock.call.textLine('Ognivo: '),
+        text_object = mock_canvas.return_value.beginText.return_value
 
-            mock.call.setFont('FreeSans', 12.755905511811026, 15.30708661417323),
-            mock.call.setTextRenderMode(0),
-            mock.call.setCharSpace(0.0),
-            mock.call.setWordSpace(0.0),
-            mock.call.setRise(0.0),
-            mock.call.textLine('Jan Kowalski'),
+        text_object.setFont.assert_has_calls([
+            mock.call('FreeSansBold', 12.755905511811026, 15.30708661417323),
+            mock.call('FreeSans', 12.755905511811026, 15.30708661417323)])
 
-            mock.call.setFont('FreeSans', 12.755905511811026, 15.30708661417323),
-            mock.call.setTextRenderMode(0),
-            mock.call.setCharSpace(0.0),
-            mock.call.setWordSpace(0.0),
-            mock.call.setRise(0.0),
-            mock.call.getY(),
-            mock.call.setTextOrigin(mock.ANY, mock.ANY),
-            mock.call.textLine('PESEL # 12345678901')
-        ])
+        text_object.textLine.assert_has_calls([
+            mock.call('Ognivo: '),
+            mock.call('Jan Kowalski'),
+            mock.call('PESEL # 12345678901')])
 
     @mock.patch('reportlab.pdfgen.canvas.Canvas')
     @mock.patch('ogre.report.template.Table')
@@ -270,37 +358,18 @@ class TestFrontSide(unittest.TestCase):
             mock.call.cell(5, 1, 'TAK', HAlign.CENTER, VAlign.MIDDLE)
         ])
 
-    @mock.patch('ogre.report.template.config')
-    def test_should_not_show_time_by_default(self, mock_config):
-        mock_config.return_value.get = mock.Mock(return_value=None)
-        front_side = FrontSide(mock.Mock(), mock.Mock())
-        self.assertFalse(front_side._should_show_time())
-
-    @mock.patch('ogre.report.template.config')
-    def test_should_not_show_time_explicit(self, mock_config):
-        mock_config.return_value.get = mock.Mock(return_value='fAlSe')
-        front_side = FrontSide(mock.Mock(), mock.Mock())
-        self.assertFalse(front_side._should_show_time())
-
-    @mock.patch('ogre.report.template.config')
-    def test_should_show_time(self, mock_config):
-        mock_config.return_value.get = mock.Mock(return_value='tRUe')
-        front_side = FrontSide(mock.Mock(), mock.Mock())
-        self.assertTrue(front_side._should_show_time())
-
-    @mock.patch('reportlab.pdfgen.canvas.Canvas')
-    def test_should_shorten_long_name_and_add_ellipsis(self, mock_canvas):
+    def test_should_not_show_time_by_default(self):
+        self.assertFalse(FrontSide(mock.Mock(), mock.Mock())._show_time)
 
-        it = iter(range(900, 300, -7))
+    @mock.patch('ogre.report.template.FrontSide')
+    def test_should_pass_show_time_from_settings(self, mock_front):
+        Template(Canvas(), make_settings(show_time=True)).render(mock.Mock(), {mock.Mock(): mock.Mock()})
+        mock_front.assert_called_once_with(mock.ANY, mock.ANY, True)
 
-        def stringWidth(text, *args):
-            if text.startswith('PESEL'):
-                return 134
-            elif text.startswith('Ognivo'):
-                return next(it)
-            return 0
+    @mock.patch('ogre.pdf.canvas.Canvas.text')
+    def test_should_shorten_long_name_and_add_ellipsis(self, mock_text):
 
-        mock_canvas.return_value.stringWidth.side_effect = stringWidth
+        mock_text.return_value = 0
 
         mock_debtor = mock.Mock()
         mock_debtor.name = 'lorem ipsum dolor sit amet ' * 5
@@ -309,9 +378,16 @@ class TestFrontSide(unittest.TestCase):
 
         FrontSide(Canvas(), mock.Mock()).render(mock_debtor, Chunk(1, 1, {}), 0)
 
-        mock_canvas.return_value.assert_has_calls([
-            mock.call.beginText().textLine('lorem ipsum dolor sit amet lorem ipsum dolor sit amet lore\u2026')
-        ], any_order=True)
+        mock_text.assert_any_call('lorem ipsum dolor sit amet lorem ipsum dolor sit\u2026', 0, mock.ANY)
+
+    @mock.patch('ogre.pdf.canvas.Canvas.text')
+    def test_should_not_shorten_name_that_fits(self, mock_text):
+
+        mock_text.return_value = 0
+
+        FrontSide(Canvas(), mock.Mock()).render(self.mock_debtor, Chunk(1, 1, {}), 0)
+
+        mock_text.assert_any_call('Jan Kowalski', 0, mock.ANY)
 
     @mock.patch('reportlab.pdfgen.canvas.Canvas')
     def test_should_call_chunk_asdict(self, mock_canvas):
@@ -358,29 +434,7 @@ class TestRearSide(unittest.TestCase):
             mock.call.setMiterLimit(28.34645669291339),
             mock.call.setDash([]),
             mock.call.setFillColor('#000000', 1.0),
-            mock.call.setStrokeColor('#000000', 1.0),
-            mock.call.setLineWidth(0.2834645669291339),
-            mock.call.setLineCap(0),
-            mock.call.setLineJoin(0),
-            mock.call.setMiterLimit(28.34645669291339),
-            mock.call.setDash([]),
-            mock.call.setStrokeColor('#000000', 1.0),
-            mock.call.setLineWidth(0.2834645669291339),
-            mock.call.setLineCap(0),
-            mock.call.setLineJoin(0),
-            mock.call.setMiterLimit(28.34645669291339),
-            mock.call.setDash([]),
-            mock.call.setFillColor('#000000', 1.0),
-            mock.call.setFillColor('#000000', 1.0),
-            mock.call.setStrokeColor('#000000', 1.0),
-            mock.call.setLineWidth(0.2834645669291339),
-            mock.call.setLineCap(0),
-            mock.call.setLineJoin(0),
-            mock.call.setMiterLimit(28.34645669291339),
-            mock.call.setDash([]),
-            mock.call.setFillColor('#000000', 1.0),
             mock.call.setLineCap(2),
-            mock.call.setLineWidth(0.2834645669291339),
             mock.call.grid([49.60629921259835, 162.9921259842519, 233.85826771653538, 318.89763779527556, 389.763779527559, 474.8031496062992, 545.6692913385826], [758.2677165354331, 727.0866141732284, 695.9055118110236, 664.7244094488188, 633.5433070866142, 602.3622047244095, 571.1811023622047, 540.0, 508.81889763779526, 477.6377952755905, 446.4566929133858, 415.27559055118104, 384.09448818897636, 352.9133858267716, 321.7322834645669, 290.55118110236214, 259.37007874015745, 228.1889763779527, 197.00787401574797, 165.82677165354323, 134.64566929133852, 103.46456692913371, 72.28346456692898, 41.10236220472425])
         ])
 
@@ -402,7 +456,6 @@ class TestRearSide(unittest.TestCase):
         # body
         mock_canvas.return_value.assert_has_calls([
             mock.call.setLineCap(2),
-            mock.call.setLineWidth(0.2834645669291339),
             mock.call.grid([49.60629921259835, 162.9921259842519, 233.85826771653538, 318.89763779527556, 389.763779527559, 474.8031496062992, 545.6692913385826], [758.2677165354331, 727.0866141732284, 695.9055118110236, 664.7244094488188, 633.5433070866142, 602.3622047244095, 571.1811023622047, 540.0, 508.81889763779526, 477.6377952755905, 446.4566929133858, 415.27559055118104, 384.09448818897636, 352.9133858267716, 321.7322834645669, 290.55118110236214, 259.37007874015745, 228.1889763779527, 197.00787401574797, 165.82677165354323, 134.64566929133852, 103.46456692913371, 72.28346456692898, 41.10236220472425])])
 
         # header
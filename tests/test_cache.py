@@ -0,0 +1,87 @@
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from ogre import cache
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.patcher = mock.patch.dict(os.environ, {cache.ENV_VARIABLE: self.temp_dir.name})
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.temp_dir.cleanup()
+
+    def test_should_use_directory_from_environment_variable(self):
+        self.assertEqual(self.temp_dir.name, cache.get_cache_dir())
+
+    @mock.patch('sys.platform', 'linux')
+    def test_should_use_xdg_cache_home_on_linux(self):
+        with mock.patch.dict(os.environ, {cache.ENV_VARIABLE: '', 'XDG_CACHE_HOME': '/var/cache'}):
+            self.assertEqual(os.path.join('/var/cache', 'ogre'), cache.get_cache_dir())
+
+    def test_should_return_same_key_for_same_parts(self):
+        self.assertEqual(cache.get_key('foo', b'bar'), cache.get_key('foo', b'bar'))
+
+    def test_should_return_different_key_for_different_parts(self):
+        self.assertNotEqual(cache.get_key('foo', 'bar'), cache.get_key('foob', 'ar'))
+
+    def test_should_return_none_on_missing_entry(self):
+        self.assertIsNone(cache.load('name', 'key'))
+
+    def test_should_store_and_load_object(self):
+        self.assertTrue(cache.store('name', 'key', {'zażółć': [1, 2, 3]}))
+        self.assertEqual({'zażółć': [1, 2, 3]}, cache.load('name', 'key'))
+
+    def test_should_store_and_load_compressed_object(self):
+        self.assertTrue(cache.store('name', 'key', ['zażółć'] * 1000, compress=True))
+        self.assertLess(os.path.getsize(os.path.join(self.temp_dir.name, 'name-key.pickle')), 1000)
+        self.assertEqual(['zażółć'] * 1000, cache.load('name', 'key'))
+
+    def test_should_ignore_corrupted_entry(self):
+        with open(os.path.join(self.temp_dir.name, 'name-key.pickle'), 'wb') as file_object:
+            file_object.write(b'corrupted')
+        self.assertIsNone(cache.load('name', 'key'))
+
+    def test_should_not_leave_partial_entry_on_failure(self):
+
+        class BrokenPickler(pickle.Pickler):
+            def dump(self, obj):
+                raise pickle.PicklingError('broken')
+
+        self.assertFalse(cache.store('name', 'key', object(), BrokenPickler))
+        self.assertEqual([], os.listdir(self.temp_dir.name))
+
+    def test_should_not_fail_when_directory_is_not_writable(self):
+        with mock.patch('os.makedirs', side_effect=PermissionError):
+            self.assertFalse(cache.store('name', 'key', 'value'))
+
+    def test_should_renew_entry_when_loaded(self):
+        cache.store('name', 'key', 'value')
+        path = cache._get_path('name', 'key')
+        os.utime(path, (0, 0))
+        cache.load('name', 'key')
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    def test_should_prune_entries_unused_for_longer_than_max_age(self):
+        for key in ('old', 'new'):
+            cache.store('name', key, 'value')
+        cache.store('other', 'old', 'value')
+        for name in ('name', 'other'):
+            os.utime(cache._get_path(name, 'old'), (0, 0))
+
+        self.assertEqual(1, cache.prune('name', 3600))
+
+        self.assertIsNone(cache.load('name', 'old'))
+        self.assertEqual('value', cache.load('name', 'new'))
+        self.assertEqual('value', cache.load('other', 'old'))
+
+    def test_should_not_prune_missing_directory(self):
+        with mock.patch.dict(os.environ, {cache.ENV_VARIABLE: os.path.join(self.temp_dir.name, 'missing')}):
+            self.assertEqual(0, cache.prune('name', 0))
@@ -1,11 +1,16 @@
+import os
+import tempfile
+import threading
 import unittest
 from unittest import mock
 
 import collections
 
+from ogre import cache
+
 import ogre.config
 
-from ogre.config import Config, config, _load_from_file, _load_from_resource
+from ogre.config import Config, config, parse_size, _load_from_file, _load_from_resource
 from tests.commons import FakeFileObject
 
 
@@ -22,6 +27,42 @@ class TestConfig(unittest.TestCase):
             }
         }))
 
+    def test_should_parse_snapshot_properties(self):
+        cfg = Config(collections.defaultdict(dict, **{
+            'template': {
+                'show_time': 'tRUe',
+                'show_rear': 'fAlSe',
+                'watermark': 'lorem ipsum'
+            },
+            'pdf': {
+                'backend': 'native'
+            }
+        }))
+        snapshot = cfg.snapshot()
+        self.assertIs(True, snapshot.show_time)
+        self.assertIs(False, snapshot.show_rear)
+        self.assertIs(False, snapshot.cache_fragments)
+        self.assertEqual('lorem ipsum', snapshot.watermark)
+        self.assertEqual('native', snapshot.backend)
+        self.assertEqual((('show_rear', 'fAlSe'),
+                          ('show_time', 'tRUe'),
+                          ('watermark', 'lorem ipsum')), snapshot.template)
+
+    def test_should_not_change_snapshot_when_overridden(self):
+        snapshot = self.cfg.snapshot()
+        with self.assertRaises(AttributeError):
+            snapshot.show_time = True
+        self.cfg._override({'template': {'show_time': 'true'}})
+        self.assertFalse(snapshot.show_time)
+        self.assertTrue(self.cfg.snapshot().show_time)
+
+    def test_should_set_single_property(self):
+        self.cfg.set('section2', 'key', 'value')
+        self.cfg.set('section3', 'key', 'value')
+        self.assertEqual('value', self.cfg.get('section2', 'key'))
+        self.assertEqual('value', self.cfg.get('section3', 'key'))
+        self.assertEqual('łódź jeża lub ośm skrzyń fig', self.cfg.get('section2', 'pchnąć'))
+
     def test_should_raise_exception_on_not_default_dict(self):
         with self.assertRaises(AssertionError):
             Config({})
@@ -150,6 +191,20 @@ class TestConfigFactory(unittest.TestCase):
         config()
         mock_load.assert_called_once_with('ogre', 'config.ini')
 
+    def test_should_load_new_instance(self):
+        self.assertIsNot(config(), ogre.config.load())
+
+    def test_should_return_scoped_instance_in_current_thread_only(self):
+        scoped = Config(collections.defaultdict(dict))
+        seen = []
+        with ogre.config.scope(scoped):
+            self.assertIs(scoped, config())
+            thread = threading.Thread(target=lambda: seen.append(config()))
+            thread.start()
+            thread.join()
+        self.assertIsNot(scoped, seen[0])
+        self.assertIsNot(scoped, config())
+
 
 class TestConfigLoader(unittest.TestCase):
 
@@ -252,4 +307,65 @@ pchn\u0105\u0107=\u0142\xf3d\u017a je\u017ca lub o\u015bm skrzy\u0144 fig
                 'key': 'żółw na starość wydziela wstrętną woń',
                 'pchnąć': 'łódź jeża lub ośm skrzyń fig'
             }
-        }, cfg.get_all())
\ No newline at end of file
+        }, cfg.get_all())
+
+
+class TestConfigCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.patcher = mock.patch.dict(os.environ, {cache.ENV_VARIABLE: self.temp_dir.name})
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.temp_dir.cleanup()
+
+    @mock.patch('ogre.config.open')
+    def test_should_not_parse_cached_file(self, mock_open):
+
+        mock_open.side_effect = lambda *args, **kwargs: FakeFileObject(rb'''[section]
+key=za\u017c\xf3\u0142\u0107
+''')
+
+        self.assertDictEqual({'section': {'key': 'zażółć'}}, _load_from_file('/path/to/file'))
+
+        with mock.patch('ogre.config.RawConfigParser') as mock_parser:
+            dict_obj = _load_from_file('/path/to/file')
+            mock_parser.assert_not_called()
+
+        self.assertIsInstance(dict_obj, collections.defaultdict)
+        self.assertDictEqual({'section': {'key': 'zażółć'}}, dict_obj)
+
+    @mock.patch('ogre.config.open')
+    def test_should_parse_file_cached_by_another_version(self, mock_open):
+
+        mock_open.side_effect = lambda *args, **kwargs: FakeFileObject(b'[section]\nkey=value')
+        _load_from_file('/path/to/file')
+
+        with mock.patch('ogre.__version__', '0.0.0'):
+            with mock.patch('ogre.config.RawConfigParser', wraps=ogre.config.RawConfigParser) as mock_parser:
+                self.assertDictEqual({'section': {'key': 'value'}}, _load_from_file('/path/to/file'))
+                mock_parser.assert_called_once_with()
+
+    @mock.patch('ogre.config.open')
+    def test_should_parse_modified_file(self, mock_open):
+
+        mock_open.return_value = FakeFileObject(b'[section]\nkey=value')
+        _load_from_file('/path/to/file')
+
+        mock_open.return_value = FakeFileObject(b'[section]\nkey=modified value')
+        self.assertDictEqual({'section': {'key': 'modified value'}}, _load_from_file('/path/to/file'))
+
+
+class TestParseSize(unittest.TestCase):
+
+    def test_should_parse_sizes(self):
+        self.assertEqual(100, parse_size('100'))
+        self.assertEqual(512 * 1024 ** 2, parse_size('512M'))
+        self.assertEqual(2 * 1024 ** 3, parse_size('2g'))
+        self.assertEqual(1536, parse_size('1.5KB'))
+
+    def test_should_raise_error_on_invalid_size(self):
+        with self.assertRaises(ValueError):
+            parse_size('two gigabytes')
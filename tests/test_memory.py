@@ -0,0 +1,151 @@
+import tracemalloc
+import unittest
+from unittest import mock
+
+import ogre.memory
+
+from ogre.memory import (MemoryReport, MemoryBudgetExceeded, memory_report,
+                         get_rss, get_retained_size, format_size)
+from ogre.profiling import Profiler
+
+
+class TestMemoryReport(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler()
+        self.patcher = mock.patch('ogre.memory.profiler', return_value=self.profiler)
+        self.patcher.start()
+        self.report = MemoryReport(top=3)
+
+    def tearDown(self):
+        self.report.stop()
+        self.patcher.stop()
+
+    def test_should_be_disabled_until_started(self):
+        self.assertFalse(self.report.enabled)
+
+    def test_should_start_and_stop_tracing(self):
+        self.report.start()
+        self.assertTrue(self.report.enabled)
+        self.assertTrue(self.profiler.enabled)
+        self.assertTrue(tracemalloc.is_tracing())
+        self.report.stop()
+        self.assertFalse(self.report.enabled)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_should_measure_top_level_stages(self):
+
+        self.report.start()
+
+        with self.profiler.stage('outer'):
+            with self.profiler.stage('inner'):
+                data = [bytearray(1024) for _ in range(100)]
+
+        self.assertEqual(['outer'], list(self.report.stages))
+
+        memory = self.report.stages['outer']
+
+        self.assertGreaterEqual(memory.peak, 100 * 1024)
+        self.assertGreaterEqual(memory.delta, 100 * 1024)
+        self.assertLessEqual(len(memory.top), 3)
+        self.assertEqual(__file__, memory.top[0].traceback[0].filename)
+
+        del data
+
+    def test_should_abort_when_budget_exceeded_after_item(self):
+
+        self.report.budget = 1024
+        self.report.start()
+
+        with self.assertRaisesRegex(MemoryBudgetExceeded, 'after foo.xml'):
+            with self.profiler.item('files', 'foo.xml'):
+                data = bytearray(4096)
+
+        del data
+
+    def test_should_not_abort_within_budget(self):
+        self.report.budget = 1024 ** 3
+        self.report.start()
+        with self.profiler.stage('foo'):
+            with self.profiler.item('files', 'foo.xml'):
+                pass
+
+    @mock.patch('ogre.memory.get_rss', return_value=4096)
+    def test_should_check_budget_against_rss_without_tracing(self, mock_get_rss):
+
+        self.report.budget = 1024
+        self.report.start(detailed=False)
+
+        self.assertFalse(tracemalloc.is_tracing())
+        with self.assertRaisesRegex(MemoryBudgetExceeded, 'after foo with 4.0 KiB'):
+            with self.profiler.stage('foo'):
+                pass
+
+        self.assertEqual({}, self.report.stages)
+
+    @mock.patch('ogre.memory.get_rss', return_value=None)
+    def test_should_skip_budget_when_rss_unknown(self, mock_get_rss):
+        self.report.budget = 1
+        self.report.start(detailed=False)
+        with self.profiler.item('files', 'foo.xml'):
+            pass
+
+    def test_should_not_retain_size_without_details(self):
+        self.report.start(detailed=False)
+        self.report.retain('foo', [1, 2, 3])
+        self.assertEqual({}, self.report.retained)
+
+    def test_should_not_retain_when_disabled(self):
+        self.report.retain('foo', [1, 2, 3])
+        self.assertEqual({}, self.report.retained)
+
+    def test_should_retain_size_when_enabled(self):
+        self.report.start()
+        self.report.retain('foo', [1, 2, 3])
+        self.assertEqual({'foo': get_retained_size([1, 2, 3])}, self.report.retained)
+
+    def test_should_include_stages_and_retained_sizes_in_summary(self):
+        self.report.start()
+        with self.profiler.stage('model'):
+            pass
+        self.report.retain('Model._replies', {})
+        summary = self.report.summary()
+        self.assertTrue(summary[1].startswith('model'))
+        self.assertIn('Retained size:', summary)
+        self.assertTrue(summary[-1].strip().startswith('Model._replies'))
+
+    @mock.patch('ogre.memory._INSTANCE', None)
+    def test_should_return_singleton(self):
+        self.assertIs(memory_report(), memory_report())
+        self.assertIsInstance(ogre.memory._INSTANCE, MemoryReport)
+
+
+class TestRetainedSize(unittest.TestCase):
+
+    def test_should_include_nested_objects(self):
+        nested = [bytearray(1000)]
+        self.assertGreater(get_retained_size({'key': nested}), 1000)
+
+    def test_should_count_shared_objects_once(self):
+        shared = bytearray(1000)
+        self.assertLess(get_retained_size([shared, shared]), 2000)
+
+    def test_should_skip_classes_and_modules(self):
+        self.assertLess(get_retained_size([MemoryReport, ogre.memory]), 1000)
+
+
+class TestSize(unittest.TestCase):
+
+    def test_should_return_rss_of_the_process(self):
+        self.assertGreater(get_rss(), 0)
+
+    @mock.patch('ogre.memory.open', side_effect=FileNotFoundError, create=True)
+    @mock.patch('ogre.memory.get_peak_rss', return_value=42)
+    def test_should_fall_back_to_peak_rss(self, mock_get_peak_rss, mock_open):
+        self.assertEqual(42, get_rss())
+
+    def test_should_format_sizes(self):
+        self.assertEqual('512 B', format_size(512))
+        self.assertEqual('1.5 KiB', format_size(1536))
+        self.assertEqual('-2.0 MiB', format_size(-2 * 1024 ** 2))
+        self.assertEqual('2048.0 GiB', format_size(2 * 1024 ** 4))
@@ -0,0 +1,120 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import ogre
+import ogre.metrics
+
+from ogre.metrics import Registry, metrics, get_peak_rss
+from ogre.profiling import Profiler
+
+
+class TestRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+        self.patcher = mock.patch('ogre.metrics.profiler', return_value=Profiler())
+        self.mock_profiler = self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_should_return_zero_for_unknown_counter(self):
+        self.assertEqual(0, self.registry['foo'])
+
+    def test_should_increment_counter(self):
+        self.registry.increment('foo')
+        self.registry.increment('foo', 41)
+        self.assertEqual(42, self.registry['foo'])
+
+    def test_should_set_counter(self):
+        self.registry['foo'] = 5
+        self.registry['foo'] = 7
+        self.assertEqual(7, self.registry['foo'])
+
+    def test_should_reset_counters(self):
+        self.registry.increment('foo')
+        self.registry.reset()
+        self.assertEqual({}, self.registry.to_dict()['counters'])
+
+    def test_should_include_version_and_counters(self):
+        self.registry.increment('pages', 3)
+        document = self.registry.to_dict()
+        self.assertEqual(ogre.__version__, document['version'])
+        self.assertEqual({'pages': 3}, document['counters'])
+
+    @mock.patch('time.process_time', side_effect=[0.0, 1.0, 0.0, 1.0])
+    @mock.patch('time.perf_counter', side_effect=[0.0, 2.0, 0.0, 4.0])
+    def test_should_include_stages_and_rates(self, *args):
+
+        profiler = Profiler(enabled=True)
+        self.mock_profiler.return_value = profiler
+
+        with profiler.stage('render'):
+            pass
+        with profiler.stage('save'):
+            pass
+
+        self.registry['pages'] = 10
+        self.registry['bytes.written'] = 100
+
+        document = self.registry.to_dict()
+
+        self.assertEqual({'render': {'wall': 2.0, 'cpu': 1.0},
+                          'save': {'wall': 4.0, 'cpu': 1.0}},
+                         document['stages'])
+        self.assertEqual({'pages_per_second': 5.0, 'bytes_per_second': 25.0},
+                         document['rates'])
+
+    def test_should_append_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.jsonl')
+            self.registry.increment('pages')
+            self.registry.dump(path)
+            self.registry.dump(path)
+            with open(path, encoding='utf-8') as file_object:
+                lines = file_object.readlines()
+        self.assertEqual(2, len(lines))
+        self.assertEqual({'pages': 1}, json.loads(lines[1])['counters'])
+
+    @mock.patch('ogre.metrics._INSTANCE', None)
+    def test_should_return_singleton(self):
+        self.assertIs(metrics(), metrics())
+        self.assertIsInstance(ogre.metrics._INSTANCE, Registry)
+
+    def test_should_return_scoped_registry_in_current_thread_only(self):
+        seen = []
+        with ogre.metrics.scope() as registry:
+            self.assertIs(registry, metrics())
+            thread = threading.Thread(target=lambda: seen.append(metrics()))
+            thread.start()
+            thread.join()
+        self.assertIsNot(registry, seen[0])
+        self.assertIsNot(registry, metrics())
+
+    @mock.patch('time.process_time', side_effect=[0.0, 1.0, 0.0, 3.0, 0.0, 1.0])
+    @mock.patch('time.perf_counter', side_effect=[0.0, 2.0, 0.0, 5.0, 0.0, 4.0])
+    def test_should_include_stages_since_start_of_scope(self, *args):
+
+        profiler = Profiler(enabled=True)
+        self.mock_profiler.return_value = profiler
+
+        with profiler.stage('render'):
+            pass
+
+        with ogre.metrics.scope() as registry:
+            with profiler.stage('render'):
+                pass
+            with profiler.stage('save'):
+                pass
+
+        self.assertEqual({'render': {'wall': 5.0, 'cpu': 3.0},
+                          'save': {'wall': 4.0, 'cpu': 1.0}},
+                         registry.to_dict()['stages'])
+
+    @mock.patch('ogre.metrics.resource', None)
+    def test_should_return_none_peak_rss_without_resource_module(self):
+        self.assertIsNone(get_peak_rss())
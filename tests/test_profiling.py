@@ -0,0 +1,113 @@
+import unittest
+from unittest import mock
+
+import ogre.profiling
+
+from ogre.profiling import Profiler, profiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler(enabled=True)
+
+    def test_should_be_disabled_by_default(self):
+        self.assertFalse(Profiler().enabled)
+
+    def test_should_not_record_when_disabled(self):
+        p = Profiler()
+        with p.stage('foo'):
+            with p.item('files', 'bar'):
+                pass
+        self.assertEqual({}, p.stages)
+        self.assertEqual([], p.items('files'))
+
+    @mock.patch('time.process_time', side_effect=[0.0, 1.0])
+    @mock.patch('time.perf_counter', side_effect=[10.0, 12.5])
+    def test_should_record_wall_and_cpu_time_of_stage(self, *args):
+        with self.profiler.stage('foo'):
+            pass
+        self.assertEqual((2.5, 1.0), self.profiler.stages['foo'])
+
+    @mock.patch('time.process_time', side_effect=[0.0, 1.0, 2.0, 3.0])
+    @mock.patch('time.perf_counter', side_effect=[0.0, 1.0, 2.0, 3.0])
+    def test_should_accumulate_stage_entered_many_times(self, *args):
+        for _ in range(2):
+            with self.profiler.stage('foo'):
+                pass
+        self.assertEqual((2.0, 2.0), self.profiler.stages['foo'])
+
+    @mock.patch('time.process_time', side_effect=[0.0, 1.0, 3.0, 10.0])
+    @mock.patch('time.perf_counter', side_effect=[0.0, 1.0, 3.0, 10.0])
+    def test_should_exclude_nested_stages(self, *args):
+        with self.profiler.stage('outer'):
+            with self.profiler.stage('inner'):
+                pass
+        self.assertEqual((2.0, 2.0), self.profiler.stages['inner'])
+        self.assertEqual((8.0, 8.0), self.profiler.stages['outer'])
+
+    def test_should_keep_stages_in_order_of_appearance(self):
+        for name in ('scan', 'model', 'parse', 'render'):
+            with self.profiler.stage(name):
+                pass
+        self.assertEqual(['scan', 'model', 'parse', 'render'],
+                         list(self.profiler.stages))
+
+    def test_should_record_stage_on_exception(self):
+        with self.assertRaises(ValueError):
+            with self.profiler.stage('foo'):
+                raise ValueError
+        self.assertIn('foo', self.profiler.stages)
+
+    @mock.patch('time.process_time', side_effect=[0, 1, 0, 3, 0, 2])
+    @mock.patch('time.perf_counter', side_effect=[0, 1, 0, 3, 0, 2])
+    def test_should_sort_items_by_wall_time(self, *args):
+        for name in ('a', 'b', 'c'):
+            with self.profiler.item('debtors', name):
+                pass
+        self.assertEqual(['b', 'c', 'a'],
+                         [name for name, _ in self.profiler.items('debtors')])
+
+    @mock.patch('time.process_time', side_effect=[0, 1, 0, 3, 0, 2, 0, 5, 0, 6])
+    @mock.patch('time.perf_counter', side_effect=[0, 1, 0, 3, 0, 2, 0, 5, 0, 6])
+    def test_should_rank_slowest_items_in_summary(self, *args):
+        for name in ('a', 'b', 'c'):
+            with self.profiler.item('debtors', name):
+                pass
+        with self.profiler.stage('scan'):
+            pass
+        with self.profiler.item('files', 'x.xml'):
+            pass
+        self.assertListEqual([
+            'Stage           Wall [s]     CPU [s]',
+            'scan               5.000       5.000',
+            'total              5.000       5.000',
+            '',
+            'Slowest debtors of 3:',
+            '   1.     3.000 s  b',
+            '   2.     2.000 s  c',
+            '',
+            'Slowest files of 1:',
+            '   1.     6.000 s  x.xml',
+        ], self.profiler.summary(top=2))
+
+    def test_should_notify_listeners_of_top_level_stages_and_items(self):
+
+        listener = mock.Mock()
+        self.profiler.listeners.append(listener)
+
+        with self.profiler.stage('model'):
+            with self.profiler.stage('parse'):
+                with self.profiler.item('files', 'foo.xml'):
+                    pass
+
+        self.assertListEqual([
+            mock.call.stage_started('model'),
+            mock.call.item_finished('files', 'foo.xml'),
+            mock.call.stage_finished('model'),
+        ], listener.mock_calls)
+
+    @mock.patch('ogre.profiling._INSTANCE', None)
+    def test_should_return_singleton(self):
+        self.assertIs(profiler(), profiler())
+        self.assertIsInstance(ogre.profiling._INSTANCE, Profiler)
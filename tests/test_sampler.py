@@ -0,0 +1,100 @@
+import os
+import time
+import threading
+import tempfile
+import unittest
+from unittest import mock
+
+from ogre import sampler
+from ogre.sampler import Sampler, get_label, from_environment
+
+
+def busy_function(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'stacks.folded')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_should_raise_error_on_invalid_rate(self):
+        with self.assertRaises(AssertionError):
+            Sampler(self.path, rate=0)
+
+    def test_should_sample_current_thread(self):
+        s = Sampler(self.path)
+        s._thread_id = mock.sentinel.thread_id
+        s.sample()
+        self.assertEqual(0, sum(s.samples.values()))
+
+    @mock.patch('ogre.sampler.logger')
+    def test_should_write_folded_stacks(self, mock_logger):
+
+        with Sampler(self.path, rate=1000):
+            busy_function(0.2)
+
+        with open(self.path, encoding='utf-8') as file_object:
+            lines = file_object.read().splitlines()
+
+        self.assertTrue(lines)
+
+        stack, count = lines[0].rsplit(' ', 1)
+
+        self.assertGreater(int(count), 0)
+        self.assertTrue(any('test_sampler.py:busy_function' in line for line in lines))
+        self.assertTrue(stack.split(';')[-1])
+
+    def test_should_fold_stacks_from_root_to_leaf(self):
+
+        def outer():
+            return inner()
+
+        def inner():
+            s = Sampler(self.path)
+            s._thread_id = threading.get_ident()
+            s.sample()
+            s.sample()
+            return s
+
+        (stack, count), = outer().folded()
+
+        self.assertEqual(2, count)
+        self.assertTrue(stack.endswith(
+            'test_sampler.py:TestSampler.test_should_fold_stacks_from_root_to_leaf.<locals>.outer;'
+            'test_sampler.py:TestSampler.test_should_fold_stacks_from_root_to_leaf.<locals>.inner;'
+            'sampler.py:Sampler.sample'))
+
+    def test_should_stop_background_thread(self):
+        s = Sampler(self.path)
+        s.start()
+        s.stop()
+        self.assertIsNone(s._thread)
+
+    def test_should_label_code_with_file_and_function(self):
+        self.assertEqual('test_sampler.py:busy_function', get_label(busy_function.__code__))
+
+
+class TestEnvironment(unittest.TestCase):
+
+    @mock.patch.dict(os.environ, {sampler.ENV_VARIABLE: ''})
+    def test_should_return_none_without_environment_variable(self):
+        self.assertIsNone(from_environment())
+
+    @mock.patch.dict(os.environ, {sampler.ENV_VARIABLE: '/tmp/stacks.folded',
+                                  sampler.ENV_VARIABLE_RATE: ''})
+    def test_should_use_default_rate(self):
+        s = from_environment()
+        self.assertEqual('/tmp/stacks.folded', s.path)
+        self.assertAlmostEqual(1.0 / sampler.DEFAULT_RATE, s.interval)
+
+    @mock.patch.dict(os.environ, {sampler.ENV_VARIABLE: '/tmp/stacks.folded',
+                                  sampler.ENV_VARIABLE_RATE: '20'})
+    def test_should_use_rate_from_environment(self):
+        self.assertAlmostEqual(0.05, from_environment().interval)
@@ -0,0 +1,164 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+from ogre.server import ReportServer, Job, parse_job, parse_address
+
+
+class TestReportServer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.runner = mock.Mock(return_value='/path/to/output.pdf')
+        self.server = ReportServer(('127.0.0.1', 0), 1, self.runner, 'secret')
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05})
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d' % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.temp_dir.cleanup()
+
+    def post(self, obj, content_type='application/json', token='secret'):
+        request = urllib.request.Request(
+            self.url + '/jobs', data=json.dumps(obj).encode('utf-8'), headers={
+                'Content-Type': content_type,
+                'Authorization': 'Bearer ' + token})
+        with urllib.request.urlopen(request) as response:
+            return [json.loads(line.decode('utf-8')) for line in response]
+
+    def get_status(self):
+        request = urllib.request.Request(self.url + '/', headers={'Authorization': 'Bearer secret'})
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def test_should_report_status(self):
+        self.assertDictEqual({'status': 'ok', 'queued': 0, 'running': 0}, self.get_status())
+
+    def test_should_reject_request_without_token(self):
+        for token in ('', 'wrong'):
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                self.post({'working_dir': self.temp_dir.name, 'output': 'report.pdf'}, token=token)
+            self.assertEqual(401, context.exception.code)
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            urllib.request.urlopen(self.url + '/')
+        self.assertEqual(401, context.exception.code)
+        self.runner.assert_not_called()
+
+    def test_should_reject_job_without_json_content_type(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.post({'working_dir': self.temp_dir.name, 'output': 'report.pdf'}, content_type='text/plain')
+        self.assertEqual(415, context.exception.code)
+        self.runner.assert_not_called()
+
+    def test_should_stream_progress_and_output(self):
+
+        def runner(job, progress):
+            progress(status='parsed', files=2, debtors=3)
+            return job.output
+
+        self.runner.side_effect = runner
+
+        events = self.post({'working_dir': self.temp_dir.name, 'output': 'report.pdf'})
+
+        self.assertListEqual([
+            {'status': 'queued'},
+            {'status': 'running'},
+            {'status': 'parsed', 'files': 2, 'debtors': 3},
+            {'status': 'done', 'output': os.path.join(os.path.realpath(self.temp_dir.name), 'report.pdf')}
+        ], events)
+
+    @mock.patch('ogre.server.logger')
+    def test_should_stream_error_of_failed_job(self, mock_logger):
+        self.runner.side_effect = RuntimeError('There are no pages to be rendered')
+        events = self.post({'working_dir': self.temp_dir.name, 'output': 'report.pdf'})
+        self.assertDictEqual({'status': 'failed', 'error': 'There are no pages to be rendered'}, events[-1])
+
+    def test_should_reject_invalid_job(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.post({'output': 'report.pdf'})
+        self.assertEqual(400, context.exception.code)
+        self.runner.assert_not_called()
+
+    def test_should_run_one_job_at_a_time(self):
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def runner(job, progress):
+            started.set()
+            release.wait(5)
+            return job.output
+
+        self.runner.side_effect = runner
+
+        thread = threading.Thread(
+            target=self.post, args=({'working_dir': self.temp_dir.name, 'output': 'a'},))
+        thread.start()
+        started.wait(5)
+
+        try:
+            self.assertEqual(1, self.get_status()['running'])
+            self.assertEqual(1, self.server.counts['running'])
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(0, self.server.counts['running'])
+
+
+class TestParseJob(unittest.TestCase):
+
+    def test_should_resolve_paths_against_working_dir(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            working_dir = os.path.realpath(temp_dir)
+            job = parse_job({
+                'working_dir': working_dir,
+                'files': ['a.xml', 'b/c.xml'],
+                'output': 'report',
+                'split': True,
+                'jobs': 4
+            })
+            self.assertEqual(Job(working_dir=os.path.abspath(working_dir),
+                                 file_paths=[os.path.join(working_dir, 'a.xml'),
+                                             os.path.join(working_dir, 'b', 'c.xml')],
+                                 output=os.path.join(working_dir, 'report'),
+                                 format='pdf',
+                                 split=True,
+                                 force=False,
+                                 jobs=4), job)
+
+    def test_should_reject_invalid_jobs(self):
+        with tempfile.TemporaryDirectory() as working_dir:
+            for obj in ([],
+                        {'output': 'report'},
+                        {'working_dir': '/no/such/directory', 'output': 'report'},
+                        {'working_dir': working_dir},
+                        {'working_dir': working_dir, 'output': 'report', 'files': 'a.xml'},
+                        {'working_dir': working_dir, 'output': 'report', 'jobs': 0},
+                        {'working_dir': working_dir, 'output': os.path.abspath('report')},
+                        {'working_dir': working_dir, 'output': os.path.join('..', 'report')},
+                        {'working_dir': working_dir, 'output': '.'},
+                        {'working_dir': working_dir, 'output': 'report', 'files': ['../a.xml']}):
+                with self.assertRaises(ValueError):
+                    parse_job(obj)
+
+
+class TestParseAddress(unittest.TestCase):
+
+    def test_should_parse_host_and_port(self):
+        self.assertEqual(('localhost', 8000), parse_address('localhost:8000'))
+
+    def test_should_use_default_host(self):
+        self.assertEqual(('127.0.0.1', 8000), parse_address('8000'))
+
+    def test_should_raise_error_on_invalid_port(self):
+        with self.assertRaises(ValueError):
+            parse_address('localhost:http')
@@ -0,0 +1,53 @@
+import os
+import sys
+import subprocess
+import unittest
+
+import ogre
+
+SCRIPT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'scripts', 'ogreport.py')
+
+# Modules which are slow to import and must only load once needed
+HEAVY_MODULES = ('pkg_resources', 'reportlab', 'xmltodict', 'dateutil', 'pyuca')
+
+# Generous total in microseconds to tolerate slow continuous integration
+BUDGET = 500000
+
+
+def get_import_times(*args):
+    """Return a dict of modules and their self import times in microseconds."""
+
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(ogre.__file__)))
+
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', SCRIPT_PATH] + list(args),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        env=env,
+        universal_newlines=True,
+        check=True)
+
+    import_times = {}
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            self_time, _, name = line[len('import time:'):].split('|')
+            if self_time.strip().isdigit():
+                import_times[name.strip()] = int(self_time)
+
+    return import_times
+
+
+class TestStartup(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.import_times = get_import_times('--help')
+
+    def test_should_not_import_heavy_modules_before_parsing_arguments(self):
+        for name in self.import_times:
+            self.assertNotIn(name.split('.')[0], HEAVY_MODULES)
+
+    def test_should_import_within_budget(self):
+        self.assertLess(sum(self.import_times.values()), BUDGET)